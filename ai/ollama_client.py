@@ -1,12 +1,29 @@
+import asyncio
+import json
+import os
+import re
+
+import httpx
 import requests
 
-class Ollama_triage_client:
-    def __init__(self,model:str="llama3"):
-        self.model =model
-        self.url = "http://localhost:11434/api/generate"
-        
-    def predict_specialty(self, symptom_text: str) -> str:
-        prompt = f"""
+from ai.triage_cache import normalize_symptoms
+
+DEFAULT_URL = os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate")
+DEFAULT_BATCH_SIZE = 25
+
+# Generation limits: a specialty name is a handful of tokens, so the model is
+# cut off well before it can ramble, answers deterministically, and stays
+# loaded between calls instead of being reloaded for every triage
+NUM_PREDICT = 16
+NUM_PREDICT_PER_ITEM = 12
+TEMPERATURE = 0.0
+KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+_BATCH_LINE = re.compile(r"^\s*(\d+)\s*[:.)\-]\s*(.+?)\s*$")
+
+
+def build_prompt(symptom_text: str) -> str:
+    return f"""
 You are a medical triage assistant.
 Given the patient's symptoms, return ONLY the medical specialty name.
 No explanation.
@@ -14,18 +31,306 @@ No explanation.
 Symptoms: {symptom_text}
 
 Output format example:
-Cardiologist,Deramtologist,Gyncologist 
+Cardiologist,Deramtologist,Gyncologist
 """
 
-        data = {
+
+def build_batch_prompt(symptom_texts: list) -> str:
+    numbered = "\n".join(f"{i}. {' '.join(text.split())}" for i, text in enumerate(symptom_texts, 1))
+    return f"""
+You are a medical triage assistant.
+For each numbered patient below, return ONLY the medical specialty name.
+No explanation. Answer with exactly one line per patient, in the same order.
+
+Symptoms:
+{numbered}
+
+Output format example:
+1: Cardiologist
+2: Dermatologist
+"""
+
+
+def parse_batch_response(text: str, count: int) -> list:
+    """Per-item specialties from a batch answer; None where a line is missing."""
+    results = [None] * count
+    for line in text.splitlines():
+        match = _BATCH_LINE.match(line)
+        if match:
+            i = int(match.group(1)) - 1
+            if 0 <= i < count and results[i] is None:
+                results[i] = match.group(2)
+    return results
+
+
+def _chunks(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class SpecialtyMatcher:
+    """First known specialty name in (possibly partial) model output.
+
+    Mid-stream a name only counts once something follows it, so
+    "Surgeon" is not taken while the text could still be "Surgeons" and
+    "Orthopedic" waits for "Surgeon".
+    """
+
+    def __init__(self, specialties):
+        self._names = {name.lower(): name for name in specialties}
+        # longest first, so "Orthopedic Surgeon" wins over "Surgeon"
+        alternatives = sorted(self._names, key=len, reverse=True)
+        self._pattern = re.compile(
+            r"\b(" + "|".join(re.escape(name) for name in alternatives) + r")s?\b", re.IGNORECASE
+        )
+
+    def find(self, text: str, final: bool = True) -> str | None:
+        match = self._pattern.search(text)
+        if match is None or (not final and match.end() == len(text)):
+            return None
+        return self._names[match.group(1).lower()]
+
+
+def _read_chunk(line, text: str) -> tuple:
+    """(text so far, generation finished) after one NDJSON line of /api/generate."""
+    if not line:
+        return text, False
+    chunk = json.loads(line)
+    if "error" in chunk:
+        raise RuntimeError(f"Ollama error: {chunk['error']}")
+    return text + chunk.get("response", ""), chunk.get("done", False)
+
+
+class _GenerateOptions:
+    """Request body shared by the sync and async clients."""
+
+    def _request(self, prompt: str, num_predict: int) -> dict:
+        return {
             "model": self.model,
             "prompt": prompt,
-            "stream": False,
+            "stream": self.stream,
+            "keep_alive": self.keep_alive,
+            "options": {"num_predict": num_predict, "temperature": self.temperature},
         }
 
-        response = requests.post(self.url, json=data, timeout=60)
-        result = response.json()
+    def _single_done(self, text: str) -> bool:
+        return self.matcher is not None and self.matcher.find(text, final=False) is not None
+
+    def _single_answer(self, text: str) -> str:
+        specialty = self.matcher.find(text) if self.matcher is not None else None
+        return specialty or text.strip()
+
+    def _batch_done(self, count: int):
+        def done(text: str) -> bool:
+            # every numbered line is in; whatever the model adds after is not needed
+            complete, _, partial = text.rpartition("\n")
+            answers = parse_batch_response(complete, count)
+            missing = [i for i, answer in enumerate(answers) if answer is None]
+            if not missing:
+                return True
+            # the line being written counts once it names a known specialty
+            match = _BATCH_LINE.match(partial)
+            return (
+                self.matcher is not None
+                and len(missing) == 1
+                and match is not None
+                and int(match.group(1)) - 1 == missing[0]
+                and self.matcher.find(match.group(2), final=False) is not None
+            )
+        return done
+
+    def _batch_answers(self, text: str, count: int) -> list:
+        answers = parse_batch_response(text, count)
+        if self.matcher is None:
+            return answers
+        return [answer and (self.matcher.find(answer) or answer) for answer in answers]
+
+
+class Ollama_triage_client(_GenerateOptions):
+    """Blocking client for Ollama's /api/generate.
+
+    With ``stream`` (the default) the answer is read token by token and the
+    connection is dropped as soon as ``specialties`` contains a complete
+    name, which makes Ollama stop generating.
+    """
+
+    def __init__(
+        self,
+        model: str = "llama3",
+        url: str = DEFAULT_URL,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        specialties=None,
+        stream: bool = True,
+        num_predict: int = NUM_PREDICT,
+        temperature: float = TEMPERATURE,
+        keep_alive: str = KEEP_ALIVE,
+    ):
+        self.model = model
+        self.url = url
+        self.batch_size = batch_size
+        self.matcher = SpecialtyMatcher(specialties) if specialties else None
+        self.stream = stream
+        self.num_predict = num_predict
+        self.temperature = temperature
+        self.keep_alive = keep_alive
+        # keep-alive connection reused across calls
+        self.session = requests.Session()
+
+    def predict_specialty(self, symptom_text: str) -> str:
+        text = self._generate(build_prompt(symptom_text), self.num_predict, 60, self._single_done)
+        return self._single_answer(text)
+
+    def predict_specialties(self, symptom_texts: list) -> list:
+        """One generate call per ``batch_size`` texts; None for unparsed items."""
+        results = []
+        for chunk in _chunks(symptom_texts, self.batch_size):
+            text = self._generate(
+                build_batch_prompt(chunk),
+                NUM_PREDICT_PER_ITEM * len(chunk),
+                60 + 5 * len(chunk),
+                self._batch_done(len(chunk)),
+            )
+            results.extend(self._batch_answers(text, len(chunk)))
+        return results
+
+    def _generate(self, prompt: str, num_predict: int, timeout: float, done) -> str:
+        """Generated text; a stream is abandoned once ``done(text)`` holds."""
+        data = self._request(prompt, num_predict)
+        if not self.stream:
+            response = self.session.post(self.url, json=data, timeout=timeout)
+            response.raise_for_status()
+            return response.json()["response"]
+        text = ""
+        # leaving the block before the end closes the connection: Ollama stops generating
+        with self.session.post(self.url, json=data, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            # chunk_size=None: hand over each chunk as it arrives, not every 512 bytes
+            for line in response.iter_lines(chunk_size=None):
+                text, finished = _read_chunk(line, text)
+                if finished or done(text):
+                    break
+        return text
+
+
+class Async_ollama_triage_client(_GenerateOptions):
+    """asyncio version of Ollama_triage_client.
+
+    - one keep-alive httpx connection pool, opened on first use (the app
+      builds one client per process)
+    - at most ``max_concurrency`` generate calls in flight; a call waiting
+      out a retry backoff doesn't count
+    - transport errors and 5xx answers retried with exponential backoff
+    - concurrent calls for the same (normalized) symptoms share one request
+    """
+
+    def __init__(
+        self,
+        model: str = "llama3",
+        url: str = DEFAULT_URL,
+        max_concurrency: int = 8,
+        timeout: float = 60.0,
+        retries: int = 2,
+        backoff: float = 0.5,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        specialties=None,
+        stream: bool = True,
+        num_predict: int = NUM_PREDICT,
+        temperature: float = TEMPERATURE,
+        keep_alive: str = KEEP_ALIVE,
+    ):
+        self.model = model
+        self.url = url
+        self.batch_size = batch_size
+        self.matcher = SpecialtyMatcher(specialties) if specialties else None
+        self.stream = stream
+        self.num_predict = num_predict
+        self.temperature = temperature
+        self.keep_alive = keep_alive
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.coalesced = 0
+
+        self._client = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._inflight = {}   # normalized symptoms -> running task
+
+    async def predict_specialty(self, symptom_text: str) -> str:
+        key = normalize_symptoms(symptom_text)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._predict(symptom_text))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _, key=key: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # shield: one caller going away must not cancel the shared request
+        return await asyncio.shield(task)
+
+    async def _predict(self, symptom_text: str) -> str:
+        text = await self._generate(build_prompt(symptom_text), self.num_predict, self._single_done)
+        return self._single_answer(text)
+
+    async def predict_specialties(self, symptom_texts: list) -> list:
+        """Batch triage; chunks are sent concurrently (bounded by the semaphore)."""
+        chunks = list(_chunks(symptom_texts, self.batch_size))
+        answers = await asyncio.gather(*(self._predict_batch(chunk) for chunk in chunks))
+        return [specialty for answer in answers for specialty in answer]
+
+    async def _predict_batch(self, chunk: list) -> list:
+        text = await self._generate(
+            build_batch_prompt(chunk), NUM_PREDICT_PER_ITEM * len(chunk), self._batch_done(len(chunk))
+        )
+        return self._batch_answers(text, len(chunk))
+
+    async def _generate(self, prompt: str, num_predict: int, done) -> str:
+        client = self._get_client()
+        data = self._request(prompt, num_predict)
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    if self.stream:
+                        return await self._read_stream(client, data, done)
+                    response = await client.post(self.url, json=data)
+                    response.raise_for_status()
+                    return response.json()["response"]
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                retryable = (
+                    isinstance(e, httpx.TransportError)
+                    or e.response.status_code >= 500
+                )
+                if not retryable or attempt >= self.retries:
+                    raise
+            # slept outside the semaphore: a failing backend must not starve healthy calls
+            await asyncio.sleep(self.backoff * (2 ** attempt))
+            attempt += 1
+
+    async def _read_stream(self, client, data: dict, done) -> str:
+        text = ""
+        # leaving the block before the end closes the connection: Ollama stops generating
+        async with client.stream("POST", self.url, json=data) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                text, finished = _read_chunk(line, text)
+                if finished or done(text):
+                    break
+        return text
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                    keepalive_expiry=30.0,
+                ),
+            )
+        return self._client
 
-        specialty = result["response"].strip()
-        return specialty
-        
\ No newline at end of file
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
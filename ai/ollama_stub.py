@@ -0,0 +1,166 @@
+"""Tiny stand-in for Ollama's /api/generate, for offline runs and benchmarks.
+
+    python -m ai.ollama_stub --port 11500 --latency 0.5
+    python -m ai.ollama_stub --latency 0.1 --token-latency 0.02 --chatter 40
+    OLLAMA_URL=http://127.0.0.1:11500/api/generate uvicorn backend.main:app
+
+Answers after ``latency`` seconds with a specialty picked from keywords in
+the prompt's "Symptoms:" line. Like a real model, it can then keep talking
+for ``chatter`` tokens at ``token_latency`` seconds each, up to the
+request's ``options.num_predict``. ``"stream": true`` requests get NDJSON
+chunks, one token each, and generation stops when the client hangs up.
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+KEYWORDS = [
+    (("chest", "heart", "palpitation"), "Cardiologist"),
+    (("skin", "rash", "itch", "acne"), "Dermatologist"),
+    (("child", "baby", "infant"), "Pediatrician"),
+    (("bone", "fracture", "joint", "knee"), "Orthopedic Surgeon"),
+    (("headache", "seizure", "numb", "migraine"), "Neurologist"),
+    (("ear", "throat", "nose", "sinus"), "ENT Specialist"),
+    (("pregnan", "period", "menstrua"), "Gynecologist"),
+]
+CHATTER = " because the symptoms described point to this specialty"
+
+
+def stub_specialty(symptoms: str) -> str:
+    text = symptoms.lower()
+    for words, specialty in KEYWORDS:
+        if any(w in text for w in words):
+            return specialty
+    return "General Physician"
+
+
+def stub_answer(prompt: str) -> str:
+    """Single prompt -> "Specialty"; batch prompt -> "1: Specialty" lines."""
+    lines = prompt.splitlines()
+    for i, line in enumerate(lines):
+        if not line.startswith("Symptoms:"):
+            continue
+        single = line[len("Symptoms:"):].strip()
+        if single:
+            return stub_specialty(single)
+        answers = []
+        for item in lines[i + 1:]:
+            number, _, text = item.partition(". ")
+            if not number.isdigit():
+                break
+            answers.append(f"{number}: {stub_specialty(text)}")
+        return "\n".join(answers)
+    return stub_specialty(prompt)
+
+
+def stub_tokens(answer: str, chatter: int, num_predict: int = None) -> list:
+    """``answer`` plus ``chatter`` filler tokens, cut at ``num_predict`` like Ollama does."""
+    filler = re.findall(r"\s*\S+", CHATTER)
+    tokens = re.findall(r"\s*\S+", answer) + [filler[i % len(filler)] for i in range(chatter)]
+    return tokens if num_predict is None or num_predict < 0 else tokens[:num_predict]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # keep-alive connections and chunked streams, as Ollama serves them
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+    token_latency = 0.0
+    chatter = 0
+    calls = 0
+    tokens = 0   # tokens generated, over all calls
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        type(self).calls += 1
+        time.sleep(self.latency)
+        tokens = stub_tokens(
+            stub_answer(body.get("prompt", "")),
+            self.chatter,
+            body.get("options", {}).get("num_predict"),
+        )
+        model = body.get("model", "stub")
+        if body.get("stream", True):
+            self._stream(model, tokens)
+            return
+
+        time.sleep(self.token_latency * len(tokens))
+        type(self).tokens += len(tokens)
+        payload = json.dumps({
+            "model": model,
+            "response": "".join(tokens),
+            "done": True,
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream(self, model: str, tokens: list) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        chunks = [{"model": model, "response": token, "done": False} for token in tokens]
+        chunks.append({"model": model, "response": "", "done": True})
+        try:
+            for chunk in chunks:
+                time.sleep(self.token_latency)
+                line = json.dumps(chunk).encode() + b"\n"
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                self.wfile.flush()
+                type(self).tokens += not chunk["done"]
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # the client has what it needed; stop generating
+            self.close_connection = True
+
+    def handle(self):
+        try:
+            super().handle()
+        except ConnectionResetError:
+            pass   # a client dropped a kept-alive connection
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _handler(latency: float, token_latency: float, chatter: int):
+    # a subclass per server, so counters and settings are not shared
+    return type("StubHandler", (StubHandler,), {
+        "latency": latency, "token_latency": token_latency, "chatter": chatter, "calls": 0, "tokens": 0,
+    })
+
+
+def start_stub(port: int = 0, latency: float = 0.0, token_latency: float = 0.0, chatter: int = 0):
+    """Start the stub in a background thread; returns (server, generate_url)."""
+    handler = _handler(latency, token_latency, chatter)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/api/generate"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama /api/generate server")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds before the first token")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="seconds per generated token")
+    parser.add_argument("--chatter", type=int, default=0, help="tokens generated after the answer")
+    args = parser.parse_args()
+
+    handler = _handler(args.latency, args.token_latency, args.chatter)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), handler)
+    print(f"Ollama stub on http://127.0.0.1:{args.port}/api/generate (latency {args.latency}s)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""Nearest-neighbour reuse of earlier triage answers.
+
+A complaint that the rules can't place and the cache has never seen is
+often a rewording of one the model already answered ("fluttering in my
+chest at night" / "chest fluttering at night"). Every answered text is
+embedded as a hashed TF-IDF vector of its words and word pairs, and a new
+text whose cosine similarity to a stored one reaches ``threshold`` gets
+that text's specialty without a model call.
+
+The vectors are sparse. They are stored row by row (CSR-style arrays,
+which is also what gets persisted) and as inverted lists: per feature, the
+texts that have it. A query gathers the lists of its rarer features only:
+the most common ones are skipped as long as, together, they could not lift
+a text to the threshold on their own, so no text that could reach it is
+missed. The few texts that might are then scored exactly from their rows.
+
+The index is written to an ``.npz`` file every ``save_every`` additions
+and on shutdown, and read back on first use.
+"""
+import logging
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+
+import numpy as np
+
+from ai.triage_cache import normalize_symptoms
+
+logger = logging.getLogger(__name__)
+
+# words that say nothing about the specialty; they'd only add common features
+STOPWORDS = frozenset(
+    "a an and or the i im ive my me have has had having been be am is are was were it its "
+    "this that with of in on at to for from since some very also feel feeling".split()
+)
+# word order matters less than the words: "pain in my chest" ~ "chest pain"
+BIGRAM_WEIGHT = 0.5
+
+
+def _stem(word: str) -> str:
+    # "palpitations" == "palpitation", but "illness" stays
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def embed(symptom_text: str) -> dict:
+    """Feature hash -> term weight (sublinear tf) for the words and word pairs of the text."""
+    words = [_stem(w) for w in re.findall(r"[a-z]+", symptom_text.lower()) if w not in STOPWORDS]
+    pairs = [f"{a} {b}" for a, b in zip(words, words[1:])]
+    # crc32, not hash(): str hashes change between processes and the index is persisted
+    weights = {}
+    for grams, scale in ((words, 1.0), (pairs, BIGRAM_WEIGHT)):
+        for gram, count in Counter(grams).items():
+            weights[zlib.crc32(gram.encode())] = scale * (1.0 + math.log(count))
+    return weights
+
+
+def _grown(array, needed: int):
+    """``array`` with room for ``needed`` items, doubling to keep appends amortized O(1)."""
+    if needed <= len(array):
+        return array
+    bigger = np.zeros(max(needed, 2 * len(array)), dtype=array.dtype)
+    bigger[:len(array)] = array
+    return bigger
+
+
+class _Postings:
+    """Texts that have one feature: ids and term weights, oldest first."""
+
+    __slots__ = ("ids", "weights", "size", "top")
+
+    def __init__(self, ids=None, weights=None):
+        self.ids = np.zeros(2, np.int32) if ids is None else ids
+        self.weights = np.zeros(2, np.float32) if weights is None else weights
+        self.size = 0 if ids is None else len(ids)
+        self.top = float(weights.max()) if self.size else 0.0   # largest weight in the list
+
+    def append(self, doc: int, weight: float) -> None:
+        self.ids = _grown(self.ids, self.size + 1)
+        self.weights = _grown(self.weights, self.size + 1)
+        self.ids[self.size] = doc
+        self.weights[self.size] = weight
+        self.size += 1
+        self.top = max(self.top, weight)
+
+
+class SymptomIndex:
+    """Symptom texts answered by the model, searchable by similarity.
+
+    ``max_size`` bounds the number of texts; once it is reached the oldest
+    half is dropped. With ``path`` the index is persisted there.
+    """
+
+    def __init__(self, path: str = None, threshold: float = 0.8, max_size: int = 100_000,
+                 save_every: int = 500):
+        self.path = path
+        self.threshold = threshold
+        self.max_size = max_size
+        self.save_every = save_every
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._reset()
+
+    # caller holds self._lock (or the index is not shared yet)
+    def _reset(self) -> None:
+        self.size = 0
+        self._features = {}     # feature hash -> slot
+        self._hashes = []       # slot -> feature hash
+        self._postings = []     # slot -> _Postings
+        self._idf = np.zeros(0)                    # slot -> idf, as of the last reweighting
+        self._query = np.zeros(0)                  # slot -> weight in the query being scored, else 0
+        # rows: text d's features are _row_slots/_row_weights[_indptr[d]:_indptr[d + 1]]
+        self._indptr = np.zeros(1, np.int64)
+        self._row_slots = np.zeros(0, np.int32)
+        self._row_weights = np.zeros(0, np.float32)
+        self._inv_norms = np.zeros(0)              # text -> 1 / length of its TF-IDF vector
+        self._codes = np.zeros(0, np.int16)        # text -> index into _specialties
+        self._specialties = []
+        self._texts = []        # text -> normalized symptoms
+        self._ids = {}          # normalized symptoms -> text
+        self._weighted_at = 0   # size when idf and norms were last recomputed
+        self._unsaved = 0
+
+    # ---------- Queries ----------
+    def lookup(self, symptom_text: str) -> str | None:
+        """Specialty of the most similar stored text, if it is similar enough."""
+        match = self.match(symptom_text)
+        with self._lock:
+            if match is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return match[0]
+
+    def match(self, symptom_text: str) -> tuple | None:
+        """(specialty, cosine similarity) of the most similar stored text, if it reaches the threshold."""
+        query = embed(symptom_text)
+        with self._lock:
+            self._ensure_loaded()
+            if not self.size or not query:
+                return None
+            # features no stored text has still count towards the query's length
+            unseen_idf = math.log(1 + self.size) + 1
+            known, length = [], 0.0
+            for feature, tf in query.items():
+                slot = self._features.get(feature)
+                weight = tf * (unseen_idf if slot is None else self._idf[slot])
+                length += weight * weight
+                if slot is not None and self._postings[slot].size:
+                    known.append((self._postings[slot].size, slot, weight))
+            if not known:
+                return None
+            length = math.sqrt(length)
+
+            # Cauchy-Schwarz: the skipped features add at most |q_skipped| / |q| to any text's score
+            known.sort(reverse=True)
+            skipped, first = 0.0, 0
+            while first < len(known) and math.sqrt(skipped + known[first][2] ** 2) < self.threshold * length:
+                skipped += known[first][2] ** 2
+                first += 1
+            if first == len(known):
+                return None   # too little of the query is known for any text to be similar enough
+            bound = math.sqrt(skipped) / length
+            # ... and at most their largest stored weights would, over the text's own length
+            most = sum(w * self._idf[slot] * self._postings[slot].top for _, slot, w in known[:first]) / length
+
+            postings = [(self._postings[slot], weight * self._idf[slot]) for _, slot, weight in known[first:]]
+            ids = np.concatenate([p.ids[:p.size] for p, _ in postings])
+            products = np.concatenate([p.weights[:p.size] * w for p, w in postings])
+            inv_norms = self._inv_norms[ids]
+            partial = np.bincount(ids, weights=products)[ids] * inv_norms / length
+            candidates = np.unique(ids[partial + np.minimum(bound, most * inv_norms) >= self.threshold])
+            if not len(candidates):
+                return None
+
+            scores = self._scores(candidates, known) / length
+            best = int(scores.argmax())
+            if scores[best] < self.threshold:
+                return None
+            return self._specialties[self._codes[candidates[best]]], float(scores[best])
+
+    def _scores(self, docs, known: list):
+        """Exact dot products of the texts ``docs`` with the query, over their normalized rows."""
+        starts, ends = self._indptr[docs], self._indptr[docs + 1]
+        lengths = ends - starts
+        owner = np.repeat(np.arange(len(docs)), lengths)
+        entries = np.arange(lengths.sum()) + np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+
+        slots = [slot for _, slot, _ in known]
+        self._query[slots] = [weight * self._idf[slot] for _, slot, weight in known]
+        products = self._row_weights[entries] * self._query[self._row_slots[entries]]
+        self._query[slots] = 0.0
+        return np.bincount(owner, weights=products, minlength=len(docs)) * self._inv_norms[docs]
+
+    # ---------- Updates ----------
+    def add(self, symptom_text: str, specialty: str) -> None:
+        key = normalize_symptoms(symptom_text)
+        features = embed(symptom_text)
+        if not features:
+            return
+        with self._lock:
+            self._ensure_loaded()
+            code = self._code(specialty)
+            doc = self._ids.get(key)
+            if doc is not None:
+                # the model changed its mind about a text it answered before
+                self._codes[doc] = code
+                return
+            if self.size >= self.max_size:
+                self._drop_oldest(self.size - self.max_size // 2)
+
+            doc = self.size
+            start = int(self._indptr[doc])
+            end = start + len(features)
+            self._row_slots = _grown(self._row_slots, end)
+            self._row_weights = _grown(self._row_weights, end)
+            self._indptr = _grown(self._indptr, doc + 2)
+            self._inv_norms = _grown(self._inv_norms, doc + 1)
+            self._codes = _grown(self._codes, doc + 1)
+
+            self.size += 1
+            squares = 0.0
+            for i, (feature, tf) in enumerate(features.items(), start):
+                slot = self._slot(feature)
+                self._row_slots[i] = slot
+                self._row_weights[i] = tf
+                self._postings[slot].append(doc, tf)
+                squares += (tf * self._idf[slot]) ** 2
+            self._indptr[doc + 1] = end
+            self._inv_norms[doc] = 1 / math.sqrt(squares)
+            self._codes[doc] = code
+            self._texts.append(key)
+            self._ids[key] = doc
+
+            # idf drifts as texts come in; recompute it (and every norm) once the index grew by a quarter
+            if self.size >= max(64, self._weighted_at * 5 // 4):
+                self._reweight()
+            self._unsaved += 1
+            if self.path and self._unsaved >= self.save_every:
+                self._save()
+
+    def save(self) -> None:
+        with self._lock:
+            if self.path and self._unsaved:
+                self._save()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset()
+            self._loaded = True
+            if self.path and os.path.exists(self.path):
+                os.remove(self.path)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": self.size,
+                "max_size": self.max_size,
+                "features": len(self._hashes),
+                "threshold": self.threshold,
+                "persistent": self.path is not None,
+                "loaded": self._loaded,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    # ---------- Internals (caller holds self._lock) ----------
+    def _code(self, specialty: str) -> int:
+        try:
+            return self._specialties.index(specialty)
+        except ValueError:
+            self._specialties.append(specialty)
+            return len(self._specialties) - 1
+
+    def _slot(self, feature: int) -> int:
+        slot = self._features.get(feature)
+        if slot is None:
+            slot = self._features[feature] = len(self._hashes)
+            self._hashes.append(feature)
+            self._postings.append(_Postings())
+            self._idf = _grown(self._idf, slot + 1)
+            self._query = _grown(self._query, slot + 1)
+            # df is 1, counting the text being added
+            self._idf[slot] = math.log((1 + self.size) / 2) + 1
+        return slot
+
+    def _rows(self):
+        """(text of each stored feature, its slot, its term weight), row by row."""
+        end = self._indptr[self.size]
+        owner = np.repeat(np.arange(self.size, dtype=np.int32), np.diff(self._indptr[:self.size + 1]))
+        return owner, self._row_slots[:end], self._row_weights[:end]
+
+    def _reweight(self) -> None:
+        """idf from the current document frequencies, and every text's norm with it."""
+        owner, slots, weights = self._rows()
+        df = np.bincount(slots, minlength=len(self._hashes))
+        self._idf[:len(df)] = np.log((1 + self.size) / (1 + df)) + 1
+        squares = np.bincount(owner, weights=(weights * self._idf[slots]) ** 2, minlength=self.size)
+        self._inv_norms[:self.size] = 1 / np.sqrt(squares)
+        self._weighted_at = self.size
+
+    def _build_postings(self) -> None:
+        owner, slots, weights = self._rows()
+        order = np.argsort(slots, kind="stable")   # stable: each list stays oldest first
+        ids, weights = owner[order], weights[order]
+        ends = np.cumsum(np.bincount(slots, minlength=len(self._hashes))).tolist()
+        self._postings = [
+            _Postings(ids[a:b].copy(), weights[a:b].copy()) for a, b in zip([0] + ends[:-1], ends)
+        ]
+
+    def _drop_oldest(self, count: int) -> None:
+        cut, end = self._indptr[count], self._indptr[self.size]
+        self._row_slots = self._row_slots[cut:end].copy()
+        self._row_weights = self._row_weights[cut:end].copy()
+        self._indptr = self._indptr[count:self.size + 1] - cut
+        self._codes = self._codes[count:self.size].copy()
+        self.size -= count
+        self._inv_norms = np.zeros(self.size)
+        self._texts = self._texts[count:]
+        self._ids = {key: doc for doc, key in enumerate(self._texts)}
+        # features only the dropped texts had go too, and the rest are renumbered
+        kept = np.unique(self._row_slots)
+        renumber = np.zeros(len(self._hashes), np.int32)
+        renumber[kept] = np.arange(len(kept), dtype=np.int32)
+        self._row_slots = renumber[self._row_slots]
+        self._hashes = [self._hashes[slot] for slot in kept.tolist()]
+        self._features = {feature: slot for slot, feature in enumerate(self._hashes)}
+        self._idf = np.zeros(len(self._hashes))
+        self._query = np.zeros(len(self._hashes))
+        self._build_postings()
+        self._reweight()
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not (self.path and os.path.exists(self.path)):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                self._restore(data)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("similarity index %s unreadable, starting empty: %s", self.path, e)
+            self._reset()
+
+    def _restore(self, data) -> None:
+        self._indptr = data["indptr"]
+        self.size = len(self._indptr) - 1
+        self._row_slots = data["row_slots"]
+        self._row_weights = data["row_weights"]
+        self._codes = data["codes"]
+        self._specialties = data["specialties"].tolist()
+        self._texts = str(data["texts"]).split("\n") if self.size else []
+        self._ids = {key: doc for doc, key in enumerate(self._texts)}
+        self._hashes = data["hashes"].tolist()
+        self._features = {feature: slot for slot, feature in enumerate(self._hashes)}
+        self._idf = np.zeros(len(self._hashes))
+        self._query = np.zeros(len(self._hashes))
+        self._inv_norms = np.zeros(self.size)
+        self._build_postings()
+        self._reweight()
+
+    def _save(self) -> None:
+        end = self._indptr[self.size]
+        # written next to the index and renamed over it, so a crash never leaves half a file
+        tmp = f"{self.path}.tmp.npz"
+        np.savez(
+            tmp,
+            hashes=np.array(self._hashes, np.uint32),
+            indptr=self._indptr[:self.size + 1],
+            row_slots=self._row_slots[:end],
+            row_weights=self._row_weights[:end],
+            codes=self._codes[:self.size],
+            specialties=np.array(self._specialties, dtype=str),
+            texts=np.array("\n".join(self._texts)),
+        )
+        os.replace(tmp, self.path)
+        self._unsaved = 0
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import queue
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# rows written to the SQLite table per commit, at most
+WRITE_BATCH = 256
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_symptoms(symptom_text: str) -> str:
+    """Cache key: lowercase words only, so "Chest pain " == "chest pain"."""
+    return " ".join(re.findall(r"[a-z0-9]+", symptom_text.lower()))
+
+
+class TriageCache:
+    """Bounded LRU of symptom text -> predicted specialty, with a TTL.
+
+    If ``db_path`` is given, entries are also written to a small SQLite
+    table and read back on a memory miss, so they survive restarts. Writes
+    go through a queue to a background thread that commits them in batches,
+    so ``set`` never waits on the disk; ``get_async`` reads a memory miss
+    from the table on a worker thread, off the event loop.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 24 * 3600, db_path: str = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()   # key -> (specialty, stored_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.persistent_hits = 0
+
+        self._db = None
+        self._db_lock = threading.Lock()   # the connection is shared by readers and the writer
+        self._writes = queue.Queue()   # (key, specialty, stored_at) rows waiting for the writer
+        self._writer = None
+        if db_path:
+            # WAL + a busy timeout: several worker processes can share the file
+            self._db = sqlite3.connect(db_path, timeout=5.0, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS triage_cache ("
+                "key TEXT PRIMARY KEY, specialty TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            # expired rows would never be served again
+            self._db.execute("DELETE FROM triage_cache WHERE stored_at < ?", (time.time() - ttl,))
+            self._db.commit()
+
+    def get(self, symptom_text: str) -> str | None:
+        key = normalize_symptoms(symptom_text)
+        found, specialty = self._get_remembered(key)
+        return specialty if found else self._get_stored(key)
+
+    async def get_async(self, symptom_text: str) -> str | None:
+        """``get`` for the event loop: a memory miss reads the table on a worker thread."""
+        key = normalize_symptoms(symptom_text)
+        found, specialty = self._get_remembered(key)
+        if found:
+            return specialty
+        if self._db is None:
+            return self._get_stored(key)
+        return await asyncio.to_thread(self._get_stored, key)
+
+    def set(self, symptom_text: str, specialty: str) -> None:
+        key = normalize_symptoms(symptom_text)
+        entry = (specialty, time.time())
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._writes.put((key, *entry))
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_behind, name="triage-cache-writer", daemon=True)
+                    self._writer.start()
+
+    def flush(self) -> None:
+        """Wait until every ``set`` so far is committed to the table."""
+        if self._db is not None:
+            self._writes.join()
+
+    def clear(self) -> None:
+        self.flush()
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                with self._db_lock:
+                    self._db.execute("DELETE FROM triage_cache")
+                    self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "persistent": self._db is not None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "persistent_hits": self.persistent_hits,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    # caller holds self._lock
+    def _remember(self, key, entry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _get_remembered(self, key) -> tuple:
+        """(found, specialty) from memory; a miss here is not counted yet."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                specialty, stored_at = entry
+                if time.time() - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, specialty
+                del self._entries[key]
+                self.expirations += 1
+        return False, None
+
+    def _get_stored(self, key) -> str | None:
+        entry = self._load(key)
+        with self._lock:
+            if entry is not None and time.time() - entry[1] < self.ttl:
+                self._remember(key, entry)
+                self.hits += 1
+                self.persistent_hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def _load(self, key):
+        if self._db is None:
+            return None
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT specialty, stored_at FROM triage_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+    def _write_behind(self) -> None:
+        while True:
+            rows = [self._writes.get()]
+            while len(rows) < WRITE_BATCH:
+                try:
+                    rows.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with self._db_lock:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO triage_cache (key, specialty, stored_at) VALUES (?, ?, ?)", rows
+                    )
+                    self._db.commit()
+            except sqlite3.Error as e:
+                # only the copy on disk is lost; memory still has the entries
+                logger.warning("triage cache: %d entries not written: %s", len(rows), e)
+            finally:
+                for _ in rows:
+                    self._writes.task_done()
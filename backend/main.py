@@ -1,18 +1,95 @@
-from fastapi import FastAPI, HTTPException, Depends
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager, nullcontext
+from typing import Literal
+import orjson
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from ai.triage_cache import TriageCache
 
 from backend.models.doctors import Doctor
 from backend.models.patients import Patient
-from backend.meditel import MeditelSystem
-from backend.schemas.doctor_schemas import DoctorResponse, DoctorCreate
-from backend.schemas.appt_schema import AppointmentWithSymptomsRequest, AppointmentResponseModel
+from backend.meditel import MeditelSystem, _LazyClient
+from backend.schemas.doctor_schemas import DoctorResponse, DoctorCreate, DoctorSchedule
+from backend.schemas.appt_schema import (
+    AppointmentWithSymptomsRequest,
+    AppointmentResponseModel,
+    AppointmentBatchItemResult,
+    AppointmentBatchResponse,
+    BookingJobResponse,
+    FreeSlot,
+)
 from backend.schemas.patient_schema import PatientCreate, PatientResponse
-from backend.database import engine, get_db, Base
-from backend.models.db_models import DoctorDB, PatientDB, AppointmentDB
+from backend.schemas.bulk_schema import BulkImportResponse, BulkDeleteResponse
+from backend.database import engine, async_engine, get_async_db, AsyncSessionLocal
+from backend.migrations import upgrade
+from backend.models.appointment import Appointment
+from backend.models.db_models import DoctorDB, DoctorLeaveDB, PatientDB, AppointmentDB
+from backend.service.persistence import load_system, load_schedule
+from backend.service import shared_state
+from backend.service.sync import sync_system
+from backend.service.scheduler import MAX_SLOT_SEARCH
+from backend.service.specialty_index import SELECTION_POLICIES
+from backend.service.response_cache import ResponseCache
+from backend.service.booking_queue import BookingQueue, QueueFull, PRIORITY_NAMES, URGENT, ROUTINE
+from backend.service.triage_rules import is_urgent
+from backend.service.metrics import CONTENT_TYPE, REGISTRY, REQUEST_SECONDS, STAGE_SECONDS
+from backend.service.bulk_import import (
+    DEFAULT_CHUNK_SIZE,
+    parse_rows,
+    bulk_import,
+    DoctorImport,
+    PatientImport,
+    AppointmentImport,
+)
+from backend.service.listing import (
+    MAX_PAGE_SIZE,
+    doctors_query,
+    patients_query,
+    appointments_query,
+    fetch_page,
+    page_size,
+    stream_json_array,
+    stream_ndjson,
+)
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+# Service logs (triage decisions, model fallbacks) as key=value lines; MEDITEL_LOG_LEVEL=DEBUG shows every triage
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter("ts=%(asctime)s level=%(levelname)s logger=%(name)s msg=%(message)s"))
+for _name in ("backend", "ai"):
+    _logger = logging.getLogger(_name)
+    _logger.setLevel(os.getenv("MEDITEL_LOG_LEVEL", "WARNING").upper())
+    _logger.addHandler(_log_handler)
+    _logger.propagate = False
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # the schema is normally brought up to date by `python -m backend.migrations`
+    # before starting; MEDITEL_AUTO_MIGRATE=1 does it here instead (local runs)
+    if AUTO_MIGRATE:
+        upgrade(engine)
+    booking_queue.start()
+    yield
+    await booking_queue.stop()
+    await system.aclose()
+    if similarity_index.built:
+        similarity_index.save()
+    triage_cache.flush()
+    # aiosqlite connections run on their own threads; close them so the process can exit
+    await async_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,36 +98,123 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
+)
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # label by route template (/doctors/{doctor_id}), not raw path, to keep the series bounded
+        route = request.scope.get("route")
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=route.path if route is not None else "unmatched",
+            status=status,
+        )
+
+
+# Triage answers survive restarts in a small SQLite file (set MEDITEL_TRIAGE_CACHE_DB="" to keep them in memory only)
+triage_cache = TriageCache(
+    max_size=int(os.getenv("MEDITEL_TRIAGE_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("MEDITEL_TRIAGE_CACHE_TTL", str(7 * 24 * 3600))),
+    db_path=os.getenv("MEDITEL_TRIAGE_CACHE_DB", "./triage_cache.db") or None,
+)
+
+# MEDITEL_USE_AI=0 runs on the keyword rules alone; the Ollama client is built on first use
+USE_AI = os.getenv("MEDITEL_USE_AI", "1") not in ("", "0", "false")
+OLLAMA_MODEL = os.getenv("MEDITEL_OLLAMA_MODEL", "llama3")
+AUTO_MIGRATE = os.getenv("MEDITEL_AUTO_MIGRATE", "") not in ("", "0", "false")
+
+
+
+def _similarity_index():
+    from ai.symptom_index import SymptomIndex   # NumPy: only imported once a complaint gets past the rules and the cache
+    return SymptomIndex(
+        path=os.getenv("MEDITEL_SIMILARITY_INDEX", "./symptom_index.npz") or None,
+        threshold=float(os.getenv("MEDITEL_SIMILARITY_THRESHOLD", "0.8")),
+        max_size=int(os.getenv("MEDITEL_SIMILARITY_INDEX_SIZE", "100000")),
+    )
+
+
+# Model answers are also kept in a similarity index, so rewordings of a complaint skip the model
+# (set MEDITEL_SIMILARITY_INDEX="" to keep it in memory only)
+similarity_index = _LazyClient(_similarity_index)
+
+# Rendered GET /doctors and GET /patients pages; writes in this process invalidate them,
+# the TTL covers writes made elsewhere (other workers, scripts)
+roster_cache = ResponseCache(
+    max_size=int(os.getenv("MEDITEL_ROSTER_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("MEDITEL_ROSTER_CACHE_TTL", "30")),
+)
+
+# which doctor of a specialty is tried first: least-booked (default), round-robin or earliest-free
+SELECTION_POLICY = os.getenv("MEDITEL_SELECTION_POLICY") or "least-booked"
+if SELECTION_POLICY not in SELECTION_POLICIES:
+    raise ValueError(f"MEDITEL_SELECTION_POLICY must be one of {', '.join(SELECTION_POLICIES)}")
+
+system = MeditelSystem(
+    use_ai=USE_AI, triage_cache=triage_cache, model=OLLAMA_MODEL, similarity_index=similarity_index,
+    selection_policy=SELECTION_POLICIES[SELECTION_POLICY](),
 )
+_system_load_lock = asyncio.Lock()
 
+# Set when running several workers (uvicorn --workers N): bookings are checked
+# and reserved in the database instead of this process's memory
+SHARED_STATE = os.getenv("MEDITEL_SHARED_STATE", "") not in ("", "0", "false")
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
+async def get_system(db: AsyncSession = Depends(get_async_db)) -> MeditelSystem:
+    """The shared MeditelSystem, hydrated from the database on first use."""
+    if not system.loaded:
+        async with _system_load_lock:
+            if not system.loaded:
+                await db.run_sync(lambda session: load_system(system, session))
+    return system
 
-system = MeditelSystem(use_ai=True)
 
 @app.post("/doctors", response_model=DoctorResponse)
-def create_doctor(data: DoctorCreate, db: Session = Depends(get_db)):
+async def create_doctor(
+    data: DoctorCreate,
+    db: AsyncSession = Depends(get_async_db),
+    system: MeditelSystem = Depends(get_system),
+):
+    # Create Doctor object for system (validates before anything is stored)
+    try:
+        schedule = data.working_hours.to_schedule() if data.working_hours else None
+        doctor = Doctor(
+            name=data.name,
+            age=data.age,
+            specialty=data.specialty,
+            contact=data.contact,
+            schedule=schedule
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     # Create DB entry
     db_doctor = DoctorDB(
         name=data.name,
         age=data.age,
         specialty=data.specialty,
-        contact=data.contact
+        contact=data.contact,
+        **(schedule.to_columns() if schedule else {})
     )
     db.add(db_doctor)
-    db.commit()
-    db.refresh(db_doctor)
+    await db.commit()
+    await db.refresh(db_doctor)
     
-    # Create Doctor object for system
-    doctor = Doctor(
-        name=data.name,
-        age=data.age,
-        specialty=data.specialty,
-        contact=data.contact
-    )
+    # Write through to the system, keyed by the DB id
+    doctor.id = db_doctor.id
     system.add_doctor(doctor)
+    roster_cache.invalidate("doctors")
     
     return DoctorResponse(
         success=True,
@@ -63,8 +227,57 @@ def create_doctor(data: DoctorCreate, db: Session = Depends(get_db)):
         }
     )
 
+@app.get("/doctors/{doctor_id}/schedule", response_model=DoctorSchedule)
+async def get_doctor_schedule(doctor_id: int, db: AsyncSession = Depends(get_async_db)):
+    schedule = await db.run_sync(load_schedule, doctor_id)
+    if schedule is None:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    return DoctorSchedule.from_schedule(schedule)
+
+
+@app.put("/doctors/{doctor_id}/schedule", response_model=DoctorSchedule)
+async def update_doctor_schedule(
+    doctor_id: int,
+    data: DoctorSchedule,
+    db: AsyncSession = Depends(get_async_db),
+    system: MeditelSystem = Depends(get_system),
+):
+    """Replace working hours, breaks and leave days; existing bookings are kept."""
+    try:
+        schedule = data.to_schedule()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    db_doctor = await db.get(DoctorDB, doctor_id)
+    if not db_doctor:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    for column, value in schedule.to_columns().items():
+        setattr(db_doctor, column, value)
+    await db.execute(delete(DoctorLeaveDB).where(DoctorLeaveDB.doctor_id == doctor_id))
+    db.add_all(DoctorLeaveDB(doctor_id=doctor_id, day=day) for day in sorted(schedule.leave_days))
+    await db.commit()
+
+    if doctor_id in system.doctors:
+        system.set_schedule(doctor_id, schedule)
+    return DoctorSchedule.from_schedule(schedule)
+
+
 @app.post("/patients", response_model=PatientResponse)
-def add_patient(data: PatientCreate, db: Session = Depends(get_db)):
+async def add_patient(
+    data: PatientCreate,
+    db: AsyncSession = Depends(get_async_db),
+    system: MeditelSystem = Depends(get_system),
+):
+    # Create Patient object for system (validates before anything is stored)
+    try:
+        patient = Patient(
+            data.name,
+            data.age,
+            data.symptoms,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     # Create DB entry
     db_patient = PatientDB(
         name=data.name,
@@ -72,16 +285,13 @@ def add_patient(data: PatientCreate, db: Session = Depends(get_db)):
         symptoms=data.symptoms
     )
     db.add(db_patient)
-    db.commit()
-    db.refresh(db_patient)
+    await db.commit()
+    await db.refresh(db_patient)
     
-    # Create Patient object for system
-    patient = Patient(
-        data.name,
-        data.age,
-        data.symptoms,
-    )
+    # Write through to the system, keyed by the DB id
+    patient.id = db_patient.id
     system.add_patient(patient)
+    roster_cache.invalidate("patients")
     
     return PatientResponse(
         success=True,
@@ -89,57 +299,158 @@ def add_patient(data: PatientCreate, db: Session = Depends(get_db)):
         patient={
             "name": patient.name,
             "age": patient.age,
-            "symptoms": getattr(patient, "symptoms", None) 
-                        or getattr(patient, "main_complaint", None),
+            "symptoms": patient.symptom_text,
         }
     )
 
-@app.post("/appointments/by-symptom", response_model=AppointmentResponseModel)
-def create_appointment_by_symptom(
-    payload: AppointmentWithSymptomsRequest,
-    db: Session = Depends(get_db)
+# ---------- Bulk import: JSON array, NDJSON (application/x-ndjson) or CSV (text/csv) ----------
+async def _read_rows(request: Request) -> list:
+    try:
+        return parse_rows(await request.body(), request.headers.get("content-type"))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse rows: {e}")
+
+
+@app.post("/doctors/bulk", response_model=BulkImportResponse)
+async def bulk_create_doctors(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    system: MeditelSystem = Depends(get_system),
 ):
-    # Get patient from DB
-    db_patient = db.query(PatientDB).filter(PatientDB.name == payload.patient_name).first()
-    if not db_patient:
-        raise HTTPException(status_code=404, detail="Patient not found")
-    
-    # Get patient from system
-    patient = next(
-        (p for p in system.patients if p.name == payload.patient_name),
-        None
-    )
+    rows = await _read_rows(request)
+    try:
+        return await db.run_sync(bulk_import, DoctorImport(system), rows)
+    finally:
+        roster_cache.invalidate("doctors")   # chunks are committed one by one, so even after an error
+
+
+@app.post("/patients/bulk", response_model=BulkImportResponse)
+async def bulk_create_patients(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    system: MeditelSystem = Depends(get_system),
+):
+    rows = await _read_rows(request)
+    try:
+        return await db.run_sync(bulk_import, PatientImport(system), rows)
+    finally:
+        roster_cache.invalidate("patients")
+
+
+@app.post("/appointments/bulk", response_model=BulkImportResponse)
+async def bulk_create_appointments(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    system: MeditelSystem = Depends(get_system),
+):
+    """Rows: doctor_id, patient_id, scheduled_time[, symptoms]; busy slots are reported per row."""
+    rows = await _read_rows(request)
+    return await db.run_sync(bulk_import, AppointmentImport(system), rows)
+
+
+def _resolve_patient(db: Session, patient_name: str):
+    patient = system.find_patient(patient_name)
+    if patient is None and SHARED_STATE:
+        # may have been created by another worker
+        with STAGE_SECONDS.time(stage="patient_lookup"):
+            patient = shared_state.find_patient(system, db, patient_name)
     if patient is None:
-        raise HTTPException(status_code=404, detail="Patient not found in system")
-    
+        raise HTTPException(status_code=404, detail="Patient not found")
+    return patient
+
+
+def _stage_booking(db: Session, patient, payload, specialty, savepoint: bool = True):
+    """Book in the system and add the DB row; the caller commits.
+
+    ``savepoint`` wraps the insert so a rejected row doesn't undo the rest
+    of a batch; a single booking can skip it (two fewer DB round trips).
+    """
+    if SHARED_STATE:
+        book = shared_state.book_earliest if payload.auto_book else shared_state.book_by_specialty
+        try:
+            with STAGE_SECONDS.time(stage="db_reserve"):
+                return book(system, db, patient, specialty, payload.scheduled_time, payload.symptoms)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     try:
         # Create appointment using system
-        appt = system.create_appointment_by_symptom(
-            patient,
-            payload.symptoms,
-            payload.scheduled_time,
-        )
-        
-        # Get doctor from DB
-        db_doctor = db.query(DoctorDB).filter(DoctorDB.name == appt.doctor.name).first()
-        if not db_doctor:
-            raise HTTPException(status_code=404, detail="Doctor not found in database")
-        
-        # Save appointment to DB
-        db_appointment = AppointmentDB(
-            doctor_id=db_doctor.id,
-            patient_id=db_patient.id,
-            scheduled_time=appt.date_time if isinstance(appt.date_time, datetime) else datetime.fromisoformat(appt.date_time),
-            status=appt.status,
-            symptoms=payload.symptoms
-        )
-        db.add(db_appointment)
-        db.commit()
-        db.refresh(db_appointment)
-        
+        with STAGE_SECONDS.time(stage="book"):
+            appt = system.create_appointment_by_symptom(
+                patient,
+                payload.symptoms,
+                payload.scheduled_time,
+                specialty=specialty,
+                auto_book=payload.auto_book,
+            )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     
+    # Save appointment to DB
+    db_appointment = AppointmentDB(
+        doctor_id=appt.doctor.id,
+        patient_id=patient.id,
+        scheduled_time=appt.date_time if isinstance(appt.date_time, datetime) else datetime.fromisoformat(appt.date_time),
+        duration_minutes=Appointment.stored_minutes(appt.duration),
+        status=appt.status,
+        symptoms=payload.symptoms
+    )
+    try:
+        with STAGE_SECONDS.time(stage="db_insert"), db.begin_nested() if savepoint else nullcontext():
+            db.add(db_appointment)
+            db.flush()
+    except IntegrityError:
+        system.scheduler.release(appt)
+        raise HTTPException(status_code=409, detail=f"Doctor {appt.doctor.name} is already booked at this time.")
+    appt.id = db_appointment.id
+    return appt
+
+
+def _commit_bookings(db: Session, appts: list) -> None:
+    """Commit, or roll back and take the bookings whose rows were lost out of
+    the system again, so memory doesn't hold slots the database doesn't."""
+    try:
+        with STAGE_SECONDS.time(stage="db_commit"):
+            db.commit()
+    except Exception:
+        db.rollback()
+        # pysqlite runs a savepoint outside BEGIN as its own transaction, so
+        # a batch row released from its savepoint may already be stored
+        try:
+            stored = set(db.scalars(select(AppointmentDB.id).where(AppointmentDB.id.in_([a.id for a in appts]))))
+        except SQLAlchemyError:
+            stored = set()
+        for appt in appts:
+            if appt.id not in stored:
+                system.scheduler.release(appt)
+        raise
+
+
+def _book_by_symptom(db: Session, patient, payload, specialty):
+    appt = _stage_booking(db, patient, payload, specialty, savepoint=False)
+    _commit_bookings(db, [appt])
+    return appt
+
+
+def _book_batch(db: Session, items: list, specialties: list) -> list:
+    results = []
+    booked = []
+    for index, (item, specialty) in enumerate(zip(items, specialties)):
+        try:
+            patient = _resolve_patient(db, item.patient_name)
+            appt = _stage_booking(db, patient, item, specialty)
+        except HTTPException as e:
+            results.append(AppointmentBatchItemResult(index=index, success=False, error=str(e.detail)))
+            continue
+        booked.append(appt)
+        results.append(
+            AppointmentBatchItemResult(index=index, success=True, appointment=_appointment_response(appt))
+        )
+    _commit_bookings(db, booked)
+    return results
+
+
+def _appointment_response(appt) -> AppointmentResponseModel:
     return AppointmentResponseModel(
         doctor_name=appt.doctor.name,
         patient_name=appt.patient.name,
@@ -147,120 +458,387 @@ def create_appointment_by_symptom(
         status=appt.status,
     )
 
-@app.get("/doctors")
-def get_doctors(db: Session = Depends(get_db)):
-    doctors = db.query(DoctorDB).all()
+
+async def _book_from_request(db: AsyncSession, payload: AppointmentWithSymptomsRequest) -> AppointmentResponseModel:
+    patient = system.find_patient(payload.patient_name)
+    if patient is None:
+        patient = await db.run_sync(_resolve_patient, payload.patient_name)
+
+    # the model round trip is awaited on the event loop instead of pinning a threadpool worker
+    with STAGE_SECONDS.time(stage="triage"):
+        specialty = await system.infer_specialty_async(payload.symptoms)
+
+    appt = await db.run_sync(_book_by_symptom, patient, payload, specialty)
+    return _appointment_response(appt)
+
+
+async def _run_booking_job(payload: AppointmentWithSymptomsRequest) -> AppointmentResponseModel:
+    async with AsyncSessionLocal() as db:
+        await get_system(db)
+        return await _book_from_request(db, payload)
+
+
+# Queued mode (?queued=true): a few workers (as many as the model client lets
+# through at once) drain a priority queue, instead of every request holding
+# its connection while the model answers
+booking_queue = BookingQueue(
+    _run_booking_job,
+    workers=int(os.getenv("MEDITEL_BOOKING_WORKERS", "8")),
+    maxsize=int(os.getenv("MEDITEL_BOOKING_QUEUE_SIZE", "500")),
+)
+
+
+def _job_response(job) -> BookingJobResponse:
+    return BookingJobResponse(
+        id=job.id,
+        status=job.status,
+        priority=PRIORITY_NAMES[job.priority],
+        queued_at=job.queued_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        appointment=job.result,
+        error=job.error,
+        status_code=job.status_code,
+    )
+
+
+def _booking_queue_metrics():
+    yield "meditel_booking_queue_depth", "gauge", "Queued bookings waiting for a worker.", booking_queue.depth()
+    yield "meditel_booking_workers_busy", "gauge", "Booking workers running a job.", booking_queue.busy
+    yield "meditel_booking_workers", "gauge", "Booking workers started.", booking_queue.workers
+
+
+REGISTRY.add_collector(_booking_queue_metrics)
+
+
+@app.post("/appointments/by-symptom", response_model=AppointmentResponseModel)
+async def create_appointment_by_symptom(
+    payload: AppointmentWithSymptomsRequest,
+    queued: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    system: MeditelSystem = Depends(get_system),
+):
+    """Triage and book. With ``queued=true`` the booking is queued (urgent
+    complaints first) and 202 returns a job to poll at GET /appointments/jobs/{id};
+    a full queue answers 429 with Retry-After."""
+    if not queued:
+        return await _book_from_request(db, payload)
+
+    priority = URGENT if is_urgent(payload.symptoms) else ROUTINE
+    try:
+        job = booking_queue.submit(payload, priority)
+    except QueueFull as e:
+        raise HTTPException(
+            status_code=429, detail="Booking queue is full", headers={"Retry-After": str(e.retry_after)}
+        )
+    return JSONResponse(
+        status_code=202,
+        content=jsonable_encoder(_job_response(job)),
+        headers={"Location": f"/appointments/jobs/{job.id}"},
+    )
+
+
+@app.get("/appointments/jobs/{job_id}", response_model=BookingJobResponse)
+def get_booking_job(job_id: str):
+    job = booking_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job)
+
+
+@app.post("/appointments/by-symptom/batch", response_model=AppointmentBatchResponse)
+async def create_appointments_by_symptom_batch(
+    items: list[AppointmentWithSymptomsRequest],
+    db: AsyncSession = Depends(get_async_db),
+    system: MeditelSystem = Depends(get_system),
+):
+    # all symptom texts are triaged together, packed into chunked batch prompts
+    with STAGE_SECONDS.time(stage="triage_batch"):
+        specialties = await system.infer_specialties_async([item.symptoms for item in items])
+
+    results = await db.run_sync(_book_batch, items, specialties)
+    succeeded = sum(1 for r in results if r.success)
+    return AppointmentBatchResponse(
+        total=len(results),
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        results=results,
+    )
+
+@app.get("/slots", response_model=list[FreeSlot])
+async def get_free_slots(
+    specialty: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    duration_minutes: int = Query(30, ge=5, le=480),
+    n: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    system: MeditelSystem = Depends(get_system),
+):
+    """Earliest ``n`` free slots across all doctors of ``specialty``
+    (default: from the next quarter hour, for a week; at most 90 days)."""
+    if start is None:
+        now = datetime.now().replace(second=0, microsecond=0)
+        start = now + timedelta(minutes=-now.minute % 15)
+    end = end or start + timedelta(days=7)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    if end - start > MAX_SLOT_SEARCH:
+        raise HTTPException(status_code=400, detail=f"end may be at most {MAX_SLOT_SEARCH.days} days after start")
+    duration = timedelta(minutes=duration_minutes)
+
+    if SHARED_STATE:
+        slots = await db.run_sync(
+            lambda session: shared_state.find_free_slots(system, session, specialty, start, end, duration, n)
+        )
+    else:
+        slots = system.find_free_slots(specialty, start, end, duration, n)
     return [
-        {
-            "id": d.id,
-            "name": d.name,
-            "age": d.age,
-            "specialty": d.specialty,
-            "contact": d.contact
-        }
-        for d in doctors
+        FreeSlot(
+            doctor_id=doctor.id,
+            doctor_name=doctor.name,
+            specialty=doctor.specialty,
+            start=slot,
+            end=slot + duration,
+        )
+        for slot, doctor in slots
     ]
 
+@app.get("/triage/cache/stats")
+def get_triage_cache_stats():
+    return triage_cache.stats()
+
+
+def _triage_cache_metrics():
+    stats = triage_cache.stats()
+    for key in ("hits", "misses", "persistent_hits", "evictions", "expirations"):
+        yield f"meditel_triage_cache_{key}_total", "counter", f"Triage cache {key.replace('_', ' ')}.", stats[key]
+    yield "meditel_triage_cache_size", "gauge", "Entries held in the triage cache.", stats["size"]
+
+
+REGISTRY.add_collector(_triage_cache_metrics)
+
+
+@app.get("/triage/similarity/stats")
+def get_triage_similarity_stats():
+    return similarity_index.stats()
+
+
+def _similarity_index_metrics():
+    if not similarity_index.built:
+        return
+    stats = similarity_index.stats()
+    for key in ("hits", "misses"):
+        yield f"meditel_triage_similarity_{key}_total", "counter", f"Similarity index lookups, {key}.", stats[key]
+    yield "meditel_triage_similarity_size", "gauge", "Symptom texts held in the similarity index.", stats["size"]
+
+
+REGISTRY.add_collector(_similarity_index_metrics)
+
+
+def _roster_cache_metrics():
+    stats = roster_cache.stats()
+    for key in ("hits", "misses", "not_modified", "invalidations"):
+        yield f"meditel_roster_cache_{key}_total", "counter", f"Roster cache {key.replace('_', ' ')}.", stats[key]
+    yield "meditel_roster_cache_size", "gauge", "Rendered roster pages held in memory.", stats["size"]
+
+
+REGISTRY.add_collector(_roster_cache_metrics)
+
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus scrape endpoint: request/stage latency histograms and triage counters."""
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+async def _list_response(db: AsyncSession, stmt, limit: int | None, after_id: int | None, format: str):
+    if format == "ndjson":
+        # exports: stream every matching row unless a limit was asked for
+        return StreamingResponse(
+            stream_ndjson(AsyncSessionLocal, stmt, limit), media_type="application/x-ndjson"
+        )
+    size = page_size(limit, after_id)
+    if size is None:
+        # no paging asked for: the whole list, as before pagination existed, without holding it in memory
+        return StreamingResponse(stream_json_array(AsyncSessionLocal, stmt), media_type="application/json")
+    rows, next_cursor = await fetch_page(db, stmt, size)
+    headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else {}
+    return JSONResponse(jsonable_encoder(rows), headers=headers)
+
+
+async def _roster_response(
+    request: Request, db: AsyncSession, table: str, stmt, limit: int | None, after_id: int | None, params: tuple
+):
+    """Doctors or patients as JSON (a page, or the whole list when no paging was asked for),
+    from roster_cache when it has it (304 if the client does)."""
+    limit = page_size(limit, after_id)
+    params = (limit, after_id, *params)
+    page = roster_cache.get(table, params)
+    if page is None:
+        generation = roster_cache.generation(table)
+        rows, next_cursor = await fetch_page(db, stmt, limit)
+        headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else {}
+        page = roster_cache.put(table, params, generation, orjson.dumps(rows), headers)
+    # no-cache: browsers keep the page but ask again (If-None-Match) on every poll
+    headers = {"ETag": page.etag, "Cache-Control": "no-cache", **page.headers}
+    if roster_cache.fresh_for(page, request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    return Response(page.body, media_type="application/json", headers=headers)
+
+
+@app.get("/doctors")
+async def get_doctors(
+    request: Request,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after_id: int | None = None,
+    specialty: str | None = None,
+    name: str | None = None,
+    format: Literal["json", "ndjson"] = "json",
+    db: AsyncSession = Depends(get_async_db),
+):
+    stmt = doctors_query(after_id=after_id, specialty=specialty, name=name)
+    if format == "ndjson":
+        return await _list_response(db, stmt, limit, after_id, format)
+    return await _roster_response(request, db, "doctors", stmt, limit, after_id, (specialty, name))
+
 @app.get("/patients")
-def get_patients(db: Session = Depends(get_db)):
-    patients = db.query(PatientDB).all()
-    return [
-        {
-            "id": p.id,
-            "name": p.name,
-            "age": p.age,
-            "symptoms": p.symptoms
-        }
-        for p in patients
-    ]
+async def get_patients(
+    request: Request,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after_id: int | None = None,
+    name: str | None = None,
+    format: Literal["json", "ndjson"] = "json",
+    db: AsyncSession = Depends(get_async_db),
+):
+    stmt = patients_query(after_id=after_id, name=name)
+    if format == "ndjson":
+        return await _list_response(db, stmt, limit, after_id, format)
+    return await _roster_response(request, db, "patients", stmt, limit, after_id, (name,))
 
 @app.get("/appointments")
-def get_appointments(db: Session = Depends(get_db)):
-    appointments = db.query(AppointmentDB).all()
-    return [
-        {
-            "id": a.id,
-            "doctor_name": a.doctor.name,
-            "patient_name": a.patient.name,
-            "scheduled_time": a.scheduled_time,
-            "status": a.status,
-            "symptoms": a.symptoms
-        }
-        for a in appointments
-    ]
+async def get_appointments(
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after_id: int | None = None,
+    doctor_id: int | None = None,
+    patient_id: int | None = None,
+    status: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    format: Literal["json", "ndjson"] = "json",
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Every matching appointment, ordered by id; with ``limit`` (or ``after_id``)
+    a page of ``limit`` rows (default 100), and the X-Next-Cursor response
+    header to pass back as ``after_id`` for the next page."""
+    stmt = appointments_query(
+        after_id=after_id,
+        doctor_id=doctor_id,
+        patient_id=patient_id,
+        status=status,
+        start=start,
+        end=end,
+    )
+    return await _list_response(db, stmt, limit, after_id, format)
 
 # Optional: Endpoint to sync system data with DB
 @app.post("/sync-system-to-db")
-def sync_system_to_db(db: Session = Depends(get_db)):
-    """Sync in-memory system data to database"""
-    synced = {"doctors": 0, "patients": 0, "appointments": 0}
-    
-    # Sync doctors
-    for doctor in system.doctors:
-        existing = db.query(DoctorDB).filter(DoctorDB.name == doctor.name).first()
-        if not existing:
-            db_doctor = DoctorDB(
-                name=doctor.name,
-                age=doctor.age,
-                specialty=doctor.specialty,
-                contact=doctor.contact
-            )
-            db.add(db_doctor)
-            synced["doctors"] += 1
-    
-    # Sync patients
-    for patient in system.patients:
-        existing = db.query(PatientDB).filter(PatientDB.name == patient.name).first()
-        if not existing:
-            db_patient = PatientDB(
-                name=patient.name,
-                age=patient.age,
-                symptoms=getattr(patient, "symptoms", None) or getattr(patient, "main_complaint", None)
-            )
-            db.add(db_patient)
-            synced["patients"] += 1
-    
-    db.commit()
-    return {"message": "Sync completed", "synced": synced}
+async def sync_system_to_db(
+    direction: Literal["to_db", "from_db", "both"] = "to_db",
+    restore_deleted: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    system: MeditelSystem = Depends(get_system),
+):
+    """Copy doctors, patients and appointments that only one side has (matched by id).
 
+    Doctors and patients deleted from the database are dropped from memory;
+    ``restore_deleted=true`` inserts them again instead."""
+    try:
+        result = await db.run_sync(sync_system, system, direction, restore_deleted)
+    finally:
+        if direction != "from_db":
+            roster_cache.invalidate("doctors", "patients")
+    return {"message": "Sync completed", **result}
 
-@app.delete("/doctors/{doctor_id}")
-def delete_doctor(doctor_id: int, db: Session = Depends(get_db)):
-    # Check doctor in DB
-    doctor = db.query(DoctorDB).filter(DoctorDB.id == doctor_id).first()
-    if not doctor:
-        raise HTTPException(status_code=404, detail="Doctor not found")
 
-    # Delete related appointments (if any)
-    db.query(AppointmentDB).filter(AppointmentDB.doctor_id == doctor_id).delete()
+async def _delete_by_ids(db: AsyncSession, table, ids: list) -> set:
+    """Delete rows of ``table`` by id in one transaction; returns the ids that existed.
+
+    Appointments and leave days go with them (ON DELETE CASCADE), without
+    being read first.
+    """
+    ids = list(dict.fromkeys(ids))
+    deleted = set()
+    for start in range(0, len(ids), DEFAULT_CHUNK_SIZE):
+        chunk = ids[start:start + DEFAULT_CHUNK_SIZE]
+        deleted.update((await db.scalars(select(table.id).where(table.id.in_(chunk)))).all())
+        await db.execute(delete(table).where(table.id.in_(chunk)))
+    await db.commit()
+    return deleted
+
 
-    # Delete doctor from DB
-    db.delete(doctor)
-    db.commit()
+def _bulk_delete_response(ids: list, deleted: set) -> dict:
+    return {
+        "requested": len(ids),
+        "deleted": len(deleted),
+        "not_found": [i for i in dict.fromkeys(ids) if i not in deleted],
+    }
 
-    # Remove doctor from in-memory system
-    system.doctors = [d for d in system.doctors if d.name != doctor.name]
+
+@app.delete("/doctors/{doctor_id}")
+async def delete_doctor(
+    doctor_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    system: MeditelSystem = Depends(get_system),
+):
+    if not await _delete_by_ids(db, DoctorDB, [doctor_id]):
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    roster_cache.invalidate("doctors")
+
+    # Remove doctor and their bookings from the in-memory system
+    system.remove_doctor(doctor_id)
 
     return {"success": True, "message": "Doctor deleted successfully"}
 
 
+@app.post("/doctors/bulk-delete", response_model=BulkDeleteResponse)
+async def bulk_delete_doctors(
+    ids: list[int],
+    db: AsyncSession = Depends(get_async_db),
+    system: MeditelSystem = Depends(get_system),
+):
+    """Delete doctors (and their appointments) by id, all in one transaction."""
+    deleted = await _delete_by_ids(db, DoctorDB, ids)
+    if deleted:
+        roster_cache.invalidate("doctors")
+    system.remove_doctors(deleted)
+    return _bulk_delete_response(ids, deleted)
+
 
 @app.delete("/patients/{patient_id}")
-def delete_patient(patient_id: int, db: Session = Depends(get_db)):
-    # Check patient in DB
-    patient = db.query(PatientDB).filter(PatientDB.id == patient_id).first()
-    if not patient:
+async def delete_patient(
+    patient_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    system: MeditelSystem = Depends(get_system),
+):
+    if not await _delete_by_ids(db, PatientDB, [patient_id]):
         raise HTTPException(status_code=404, detail="Patient not found")
+    roster_cache.invalidate("patients")
 
-    # Delete related appointments (if any)
-    db.query(AppointmentDB).filter(AppointmentDB.patient_id == patient_id).delete()
-
-    # Delete patient from DB
-    db.delete(patient)
-    db.commit()
-
-    # Remove from in-memory system
-    system.patients = [p for p in system.patients if p.name != patient.name]
+    # Remove patient and their bookings from the in-memory system
+    system.remove_patient(patient_id)
 
     return {"success": True, "message": "Patient deleted successfully"}
 
+
+@app.post("/patients/bulk-delete", response_model=BulkDeleteResponse)
+async def bulk_delete_patients(
+    ids: list[int],
+    db: AsyncSession = Depends(get_async_db),
+    system: MeditelSystem = Depends(get_system),
+):
+    """Delete patients (and their appointments) by id, all in one transaction."""
+    deleted = await _delete_by_ids(db, PatientDB, ids)
+    if deleted:
+        roster_cache.invalidate("patients")
+    system.remove_patients(deleted)
+    return _bulk_delete_response(ids, deleted)
@@ -1,37 +1,188 @@
+from bisect import insort
 from datetime import datetime
 from backend.models.person import Person
 from backend.models.doctors import Doctor
 from backend.models.patients import Patient
 from backend.models.appointment import Appointment
 from backend.service.scheduler import Scheduler
-from ai.ollama_client import Ollama_triage_client
+from backend.service.triage_rules import SPECIALTY_KEYWORDS
+
+
+def _ollama():
+    import ai.ollama_client   # requests and httpx: only paid once the model is asked
+    return ai.ollama_client
+
+
+class _LazyClient:
+    """Stands in for an Ollama client (or the similarity index) and builds
+    it on first use, so importing and starting the app doesn't load the
+    HTTP libraries or NumPy."""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+
+    @property
+    def built(self) -> bool:
+        return self._client is not None
+
+    def __getattr__(self, name):
+        if self._client is None:
+            self._client = self._factory()
+        return getattr(self._client, name)
+
 
 class MeditelSystem:
-    def __init__(self,use_ai=True):
-        self.doctors = []
-        self.patients = []
+    """In-memory view of the clinic used for scheduling.
+
+    The database is the source of truth: ``load`` hydrates the roster once,
+    and the API writes every create/delete through to both. Doctors and
+    patients are keyed by their database id.
+    """
+
+    def __init__(self,use_ai=True, selection_policy=None, triage_cache=None, model="llama3", similarity_index=None):
+        self.doctors = {}       # id -> Doctor
+        self.patients = {}      # id -> Patient
         self.appointments = []
+        # name -> the person, or a list lowest id first for namesakes
+        self._doctors_by_name = {}
+        self._patients_by_name = {}
+        # objects that were never persisted get negative ids, so they can't clash with database ids
+        self._next_placeholder_id = -1
+        self.loaded = False
         
         ollama_client = None
+        async_ollama_client = None
         if use_ai:
-            ollama_client = Ollama_triage_client(model="llama3")
+            # streamed answers are cut off at the first specialty name the rules know
+            ollama_client = _LazyClient(
+                lambda: _ollama().Ollama_triage_client(model=model, specialties=SPECIALTY_KEYWORDS)
+            )
+            async_ollama_client = _LazyClient(
+                lambda: _ollama().Async_ollama_triage_client(model=model, specialties=SPECIALTY_KEYWORDS)
+            )
         
-        self.scheduler = Scheduler(self.doctors, self.appointments,ollama_client)
+        self.scheduler = Scheduler(
+            self.doctors, self.appointments, ollama_client, selection_policy, triage_cache,
+            async_ollama_client, similarity_index=similarity_index if use_ai else None,
+        )
        
 
+    # ---------- Hydration from storage ----------
+    def load(self, doctors, patients, appointments):
+        """Fill the system from stored rows (once, on first use).
+
+        doctors:      (id, name, age, specialty, contact, schedule)
+        patients:     (id, name, age, symptoms)
+        appointments: (id, doctor_id, patient_id, scheduled_time, status, duration_minutes) - scheduled only
+        """
+        for doctor_id, name, age, specialty, contact, schedule in doctors:
+            doctor = Doctor(name, age, specialty, contact, schedule)
+            doctor.id = doctor_id
+            self.add_doctor(doctor)
+
+        for patient_id, name, age, symptoms in patients:
+            patient = Patient(name, age, symptoms)
+            patient.id = patient_id
+            self.add_patient(patient)
+
+        for appt_id, doctor_id, patient_id, scheduled_time, status, minutes in appointments:
+            doctor = self.doctors.get(doctor_id)
+            patient = self.patients.get(patient_id)
+            if doctor is None or patient is None:
+                continue
+            appt = Appointment(doctor, patient, scheduled_time, Appointment.stored_duration(minutes))
+            appt.id = appt_id
+            appt.status = Appointment.canonical_status(status)
+            self.scheduler.restore(appt)
+
+        self.loaded = True
+
+    # ---------- Roster ----------
     def add_doctor(self, doctor):
-        self.doctors.append(doctor)
+        if doctor.id is None:
+            doctor.id = self._placeholder_id()
+        self.doctors[doctor.id] = doctor
+        _index_name(self._doctors_by_name, doctor)
+        self.scheduler.register_doctor(doctor)
+
+    def remove_doctor(self, doctor_id):
+        removed = self.remove_doctors([doctor_id])
+        return removed[0] if removed else None
+
+    def remove_doctors(self, doctor_ids):
+        """Drop doctors and their appointments; returns the doctors that were known."""
+        removed = []
+        for doctor_id in doctor_ids:
+            doctor = self.doctors.pop(doctor_id, None)
+            if doctor is not None:
+                _unindex_name(self._doctors_by_name, doctor)
+                self.scheduler.unregister_doctor(doctor)
+                removed.append(doctor)
+        self.scheduler.drop_bookings(doctors=removed)
+        return removed
 
     def add_patient(self, patient):
-        self.patients.append(patient)
+        if patient.id is None:
+            patient.id = self._placeholder_id()
+        self.patients[patient.id] = patient
+        _index_name(self._patients_by_name, patient)
+
+    def remove_patient(self, patient_id):
+        removed = self.remove_patients([patient_id])
+        return removed[0] if removed else None
+
+    def remove_patients(self, patient_ids):
+        """Drop patients and their appointments; returns the patients that were known."""
+        removed = [p for p in map(self._forget_patient, patient_ids) if p is not None]
+        self.scheduler.drop_bookings(patients=removed)
+        return removed
+
+    def _forget_patient(self, patient_id):
+        patient = self.patients.pop(patient_id, None)
+        if patient is not None:
+            _unindex_name(self._patients_by_name, patient)
+        return patient
+
+    def _placeholder_id(self):
+        placeholder = self._next_placeholder_id
+        self._next_placeholder_id -= 1
+        return placeholder
+
+    # ---------- Objects the database has not seen (placeholder ids) ----------
+    def unsaved_doctors(self) -> list:
+        return [doctor for doctor_id, doctor in self.doctors.items() if doctor_id < 0]
+
+    def unsaved_patients(self) -> list:
+        return [patient for patient_id, patient in self.patients.items() if patient_id < 0]
+
+    def mark_doctors_saved(self, saved):
+        """Re-key (doctor, database id) pairs from placeholder to database ids;
+        their bookings stay as they are."""
+        for doctor, doctor_id in saved:
+            del self.doctors[doctor.id]
+            # namesakes are ordered by id
+            _unindex_name(self._doctors_by_name, doctor)
+            doctor.id = doctor_id
+            self.doctors[doctor_id] = doctor
+            _index_name(self._doctors_by_name, doctor)
+
+    def mark_patients_saved(self, saved):
+        for patient, patient_id in saved:
+            self._forget_patient(patient.id)
+            patient.id = patient_id
+            self.add_patient(patient)
+
+    def find_patient(self, name):
+        return _first_named(self._patients_by_name, name)
 
     def find_doctor(self, name):
-        return next((d for d in self.doctors if d.name == name), None)
+        return _first_named(self._doctors_by_name, name)
 
     def create_appointment(self, doctor, patient, date_time):
-        if doctor not in self.doctors:
+        if self.doctors.get(doctor.id) is not doctor:
             raise ValueError(f"Doctor {doctor.name} not found.")
-        if patient not in self.patients:
+        if self.patients.get(patient.id) is not patient:
             raise ValueError(f"Patient {patient.name} not found.")
         
         return self.scheduler.schedule(doctor, patient, date_time)
@@ -43,20 +194,66 @@ class MeditelSystem:
             print(a.describe())
             
     def find_doctor_by_specialty(self,specialty):
-        return next(
-            (d for d in self.doctors if d.specialty.lower() == specialty.lower()),
-            None
-        )
+        return self.scheduler.find_doctor_by_specialty(specialty)
         
     
      
-    def create_appointment_by_symptom(self, patient, symptom_text, date_time):
+    def create_appointment_by_symptom(self, patient, symptom_text, date_time, specialty=None, auto_book=False):
         
 
-        if patient not in self.patients:
+        if self.patients.get(patient.id) is not patient:
             raise ValueError(f"Patient {patient.name} not found in system.")
-        return self.scheduler.schedule_by_symptom(patient, symptom_text, date_time)
+        return self.scheduler.schedule_by_symptom(
+            patient, symptom_text, date_time, specialty=specialty, auto_book=auto_book
+        )
+
+    def set_schedule(self, doctor_id, schedule):
+        doctor = self.doctors.get(doctor_id)
+        if doctor is None:
+            raise ValueError(f"Doctor {doctor_id} not found in system.")
+        self.scheduler.set_schedule(doctor, schedule)
+
+    def find_free_slots(self, specialty, start, end, duration=None, n=10):
+        return self.scheduler.find_free_slots(specialty, start, end, duration, n)
+
+    async def infer_specialty_async(self, symptom_text):
+        return await self.scheduler.infer_specialty_async(symptom_text)
+
+    async def infer_specialties_async(self, symptom_texts):
+        return await self.scheduler.infer_specialties_async(symptom_texts)
+
+    async def aclose(self):
+        """Close the async model client's connections, if it was ever used."""
+        client = self.scheduler.async_ollama_client
+        if client is not None and getattr(client, "built", True):
+            await client.aclose()
+
+
+
+# ---------- Name indexes: name -> person, or [person] lowest id first ----------
+def _index_name(index, person):
+    namesakes = index.get(person.name)
+    if namesakes is None:
+        index[person.name] = person
+    elif isinstance(namesakes, list):
+        insort(namesakes, person, key=lambda p: p.id)
+    else:
+        index[person.name] = sorted([namesakes, person], key=lambda p: p.id)
+
+
+def _unindex_name(index, person):
+    namesakes = index.get(person.name)
+    if namesakes is person:
+        del index[person.name]
+    elif isinstance(namesakes, list):
+        namesakes.remove(person)
+        if len(namesakes) == 1:
+            index[person.name] = namesakes[0]
+
 
+def _first_named(index, name):
+    namesakes = index.get(name)
+    return namesakes[0] if isinstance(namesakes, list) else namesakes
 
 
 def main():
@@ -0,0 +1,181 @@
+"""Schema upgrades for existing databases.
+
+    python -m backend.migrations                 # create/upgrade tables and indexes
+    python -m backend.migrations --check-plans   # also verify hot queries use indexes
+
+``create_all`` only creates missing tables; columns and indexes added to
+models later are created here for tables that already exist (e.g. an old
+meditel.db). New columns must be nullable. Foreign keys that gained an
+``ondelete`` rule are replaced; SQLite can't alter constraints, so there
+the table is copied into a new one built from the model.
+"""
+import argparse
+import logging
+import sys
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import AddConstraint
+
+from backend.database import Base, engine
+from backend.models import db_models  # noqa: F401  (registers the tables)
+from backend.models.db_models import SCHEDULED
+
+logger = logging.getLogger(__name__)
+
+# hot lookups -> index the plan must use (SQLite EXPLAIN QUERY PLAN)
+HOT_QUERIES = {
+    "patient by name": (
+        "SELECT id FROM patients WHERE name = :v", "ix_patients_name"),
+    "doctor by name": (
+        "SELECT id FROM doctors WHERE name = :v", "ix_doctors_name"),
+    "doctors by specialty": (
+        "SELECT id FROM doctors WHERE specialty = :v", "ix_doctors_specialty"),
+    "appointments by doctor": (
+        "SELECT id FROM appointments WHERE doctor_id = :v", "ix_appointments_doctor_id"),
+    "appointments by patient": (
+        "SELECT id FROM appointments WHERE patient_id = :v", "ix_appointments_patient_id"),
+    "appointments in time range": (
+        "SELECT id FROM appointments WHERE scheduled_time >= :v AND scheduled_time < :v",
+        "ix_appointments_scheduled_time"),
+    "longest booking": (
+        "SELECT max(duration_minutes) FROM appointments", "ix_appointments_duration_minutes"),
+    "live booking of doctor at time": (
+        f"SELECT id FROM appointments WHERE doctor_id = :v AND scheduled_time = :v "
+        f"AND status = '{SCHEDULED}'",
+        "uq_appointments_doctor_slot"),
+}
+
+
+def _double_bookings(conn) -> list:
+    return conn.execute(text(
+        "SELECT doctor_id, scheduled_time, COUNT(*) FROM appointments "
+        "WHERE status = :status GROUP BY doctor_id, scheduled_time HAVING COUNT(*) > 1"
+    ), {"status": SCHEDULED}).fetchall()
+
+
+def upgrade(bind=engine) -> list:
+    """Bring the schema up to date; returns the columns ("table.column"),
+    indexes and foreign key rules created."""
+    Base.metadata.create_all(bind=bind)
+
+    created = []
+    with bind.begin() as conn:
+        inspector = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in columns:
+                    continue
+                column_type = column.type.compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                created.append(f"{table.name}.{column.name}")
+
+            existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing:
+                    continue
+                if index.unique and table.name == "appointments":
+                    duplicates = _double_bookings(conn)
+                    if duplicates:
+                        raise RuntimeError(
+                            f"Cannot create {index.name}: {len(duplicates)} doctor/time slots are "
+                            "double-booked (doctor_id, scheduled_time, count): "
+                            f"{duplicates[:10]}. Cancel the extra bookings and re-run the migration."
+                        )
+                index.create(conn)
+                created.append(index.name)
+
+        inspector = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            missing = _missing_ondelete(inspector, table)
+            if not missing:
+                continue
+            if conn.dialect.name == "sqlite":
+                _rebuild_sqlite_table(conn, inspector, table)
+            else:
+                _replace_foreign_keys(conn, missing)
+            created.extend(
+                f"{table.name}.{','.join(constraint.column_keys)} ON DELETE {constraint.ondelete}"
+                for constraint, _ in missing
+            )
+    return created
+
+
+def _missing_ondelete(inspector, table) -> list:
+    """(model constraint, stored name) for foreign keys stored without the model's ``ondelete``."""
+    stored = {
+        (tuple(fk["constrained_columns"]), fk["referred_table"]): fk
+        for fk in inspector.get_foreign_keys(table.name)
+    }
+    missing = []
+    for constraint in table.foreign_key_constraints:
+        if not constraint.ondelete:
+            continue
+        current = stored.get((tuple(constraint.column_keys), constraint.referred_table.name))
+        if current is not None and (current["options"].get("ondelete") or "").upper() != constraint.ondelete.upper():
+            missing.append((constraint, current["name"]))
+    return missing
+
+
+def _rebuild_sqlite_table(conn, inspector, table) -> None:
+    old = f"{table.name}_old"
+    for index in inspector.get_indexes(table.name):
+        conn.execute(text(f"DROP INDEX {index['name']}"))
+    conn.execute(text(f"ALTER TABLE {table.name} RENAME TO {old}"))
+    table.create(conn)
+    columns = ", ".join(column.name for column in table.columns)
+    # rows of doctors/patients deleted before foreign keys were enforced can't be kept
+    references = " AND ".join(
+        f"{fk.parent.name} IN (SELECT {fk.column.name} FROM {fk.column.table.name})"
+        for fk in table.foreign_keys
+    )
+    copied = conn.execute(text(
+        f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {old} WHERE {references}"
+    )).rowcount
+    orphans = conn.execute(text(f"SELECT COUNT(*) FROM {old}")).scalar() - copied
+    if orphans:
+        logger.warning("%s: dropped %d rows whose doctor or patient no longer exists", table.name, orphans)
+    conn.execute(text(f"DROP TABLE {old}"))
+
+
+def _replace_foreign_keys(conn, missing) -> None:
+    drop = "DROP FOREIGN KEY" if conn.dialect.name == "mysql" else "DROP CONSTRAINT"
+    for constraint, name in missing:
+        conn.execute(text(f"ALTER TABLE {constraint.table.name} {drop} {name}"))
+        conn.execute(AddConstraint(constraint))
+
+
+def check_query_plans(bind=engine) -> dict:
+    """Query name -> (uses expected index, plan text). SQLite only."""
+    results = {}
+    with bind.connect() as conn:
+        for name, (sql, index_name) in HOT_QUERIES.items():
+            plan = " | ".join(
+                row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql), {"v": 1})
+            )
+            results[name] = (index_name in plan, plan)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upgrade the Meditel database schema")
+    parser.add_argument("--check-plans", action="store_true",
+                        help="verify that hot lookups are served by indexes")
+    args = parser.parse_args()
+
+    created = upgrade()
+    print(f"Schema up to date ({len(created)} columns/indexes created{': ' + ', '.join(created) if created else ''})")
+
+    if args.check_plans:
+        if engine.dialect.name != "sqlite":
+            print("Query plan check is only implemented for SQLite")
+            return
+        failed = False
+        for name, (ok, plan) in check_query_plans().items():
+            print(f"{'ok  ' if ok else 'FAIL'} {name}: {plan}")
+            failed |= not ok
+        sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,55 @@
+import sys
+from datetime import timedelta
+
+
 class Appointment:
     STATUS_SCHEDULED = "Scheduled"
     STATUS_COMPLETED = "Completed"
     STATUS_CANCELLED = "Cancelled"
-    def __init__(self, doctor, patient, date_time):
+    DEFAULT_DURATION = timedelta(minutes=30)
+
+    __slots__ = ("id", "doctor", "patient", "date_time", "duration", "status", "_on_status_change")
+
+    def __init__(self, doctor, patient, date_time, duration: timedelta = None):
+        self.id = None
         self.doctor = doctor
         self.patient = patient
         self.date_time = date_time
-        self.status = Appointment.STATUS_SCHEDULED 
+        self.duration = duration or Appointment.DEFAULT_DURATION
+        self.status = Appointment.STATUS_SCHEDULED
+        # set by the Scheduler so its slot index follows status changes
+        self._on_status_change = None
+
+    @property
+    def end_time(self):
+        return self.date_time + self.duration
+
+    @staticmethod
+    def stored_minutes(duration: timedelta) -> int:
+        """``duration`` as stored: whole minutes, rounded up."""
+        return -(-duration // _MINUTE)
+
+    @staticmethod
+    def stored_duration(minutes) -> timedelta:
+        """Duration of a stored row; rows from before the column was added have the default."""
+        return timedelta(minutes=minutes) if minutes else Appointment.DEFAULT_DURATION
 
     def complete(self):
-        self.status = Appointment.STATUS_COMPLETED
+        self._set_status(Appointment.STATUS_COMPLETED)
 
     def cancel(self):
-        self.status = Appointment.STATUS_CANCELLED
+        self._set_status(Appointment.STATUS_CANCELLED)
+
+    @staticmethod
+    def canonical_status(status: str) -> str:
+        """The shared constant for a status string read from storage."""
+        return _STATUSES.get(status) or sys.intern(status)
+
+    def _set_status(self, status):
+        previous = self.status
+        self.status = status
+        if self._on_status_change is not None and previous != status:
+            self._on_status_change(self, previous)
    
    
    
@@ -23,3 +60,11 @@ class Appointment:
             f"for {self.patient.name} "
             f"on {self.date_time}{status}"
         )
+
+
+_MINUTE = timedelta(minutes=1)
+
+_STATUSES = {
+    status: status
+    for status in (Appointment.STATUS_SCHEDULED, Appointment.STATUS_COMPLETED, Appointment.STATUS_CANCELLED)
+}
@@ -1,42 +1,84 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, DateTime, Time, ForeignKey, Index, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 from backend.database import Base
+from backend.models.appointment import Appointment
 from datetime import datetime
 
+SCHEDULED = Appointment.STATUS_SCHEDULED
+
 class DoctorDB(Base):
     __tablename__ = "doctors"
     
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, nullable=False)
+    name = Column(String, nullable=False, index=True)
     age = Column(Integer, nullable=False)
-    specialty = Column(String, nullable=False)
+    specialty = Column(String, nullable=False, index=True)
     contact = Column(String, nullable=False)
+
+    # Working hours (see WorkSchedule.to_columns); NULL means the default
+    work_start = Column(Time, nullable=True)
+    work_end = Column(Time, nullable=True)
+    slot_minutes = Column(Integer, nullable=True)
+    breaks = Column(String, nullable=True)          # "12:30-13:00,16:00-16:15"
+    working_days = Column(String, nullable=True)    # weekday digits, Monday = 0: "01234"
     
-    # Relationship
-    appointments = relationship("AppointmentDB", back_populates="doctor")
+    # Relationships: the database deletes dependent rows (ON DELETE CASCADE),
+    # so the ORM doesn't load them just to delete them
+    appointments = relationship("AppointmentDB", back_populates="doctor", cascade="all, delete", passive_deletes=True)
+    leave_days = relationship(
+        "DoctorLeaveDB", back_populates="doctor", cascade="all, delete-orphan", passive_deletes=True
+    )
+
+
+class DoctorLeaveDB(Base):
+    __tablename__ = "doctor_leave_days"
+
+    id = Column(Integer, primary_key=True, index=True)
+    doctor_id = Column(Integer, ForeignKey("doctors.id", ondelete="CASCADE"), nullable=False, index=True)
+    day = Column(Date, nullable=False)
+
+    doctor = relationship("DoctorDB", back_populates="leave_days")
+
+    __table_args__ = (UniqueConstraint("doctor_id", "day", name="uq_doctor_leave_day"),)
 
 class PatientDB(Base):
     __tablename__ = "patients"
     
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, nullable=False)
+    name = Column(String, nullable=False, index=True)
     age = Column(Integer, nullable=False)
     symptoms = Column(String, nullable=True)
     
     # Relationship
-    appointments = relationship("AppointmentDB", back_populates="patient")
+    appointments = relationship("AppointmentDB", back_populates="patient", cascade="all, delete", passive_deletes=True)
 
 class AppointmentDB(Base):
     __tablename__ = "appointments"
     
     id = Column(Integer, primary_key=True, index=True)
-    doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False)
-    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
-    scheduled_time = Column(DateTime, nullable=False)
-    status = Column(String, default="scheduled")
+    doctor_id = Column(Integer, ForeignKey("doctors.id", ondelete="CASCADE"), nullable=False, index=True)
+    patient_id = Column(Integer, ForeignKey("patients.id", ondelete="CASCADE"), nullable=False, index=True)
+    scheduled_time = Column(DateTime, nullable=False, index=True)
+    # NULL (rows from before the column) means Appointment.DEFAULT_DURATION; indexed
+    # for the longest booking, which bounds how far back an overlap query looks
+    duration_minutes = Column(Integer, nullable=True, index=True)
+    status = Column(String, default=SCHEDULED)
     symptoms = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     doctor = relationship("DoctorDB", back_populates="appointments")
-    patient = relationship("PatientDB", back_populates="appointments")
\ No newline at end of file
+    patient = relationship("PatientDB", back_populates="appointments")
+
+    __table_args__ = (
+        # a doctor can hold only one live booking per start time; cancelled and
+        # completed rows stay out of the index so the slot can be rebooked
+        Index(
+            "uq_appointments_doctor_slot",
+            "doctor_id",
+            "scheduled_time",
+            unique=True,
+            sqlite_where=text(f"status = '{SCHEDULED}'"),
+            postgresql_where=text(f"status = '{SCHEDULED}'"),
+        ),
+    )
\ No newline at end of file
@@ -1,12 +1,16 @@
+import sys
 from .person import Person
+from .schedule import WorkSchedule, DEFAULT_SCHEDULE
 from contextlib import contextmanager
 
 class Doctor(Person):
-  
+    __slots__ = ("specialty", "schedule")
     
-    def __init__(self, name: str, age: int, specialty: str, contact: str = None):
+    def __init__(self, name: str, age: int, specialty: str, contact: str = None, schedule: WorkSchedule = None):
         super().__init__(name, age,contact)         # initialize parent (Person)
-        self.specialty = specialty
+        # a handful of distinct specialties shared by every doctor
+        self.specialty = sys.intern(specialty)
+        self.schedule = schedule or DEFAULT_SCHEDULE
         
     
     
@@ -1,13 +1,32 @@
+import sys
 from .person import Person
 
+
+def parse_symptoms(symptoms) -> tuple:
+    """Comma-separated text or an iterable of strings -> tuple of interned symptoms."""
+    if not symptoms:
+        return ()
+    if isinstance(symptoms, str):
+        symptoms = symptoms.split(",")
+    return tuple(sys.intern(s.strip()) for s in symptoms if s.strip())
+
+
 class Patient(Person):
+    __slots__ = ("symptoms",)
+
     def __init__(self, name, age, symptoms):
         super().__init__(name, age)
-        self.symptoms = symptoms or []
+        # always a tuple of strings; common symptoms are shared between patients
+        self.symptoms = parse_symptoms(symptoms)
         
     
     def add_symptom(self, symptom):
-        self.symptoms.append(symptom.strip().capitalize())               
+        self.symptoms += (sys.intern(symptom.strip().capitalize()),)
+
+    @property
+    def symptom_text(self) -> str:
+        """Symptoms as stored in the database."""
+        return ", ".join(self.symptoms)
     
     
     def describe(self):
@@ -1,5 +1,8 @@
 from abc import ABC,abstractmethod
 class Person(ABC):
+    # no per-instance __dict__: large rosters are held in memory
+    __slots__ = ("name", "age", "contact", "id")
+
     def __init__(self, name, age,contact:str=None):
          if not name.strip():
             raise ValueError("Name cannot be empty.")
@@ -8,6 +11,7 @@ class Person(ABC):
          self.name = name
          self.age = age
          self.contact =contact
+         self.id = None   # database id, set once persisted
 
 @abstractmethod
 def describe(self)->str:
@@ -0,0 +1,156 @@
+from datetime import date, datetime, time, timedelta
+
+ALL_DAYS = frozenset(range(7))   # Monday = 0
+
+
+def _minutes(t: time) -> int:
+    return t.hour * 60 + t.minute
+
+
+class WorkSchedule:
+    """A doctor's working hours cut into fixed-length slots.
+
+    Slot ``i`` of a day covers ``[opening + i*slot, opening + (i+1)*slot)``.
+    A working day is a bitmap with bit ``i`` set when slot ``i`` can be
+    booked (inside working hours, not in a break); days off and leave days
+    are 0. Treated as immutable: a change is a new WorkSchedule.
+
+    An unrestricted schedule (a doctor who never set hours) takes a booking
+    at any time on any day but leave; its hours and grid only shape the
+    slots that free-slot searches suggest.
+    """
+
+    __slots__ = ("start", "end", "slot_minutes", "slot", "slot_count", "breaks",
+                 "working_days", "leave_days", "template", "restricted")
+
+    def __init__(
+        self,
+        start: time = time(9, 0),
+        end: time = time(17, 0),
+        slot_minutes: int = 30,
+        breaks: list = (),
+        working_days=ALL_DAYS,
+        leave_days=(),
+        restricted: bool = True,
+    ):
+        if slot_minutes <= 0:
+            raise ValueError("Slot length must be positive.")
+        if end <= start:
+            raise ValueError("Working hours must end after they start.")
+        self.start = start
+        self.end = end
+        self.slot_minutes = slot_minutes
+        self.slot = timedelta(minutes=slot_minutes)
+        self.slot_count = (_minutes(end) - _minutes(start)) // slot_minutes
+        if self.slot_count == 0:
+            raise ValueError("Working hours are shorter than one slot.")
+        self.breaks = sorted(breaks)
+        self.working_days = frozenset(working_days)
+        if not self.working_days <= ALL_DAYS:
+            raise ValueError("Working days are weekday numbers, Monday = 0.")
+        self.leave_days = frozenset(leave_days)
+        self.restricted = restricted
+
+        self.template = (1 << self.slot_count) - 1
+        for break_start, break_end in self.breaks:
+            if break_end <= break_start:
+                raise ValueError("A break must end after it starts.")
+            opening = datetime.combine(date.min, start)
+            i, j = self._cover(
+                datetime.combine(date.min, break_start) - opening,
+                datetime.combine(date.min, break_end) - opening,
+            )
+            if i < j:
+                self.template &= ~(((1 << (j - i)) - 1) << i)
+
+    def _cover(self, start_offset: timedelta, end_offset: timedelta) -> tuple:
+        """Slot range [i, j) touched by the offsets, clipped to the day."""
+        i = max(0, start_offset // self.slot)
+        j = min(self.slot_count, -(-end_offset // self.slot))
+        return i, j
+
+    # ---------- Days ----------
+    def works_on(self, day: date) -> bool:
+        return day.weekday() in self.working_days and day not in self.leave_days
+
+    def window(self, day: date) -> tuple | None:
+        """(opening, closing) on ``day``, or None on days off and leave."""
+        if not self.works_on(day):
+            return None
+        return datetime.combine(day, self.start), datetime.combine(day, self.end)
+
+    def day_mask(self, day: date) -> int:
+        """Bookable slots of ``day`` as a bitmap."""
+        return self.template if self.works_on(day) else 0
+
+    # ---------- Slots ----------
+    def slot_start(self, day: date, i: int) -> datetime:
+        return datetime.combine(day, self.start) + i * self.slot
+
+    def slots_needed(self, duration: timedelta) -> int:
+        return max(1, -(-duration // self.slot))
+
+    def slot_range(self, start: datetime, end: datetime) -> tuple | None:
+        """Slots [i, j) a booking occupies; None unless it starts on the grid
+        and fits inside the day's working hours."""
+        offset = start - datetime.combine(start.date(), self.start)
+        if offset < timedelta(0) or offset % self.slot:
+            return None
+        i = offset // self.slot
+        j = i + self.slots_needed(end - start)
+        return (i, j) if j <= self.slot_count else None
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        """True if ``[start, end)`` is bookable working time (bookings aside)."""
+        if not self.restricted:
+            return self.works_on(start.date())
+        slots = self.slot_range(start, end)
+        if slots is None:
+            return False
+        i, j = slots
+        wanted = ((1 << (j - i)) - 1) << i
+        return self.day_mask(start.date()) & wanted == wanted
+
+    def cover_range(self, start: datetime, end: datetime) -> tuple:
+        """Slots [i, j) of ``start``'s day overlapped by ``[start, end)``, on or off the grid."""
+        opening = datetime.combine(start.date(), self.start)
+        return self._cover(start - opening, end - opening)
+
+    # ---------- Storage ----------
+    def to_columns(self) -> dict:
+        if not self.restricted:
+            return dict.fromkeys(("work_start", "work_end", "slot_minutes", "breaks", "working_days"))
+        return {
+            "work_start": self.start,
+            "work_end": self.end,
+            "slot_minutes": self.slot_minutes,
+            "breaks": ",".join(f"{s:%H:%M}-{e:%H:%M}" for s, e in self.breaks) or None,
+            "working_days": "".join(str(d) for d in sorted(self.working_days)),
+        }
+
+    @classmethod
+    def from_columns(cls, work_start=None, work_end=None, slot_minutes=None, breaks=None,
+                     working_days=None, leave_days=()):
+        """Inverse of ``to_columns``; None columns fall back to the defaults, and
+        a row with none set is unrestricted."""
+        kwargs = {}
+        if work_start is not None:
+            kwargs["start"] = work_start
+        if work_end is not None:
+            kwargs["end"] = work_end
+        if slot_minutes is not None:
+            kwargs["slot_minutes"] = slot_minutes
+        if breaks:
+            kwargs["breaks"] = [
+                tuple(time.fromisoformat(t) for t in period.split("-"))
+                for period in breaks.split(",")
+            ]
+        if working_days is not None:
+            kwargs["working_days"] = [int(d) for d in working_days]
+        if not kwargs:
+            return cls(leave_days=leave_days, restricted=False) if leave_days else DEFAULT_SCHEDULE
+        return cls(leave_days=leave_days, **kwargs)
+
+
+# shared by every doctor without a schedule of their own: bookable at any time
+DEFAULT_SCHEDULE = WorkSchedule(restricted=False)
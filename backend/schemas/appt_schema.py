@@ -1,3 +1,4 @@
+from typing import Literal
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -5,10 +6,54 @@ class AppointmentWithSymptomsRequest(BaseModel):
    patient_name:str
    symptoms:str
    scheduled_time:datetime    
+   # book the earliest free slot at or after scheduled_time instead of failing
+   auto_book: bool = False
    
    
 class AppointmentResponseModel(BaseModel):
     doctor_name:str
     patient_name:str
     scheduled_time:datetime
-    status:str
\ No newline at end of file
+    status:str
+
+
+class AppointmentBatchItemResult(BaseModel):
+    index: int
+    success: bool
+    appointment: AppointmentResponseModel | None = None
+    error: str | None = None
+
+
+class AppointmentBatchResponse(BaseModel):
+    total: int
+    succeeded: int
+    failed: int
+    results: list[AppointmentBatchItemResult]
+
+
+class BookingJobResponse(BaseModel):
+    id: str
+    status: Literal["queued", "running", "done", "failed"]
+    priority: Literal["urgent", "routine"]
+    queued_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    appointment: AppointmentResponseModel | None = None
+    error: str | None = None
+    # what the synchronous endpoint would have answered (200, 400, 404, 409...)
+    status_code: int | None = None
+
+
+class AppointmentCreate(BaseModel):
+    doctor_id: int
+    patient_id: int
+    scheduled_time: datetime
+    symptoms: str | None = None
+
+
+class FreeSlot(BaseModel):
+    doctor_id: int
+    doctor_name: str
+    specialty: str
+    start: datetime
+    end: datetime
@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+
+
+class BulkRowError(BaseModel):
+    row: int
+    error: str
+
+
+class BulkImportResponse(BaseModel):
+    total: int
+    inserted: int
+    failed: int
+    errors: list[BulkRowError]
+
+
+class BulkDeleteResponse(BaseModel):
+    requested: int
+    deleted: int
+    not_found: list[int]
@@ -1,10 +1,57 @@
+from datetime import date, time
+
 from pydantic import BaseModel
 
+from backend.models.schedule import WorkSchedule
+
+class BreakPeriod(BaseModel):
+    start: time
+    end: time
+
+
+class WorkingHours(BaseModel):
+    work_start: time = time(9, 0)
+    work_end: time = time(17, 0)
+    slot_minutes: int = 30
+    breaks: list[BreakPeriod] = []
+    working_days: list[int] = [0, 1, 2, 3, 4, 5, 6]   # Monday = 0
+
+    def to_schedule(self, leave_days=()) -> WorkSchedule:
+        """Domain schedule; raises ValueError if the hours don't make sense."""
+        return WorkSchedule(
+            start=self.work_start,
+            end=self.work_end,
+            slot_minutes=self.slot_minutes,
+            breaks=[(b.start, b.end) for b in self.breaks],
+            working_days=self.working_days,
+            leave_days=leave_days,
+        )
+
+
+class DoctorSchedule(WorkingHours):
+    leave_days: list[date] = []
+
+    def to_schedule(self, leave_days=None) -> WorkSchedule:
+        return super().to_schedule(self.leave_days if leave_days is None else leave_days)
+
+    @classmethod
+    def from_schedule(cls, schedule: WorkSchedule) -> "DoctorSchedule":
+        return cls(
+            work_start=schedule.start,
+            work_end=schedule.end,
+            slot_minutes=schedule.slot_minutes,
+            breaks=[BreakPeriod(start=s, end=e) for s, e in schedule.breaks],
+            working_days=sorted(schedule.working_days),
+            leave_days=sorted(schedule.leave_days),
+        )
+
+
 class DoctorCreate(BaseModel):
     name : str
     age : int
     specialty:str
     contact:str
+    working_hours: WorkingHours | None = None
 
 
 
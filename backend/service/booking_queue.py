@@ -0,0 +1,159 @@
+"""Queued bookings: a bounded priority queue drained by a few worker tasks.
+
+Under a burst the endpoint only enqueues and answers 202 with a job id;
+``workers`` tasks on the event loop triage and book in priority order
+(urgent complaints first, then arrival order), and the outcome is polled
+by id. A full queue is refused up front with a Retry-After estimated from
+the backlog and the recent time per job.
+
+Jobs live in the process that accepted them, so with several uvicorn
+workers a poll has to reach the same process (sticky sessions).
+"""
+import asyncio
+import itertools
+import logging
+import math
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from backend.service.metrics import (
+    BOOKING_JOBS_TOTAL,
+    BOOKING_QUEUE_WAIT_SECONDS,
+    BOOKING_WORKER_BUSY_SECONDS,
+)
+
+URGENT, ROUTINE = 0, 1
+PRIORITY_NAMES = {URGENT: "urgent", ROUTINE: "routine"}
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class QueueFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"booking queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class BookingJob:
+    __slots__ = (
+        "id", "priority", "payload", "status", "result", "error", "status_code",
+        "queued_at", "started_at", "finished_at", "_enqueued",
+    )
+
+    def __init__(self, priority: int, payload):
+        self.id = uuid.uuid4().hex
+        self.priority = priority
+        self.payload = payload
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.status_code = None   # HTTP status the synchronous endpoint would have answered
+        self.queued_at = datetime.now(timezone.utc)
+        self.started_at = None
+        self.finished_at = None
+        self._enqueued = time.perf_counter()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+
+class BookingQueue:
+    """``handler(payload)`` is awaited by one of ``workers`` tasks per job.
+
+    Exceptions become failed jobs; an exception's ``status_code`` and
+    ``detail`` (as on HTTPException) are kept for the poller.
+    """
+
+    def __init__(self, handler, workers: int = 8, maxsize: int = 500, keep: int = 10_000):
+        self.handler = handler
+        self.workers = workers
+        self.maxsize = maxsize
+        self.keep = max(keep, maxsize + workers)   # never forget a job still waiting or running
+        self.busy = 0
+        self._queue = None   # made in start(), on the loop that serves requests
+        self._tasks = []
+        self._jobs = OrderedDict()   # id -> BookingJob, oldest first
+        self._order = itertools.count()
+        self._seconds_per_job = None   # moving average, for Retry-After
+
+    # ---------- Lifecycle (application lifespan) ----------
+    def start(self) -> None:
+        self._queue = asyncio.PriorityQueue(self.maxsize)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # ---------- Producers and pollers ----------
+    def submit(self, payload, priority: int = ROUTINE) -> BookingJob:
+        if self._queue is None:
+            raise RuntimeError("booking queue is not running")
+        if self._queue.full():
+            BOOKING_JOBS_TOTAL.inc(outcome="rejected")
+            raise QueueFull(self.retry_after())
+        job = BookingJob(priority, payload)
+        self._jobs[job.id] = job
+        self._forget_finished()
+        # arrival order breaks ties, so jobs themselves are never compared
+        self._queue.put_nowait((priority, next(self._order), job))
+        return job
+
+    def get(self, job_id: str) -> BookingJob | None:
+        return self._jobs.get(job_id)
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def retry_after(self) -> int:
+        """Seconds until the backlog should have drained enough to take a job."""
+        per_job = self._seconds_per_job or 1.0
+        return max(1, math.ceil(self.depth() * per_job / self.workers))
+
+    def _forget_finished(self) -> None:
+        while len(self._jobs) > self.keep:
+            oldest = next(iter(self._jobs.values()))
+            if not oldest.finished:
+                break
+            self._jobs.popitem(last=False)
+
+    # ---------- Workers ----------
+    async def _work(self) -> None:
+        while True:
+            _, _, job = await self._queue.get()
+            started = time.perf_counter()
+            BOOKING_QUEUE_WAIT_SECONDS.observe(started - job._enqueued, priority=PRIORITY_NAMES[job.priority])
+            job.status = RUNNING
+            job.started_at = datetime.now(timezone.utc)
+            self.busy += 1
+            try:
+                job.result = await self.handler(job.payload)
+                job.status = DONE
+                job.status_code = 200
+            except asyncio.CancelledError:
+                job.status, job.status_code, job.error = FAILED, 503, "Server shutting down"
+                raise
+            except Exception as e:
+                job.status = FAILED
+                job.status_code = getattr(e, "status_code", 500)
+                job.error = str(getattr(e, "detail", None) or e)
+                if job.status_code >= 500:
+                    logger.exception("queued booking %s failed", job.id)
+            finally:
+                elapsed = time.perf_counter() - started
+                self.busy -= 1
+                job.finished_at = datetime.now(timezone.utc)
+                job.payload = None
+                BOOKING_WORKER_BUSY_SECONDS.inc(elapsed)
+                BOOKING_JOBS_TOTAL.inc(outcome=job.status)
+                self._seconds_per_job = (
+                    elapsed if self._seconds_per_job is None else 0.9 * self._seconds_per_job + 0.1 * elapsed
+                )
+                self._queue.task_done()
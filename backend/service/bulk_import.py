@@ -0,0 +1,191 @@
+"""Bulk import of doctors, patients and appointments.
+
+Rows (JSON array, NDJSON or CSV) are validated with the regular create
+schemas, inserted with one executemany and one transaction per chunk,
+and added to the MeditelSystem once their ids are known. A chunk that
+hits a constraint is replayed row by row in savepoints so only the
+offending rows are rejected.
+"""
+import csv
+import io
+import json
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from backend.models.appointment import Appointment
+from backend.models.doctors import Doctor
+from backend.models.patients import Patient
+from backend.models.schedule import WorkSchedule
+from backend.models.db_models import DoctorDB, PatientDB, AppointmentDB
+from backend.schemas.doctor_schemas import DoctorCreate
+from backend.schemas.patient_schema import PatientCreate
+from backend.schemas.appt_schema import AppointmentCreate
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# executemany needs the same keys in every row
+_DEFAULT_SCHEDULE_COLUMNS = dict.fromkeys(WorkSchedule().to_columns())
+
+
+def parse_rows(body: bytes, content_type: str) -> list:
+    """JSON array (default), NDJSON or CSV body -> list of dicts."""
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    text = body.decode("utf-8-sig")
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    if content_type in ("text/csv", "application/csv"):
+        return [
+            {key: (value if value != "" else None) for key, value in row.items()}
+            for row in csv.DictReader(io.StringIO(text))
+        ]
+    rows = json.loads(text)
+    if not isinstance(rows, list):
+        raise ValueError("Expected a JSON array of rows")
+    return rows
+
+
+def _error_message(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}"
+            for err in error.errors()
+        )
+    if isinstance(error, IntegrityError):
+        return "Rejected by the database: " + str(error.orig)
+    return str(error)
+
+
+# ---------- Per-entity rules: validate -> (row values, domain object) ----------
+class DoctorImport:
+    schema = DoctorCreate
+    table = DoctorDB
+
+    def __init__(self, system):
+        self.system = system
+
+    def prepare(self, data):
+        schedule = data.working_hours.to_schedule() if data.working_hours else None
+        doctor = Doctor(data.name, data.age, data.specialty, data.contact, schedule)
+        values = data.model_dump(exclude={"working_hours"})
+        values.update(schedule.to_columns() if schedule else _DEFAULT_SCHEDULE_COLUMNS)
+        return values, doctor
+
+    def attach(self, doctor, row_id):
+        doctor.id = row_id
+        self.system.add_doctor(doctor)
+
+    def discard(self, doctor):
+        pass
+
+
+class PatientImport(DoctorImport):
+    schema = PatientCreate
+    table = PatientDB
+
+    def prepare(self, data):
+        patient = Patient(data.name, data.age, data.symptoms)
+        return data.model_dump(), patient
+
+    def attach(self, patient, row_id):
+        patient.id = row_id
+        self.system.add_patient(patient)
+
+
+class AppointmentImport(DoctorImport):
+    schema = AppointmentCreate
+    table = AppointmentDB
+
+    def prepare(self, data):
+        doctor = self.system.doctors.get(data.doctor_id)
+        if doctor is None:
+            raise ValueError(f"Doctor {data.doctor_id} not found")
+        patient = self.system.patients.get(data.patient_id)
+        if patient is None:
+            raise ValueError(f"Patient {data.patient_id} not found")
+        # booked right away so rows of the same file can't take the same slot
+        appt = self.system.scheduler.schedule(doctor, patient, data.scheduled_time)
+        values = data.model_dump()
+        values["duration_minutes"] = Appointment.stored_minutes(appt.duration)
+        values["status"] = appt.status
+        return values, appt
+
+    def attach(self, appt, row_id):
+        appt.id = row_id
+
+    def discard(self, appt):
+        self.system.scheduler.release(appt)
+
+
+def bulk_import(db, spec, rows: list, chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    errors = []
+    inserted = 0
+    for start in range(0, len(rows), chunk_size):
+        staged = []   # (row number, values, domain object)
+        for i in range(start, min(start + chunk_size, len(rows))):
+            try:
+                values, obj = spec.prepare(spec.schema.model_validate(rows[i]))
+            except (ValidationError, ValueError, TypeError) as e:
+                errors.append({"row": i, "error": _error_message(e)})
+                continue
+            staged.append((i, values, obj))
+        if not staged:
+            continue
+
+        try:
+            stored, rejected = insert_chunk(db, spec.table, staged)
+        except BaseException:
+            # e.g. "database is locked": none of the chunk is known to be stored, so
+            # give back everything prepare booked instead of leaving phantom bookings
+            for _, _, obj in staged:
+                spec.discard(obj)
+            db.rollback()
+            raise
+        for (i, _, obj), error in rejected:
+            spec.discard(obj)
+            errors.append({"row": i, "error": _error_message(error)})
+        for (_, _, obj), row_id in stored:
+            spec.attach(obj, row_id)
+        inserted += len(stored)
+
+    errors.sort(key=lambda e: e["row"])
+    return {
+        "total": len(rows),
+        "inserted": inserted,
+        "failed": len(rows) - inserted,
+        "errors": errors,
+    }
+
+
+def _insert_many(db, table, values: list) -> list:
+    """executemany the rows and return their ids in the same order."""
+    if db.get_bind().dialect.name == "sqlite":
+        # RETURNING with ordered results degrades to one statement per row on
+        # SQLite. Instead: after the insert this transaction holds the write
+        # lock and new rowids are max(rowid) + 1, so our rows are the top ids.
+        db.execute(insert(table.__table__), values)
+        ids = db.scalars(select(table.id).order_by(table.id.desc()).limit(len(values))).all()
+        return ids[::-1]
+    return db.scalars(insert(table).returning(table.id, sort_by_parameter_order=True), values).all()
+
+
+def insert_chunk(db, table, staged) -> tuple:
+    """One executemany for the chunk; row-by-row savepoints if it fails."""
+    try:
+        ids = _insert_many(db, table, [values for _, values, _ in staged])
+        db.commit()
+        return list(zip(staged, ids)), []
+    except IntegrityError:
+        db.rollback()
+
+    stored, rejected = [], []
+    for item in staged:
+        try:
+            with db.begin_nested():
+                row_id = db.scalar(insert(table).values(**item[1]).returning(table.id))
+            stored.append((item, row_id))
+        except IntegrityError as e:
+            rejected.append((item, e))
+    db.commit()
+    return stored, rejected
@@ -0,0 +1,120 @@
+"""Keyset-paginated, filterable list queries for the roster/appointment endpoints.
+
+Queries select plain columns (appointments join doctor and patient names
+in the same statement), so a page costs one round trip and no ORM objects.
+Paging is opt-in: without ``limit`` or ``after_id`` the endpoints answer
+with every matching row, as they always did.
+"""
+import json
+from datetime import datetime
+
+from sqlalchemy import select
+
+from backend.models.db_models import DoctorDB, PatientDB, AppointmentDB
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH = 1000
+
+
+def doctors_query(after_id: int = None, specialty: str = None, name: str = None):
+    stmt = select(
+        DoctorDB.id, DoctorDB.name, DoctorDB.age, DoctorDB.specialty, DoctorDB.contact
+    )
+    if specialty is not None:
+        stmt = stmt.where(DoctorDB.specialty == specialty)
+    if name is not None:
+        stmt = stmt.where(DoctorDB.name == name)
+    if after_id is not None:
+        stmt = stmt.where(DoctorDB.id > after_id)
+    return stmt.order_by(DoctorDB.id)
+
+
+def patients_query(after_id: int = None, name: str = None):
+    stmt = select(PatientDB.id, PatientDB.name, PatientDB.age, PatientDB.symptoms)
+    if name is not None:
+        stmt = stmt.where(PatientDB.name == name)
+    if after_id is not None:
+        stmt = stmt.where(PatientDB.id > after_id)
+    return stmt.order_by(PatientDB.id)
+
+
+def appointments_query(
+    after_id: int = None,
+    doctor_id: int = None,
+    patient_id: int = None,
+    status: str = None,
+    start: datetime = None,
+    end: datetime = None,
+):
+    stmt = (
+        select(
+            AppointmentDB.id,
+            DoctorDB.name.label("doctor_name"),
+            PatientDB.name.label("patient_name"),
+            AppointmentDB.scheduled_time,
+            AppointmentDB.status,
+            AppointmentDB.symptoms,
+        )
+        .join(DoctorDB, AppointmentDB.doctor_id == DoctorDB.id)
+        .join(PatientDB, AppointmentDB.patient_id == PatientDB.id)
+    )
+    if doctor_id is not None:
+        stmt = stmt.where(AppointmentDB.doctor_id == doctor_id)
+    if patient_id is not None:
+        stmt = stmt.where(AppointmentDB.patient_id == patient_id)
+    if status is not None:
+        stmt = stmt.where(AppointmentDB.status == status)
+    if start is not None:
+        stmt = stmt.where(AppointmentDB.scheduled_time >= start)
+    if end is not None:
+        stmt = stmt.where(AppointmentDB.scheduled_time < end)
+    if after_id is not None:
+        stmt = stmt.where(AppointmentDB.id > after_id)
+    return stmt.order_by(AppointmentDB.id)
+
+
+def page_size(limit: int | None, after_id: int | None) -> int | None:
+    """Rows per page, or None (every row) when the client asked for no paging."""
+    if limit is None and after_id is None:
+        return None
+    return limit or DEFAULT_PAGE_SIZE
+
+
+async def fetch_page(db, stmt, limit: int | None) -> tuple:
+    """(rows as dicts, cursor for the next page or None); every row if ``limit`` is None."""
+    result = await db.execute(stmt if limit is None else stmt.limit(limit))
+    rows = [dict(row) for row in result.mappings()]
+    next_cursor = rows[-1]["id"] if limit is not None and len(rows) == limit else None
+    return rows, next_cursor
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+async def stream_json_array(session_factory, stmt):
+    """Yield every row as one JSON array, from a server-side cursor (see stream_ndjson)."""
+    async with session_factory() as db:
+        result = await db.stream(stmt.execution_options(yield_per=STREAM_BATCH))
+        separator = "["
+        async for partition in result.mappings().partitions():
+            yield separator + ",".join(json.dumps(dict(row), default=_json_default) for row in partition)
+            separator = ","
+        yield "[]" if separator == "[" else "]"
+
+
+async def stream_ndjson(session_factory, stmt, limit: int = None):
+    """Yield one JSON line per row from a server-side cursor.
+
+    Opens its own session: the request's session is closed before a
+    streaming response body is sent.
+    """
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    async with session_factory() as db:
+        result = await db.stream(stmt.execution_options(yield_per=STREAM_BATCH))
+        async for partition in result.mappings().partitions():
+            yield "".join(json.dumps(dict(row), default=_json_default) + "\n" for row in partition)
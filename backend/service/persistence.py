@@ -0,0 +1,67 @@
+from backend.models.appointment import Appointment
+from backend.models.schedule import WorkSchedule
+from backend.models.db_models import DoctorDB, DoctorLeaveDB, PatientDB, AppointmentDB
+
+HYDRATE_BATCH = 5000
+
+DOCTOR_COLUMNS = (
+    DoctorDB.id, DoctorDB.name, DoctorDB.age, DoctorDB.specialty, DoctorDB.contact,
+    DoctorDB.work_start, DoctorDB.work_end, DoctorDB.slot_minutes, DoctorDB.breaks,
+    DoctorDB.working_days,
+)
+
+
+def leave_days_by_doctor(db, doctor_ids=None) -> dict:
+    """doctor id -> leave days, for all doctors or just ``doctor_ids``."""
+    query = db.query(DoctorLeaveDB.doctor_id, DoctorLeaveDB.day)
+    if doctor_ids is not None:
+        query = query.filter(DoctorLeaveDB.doctor_id.in_(doctor_ids))
+    leave = {}
+    for doctor_id, day in query:
+        leave.setdefault(doctor_id, []).append(day)
+    return leave
+
+
+def doctor_tuples(rows, leave: dict):
+    """DOCTOR_COLUMNS rows -> (id, name, age, specialty, contact, schedule)."""
+    for doctor_id, name, age, specialty, contact, *schedule_columns in rows:
+        schedule = WorkSchedule.from_columns(*schedule_columns, leave_days=leave.get(doctor_id, ()))
+        yield doctor_id, name, age, specialty, contact, schedule
+
+
+def load_schedule(db, doctor_id: int) -> WorkSchedule | None:
+    """The stored schedule of one doctor; None if there is no such doctor."""
+    row = db.query(*DOCTOR_COLUMNS).filter(DoctorDB.id == doctor_id).first()
+    if row is None:
+        return None
+    return next(doctor_tuples([row], leave_days_by_doctor(db, [doctor_id])))[5]
+
+
+def load_system(system, db) -> None:
+    """Hydrate ``system`` from the database.
+
+    Column-only queries streamed in batches: no ORM identity map, no
+    relationship loading, only appointments that still hold a slot.
+    """
+    doctors = doctor_tuples(
+        db.query(*DOCTOR_COLUMNS).order_by(DoctorDB.id).yield_per(HYDRATE_BATCH),
+        leave_days_by_doctor(db),
+    )
+    patients = (
+        db.query(PatientDB.id, PatientDB.name, PatientDB.age, PatientDB.symptoms)
+        .order_by(PatientDB.id)
+        .yield_per(HYDRATE_BATCH)
+    )
+    appointments = (
+        db.query(
+            AppointmentDB.id,
+            AppointmentDB.doctor_id,
+            AppointmentDB.patient_id,
+            AppointmentDB.scheduled_time,
+            AppointmentDB.status,
+            AppointmentDB.duration_minutes,
+        )
+        .filter(AppointmentDB.status == Appointment.STATUS_SCHEDULED)
+        .yield_per(HYDRATE_BATCH)
+    )
+    system.load(doctors, patients, appointments)
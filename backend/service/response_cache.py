@@ -0,0 +1,113 @@
+"""In-process cache of rendered roster pages (GET /doctors, GET /patients).
+
+Rosters change rarely but are polled constantly. A page is kept as the
+JSON bytes that were sent, with a strong ETag (a hash of those bytes),
+keyed by table and query parameters, so a hot read touches neither the
+database nor the JSON encoder, and a client that already has it gets a
+304.
+
+Endpoints that write a table call ``invalidate(table)``. A page read while
+such a write was in flight is served but not stored (the table's
+generation moved on under it). ``ttl`` bounds staleness from writes this
+process doesn't see: other uvicorn workers, scripts against the database.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an If-None-Match header names ``etag`` (weak comparison, as RFC 9110 asks for GET)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+class CachedPage:
+    __slots__ = ("body", "etag", "headers", "stored_at")
+
+    def __init__(self, body: bytes, headers: dict):
+        self.body = body
+        self.etag = etag_for(body)
+        self.headers = headers
+        self.stored_at = time.monotonic()
+
+
+class ResponseCache:
+    """Bounded LRU of (table, query parameters) -> CachedPage, with a TTL."""
+
+    def __init__(self, max_size: int = 256, ttl: float = 30.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._generations = defaultdict(int)   # table -> bumped by every write to it
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+
+    def generation(self, table: str) -> int:
+        """Read before querying the table, and handed back to ``put``."""
+        with self._lock:
+            return self._generations[table]
+
+    def get(self, table: str, params: tuple) -> CachedPage | None:
+        key = (table, params)
+        with self._lock:
+            page = self._entries.get(key)
+            if page is not None and time.monotonic() - page.stored_at < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return page
+            if page is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, table: str, params: tuple, generation: int, body: bytes, headers: dict) -> CachedPage:
+        page = CachedPage(body, headers)
+        with self._lock:
+            if generation == self._generations[table]:
+                self._entries[(table, params)] = page
+                self._entries.move_to_end((table, params))
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return page
+
+    def fresh_for(self, page: CachedPage, if_none_match: str | None) -> bool:
+        """Whether the client already has ``page`` (answer 304)."""
+        if not etag_matches(if_none_match, page.etag):
+            return False
+        with self._lock:
+            self.not_modified += 1
+        return True
+
+    def invalidate(self, *tables: str) -> None:
+        with self._lock:
+            for table in tables:
+                self._generations[table] += 1
+            for key in [key for key in self._entries if key[0] in tables]:
+                del self._entries[key]
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "not_modified": self.not_modified,
+                "invalidations": self.invalidations,
+            }
@@ -1,93 +1,513 @@
-from datetime import datetime
+import asyncio
+import heapq
+import logging
+import threading
+import time as clock
+from datetime import datetime, timedelta
+from itertools import islice
+from ai.triage_cache import normalize_symptoms
 from backend.models.appointment import Appointment
 from backend.models.doctors import Doctor
 from backend.models.patients import Patient
+from backend.models.schedule import WorkSchedule
+from backend.service.slot_calendar import SlotCalendar, day_free_mask, run_starts
+from backend.service.metrics import STAGE_SECONDS, TRIAGE_TOTAL
+from backend.service.slot_index import SlotIndex
+from backend.service.specialty_index import SpecialtyIndex, LeastBookedPolicy
+from backend.service.triage_rules import KeywordTriageClassifier
+
+# how far ahead auto-booking looks for the earliest free slot
+AUTO_BOOK_HORIZON = timedelta(days=14)
+# longest range a free-slot search may cover: the scan walks every day of it
+MAX_SLOT_SEARCH = timedelta(days=90)
+
+_ONE_DAY = timedelta(days=1)
+_TICK = timedelta(microseconds=1)
+
+logger = logging.getLogger(__name__)
+
+
+def check_search_range(start: datetime, end: datetime) -> None:
+    if end - start > MAX_SLOT_SEARCH:
+        raise ValueError(f"A free-slot search may cover at most {MAX_SLOT_SEARCH.days} days.")
+
+
+def outside_hours_error(doctors, who: str, date_time: datetime, duration: timedelta = None) -> ValueError | None:
+    """The error for a time none of ``doctors`` works at, or None if one does.
+
+    Tells an off-hours or off-grid request apart from one where everyone is
+    booked; ``who`` names the doctors in the message.
+    """
+    end = date_time + (duration or Appointment.DEFAULT_DURATION)
+    if any(doctor.schedule.covers(date_time, end) for doctor in doctors):
+        return None
+    grids = {doctor.schedule.slot_minutes for doctor in doctors if doctor.schedule.restricted}
+    grid = f"the {grids.pop()}-minute slot grid" if len(grids) == 1 else "the slot grid"
+    return ValueError(f"{date_time:%Y-%m-%d %H:%M} is outside the working hours of {who} or not on {grid}.")
 
 
 class Scheduler:
-    def __init__(self, doctors: list, appointments: list,ollama_client=None):
+    def __init__(self, doctors, appointments: list,ollama_client=None, selection_policy=None, triage_cache=None,
+                 async_ollama_client=None, rule_classifier=None, confidence_threshold=0.75, similarity_index=None):
     
         self.doctors = doctors
         self.appointments = appointments
         self.ollama_client = ollama_client
+        self.async_ollama_client = async_ollama_client
+        self.triage_cache = triage_cache
+        # rewordings of complaints the model already answered
+        self.similarity_index = similarity_index
+        # first tier: local keyword classifier, the model only sees ambiguous text
+        self.rule_classifier = rule_classifier or KeywordTriageClassifier()
+        self.confidence_threshold = confidence_threshold
+        self.selection_policy = selection_policy or LeastBookedPolicy()
+
+        # doctors: a list, or MeditelSystem's id -> Doctor dict
+        self.specialty_index = SpecialtyIndex(
+            doctors.values() if isinstance(doctors, dict) else doctors
+        )
+
+        self.slot_index = SlotIndex()
+        # working hours minus bookings, as per-day bitmaps
+        self.calendar = SlotCalendar(self.slot_index)
+        self._doctor_locks = {}
+        self._locks_guard = threading.Lock()
+        for appt in appointments:
+            self._track(appt)
 
     # ---------- "AI" jaisa dimag: symptoms -> specialty ----------
     def _infer_specialty_from_symptoms(self, symptom_text: str) -> str:
-      if self.ollama_client is not None:
-        try:
-            specialty = self.ollama_client.predict_specialty(symptom_text)
+        guess, confident = self._classify_locally(symptom_text)
+        if confident:
+            return self._triaged(guess, "rules")
+
+        if self.ollama_client is not None:
+            cached = self._cached_specialty(symptom_text)
+            if cached is not None:
+                return self._triaged(cached, "cache")
+            similar = self._similar_specialty(symptom_text)
+            if similar is not None:
+                return self._triaged(similar, "similar")
 
-            if isinstance(specialty, str) and specialty.strip():
-                # ✅ NEW: agar comma hai to pehli specialty lo
-                specialty = specialty.split(",")[0].strip()
+            try:
+                with STAGE_SECONDS.time(stage="triage_model"):
+                    answer = self.ollama_client.predict_specialty(symptom_text)
+                specialty = self._accept_model_answer(symptom_text, answer)
+                if specialty is not None:
+                    return self._triaged(specialty, "model")
+            except Exception as e:
+                logger.warning("triage model failed, falling back to rules: %s", e)
 
-                print(f"[OLLAMA AI] Predicted specialty: {specialty}")
-                return specialty
+        return self._triaged(guess, "fallback")
 
+    async def infer_specialty_async(self, symptom_text: str) -> str:
+        """Same as _infer_specialty_from_symptoms, awaiting the async client."""
+        if self.async_ollama_client is None:
+            return self._infer_specialty_from_symptoms(symptom_text)
+
+        guess, confident = self._classify_locally(symptom_text)
+        if confident:
+            return self._triaged(guess, "rules")
+
+        cached = await self._cached_specialty_async(symptom_text)
+        if cached is not None:
+            return self._triaged(cached, "cache")
+        # the similarity index loads from disk on first use and saves every few hundred
+        # additions: off the event loop
+        if self.similarity_index is not None:
+            similar = await asyncio.to_thread(self._similar_specialty, symptom_text)
+            if similar is not None:
+                return self._triaged(similar, "similar")
+
+        try:
+            with STAGE_SECONDS.time(stage="triage_model"):
+                answer = await self.async_ollama_client.predict_specialty(symptom_text)
+            specialty = await asyncio.to_thread(self._accept_model_answer, symptom_text, answer)
+            if specialty is not None:
+                return self._triaged(specialty, "model")
         except Exception as e:
-            print("[OLLAMA AI] Failed, fallback to rules:", e)
+            logger.warning("triage model failed, falling back to rules: %s", e)
 
-      text = symptom_text.lower()
+        return self._triaged(guess, "fallback")
 
-      if "chest" in text or "heart" in text or "bp" in text:
-           return "Cardiologist"
+    # ---------- Batch triage: many symptom texts, one model pass per chunk ----------
+    def infer_specialties(self, symptom_texts: list) -> list:
+        if self.ollama_client is None:
+            return [self._infer_specialty_from_symptoms(t) for t in symptom_texts]
 
-      if "skin" in text or "rash" in text or "itch" in text or "allergy" in text:
-        return "Dermatologist"
+        results, pending = self._batch_from_cache(symptom_texts)
+        if pending:
+            texts = [symptom_texts[indexes[0]] for indexes in pending.values()]
+            try:
+                with STAGE_SECONDS.time(stage="triage_model_batch"):
+                    answers = self.ollama_client.predict_specialties(texts)
+                self._apply_batch_answers(symptom_texts, pending, answers, results)
+            except Exception as e:
+                logger.warning("batch triage model failed, falling back to rules: %s", e)
+        return self._fill_with_rules(symptom_texts, results)
 
-      if "cough" in text or "cold" in text or "fever" in text:
-        return "Physician"
+    async def infer_specialties_async(self, symptom_texts: list) -> list:
+        if self.async_ollama_client is None:
+            return self.infer_specialties(symptom_texts)
 
-      return "General Physician"
+        # cache misses read the cache's SQLite table and the similarity index its file: off the event loop
+        results, pending = await asyncio.to_thread(self._batch_from_cache, symptom_texts)
+        if pending:
+            texts = [symptom_texts[indexes[0]] for indexes in pending.values()]
+            try:
+                with STAGE_SECONDS.time(stage="triage_model_batch"):
+                    answers = await self.async_ollama_client.predict_specialties(texts)
+                # adding to the similarity index may save it
+                await asyncio.to_thread(self._apply_batch_answers, symptom_texts, pending, answers, results)
+            except Exception as e:
+                logger.warning("batch triage model failed, falling back to rules: %s", e)
+        return self._fill_with_rules(symptom_texts, results)
 
+    def _batch_from_cache(self, symptom_texts: list):
+        results = [None] * len(symptom_texts)
+        pending = {}   # normalized symptoms -> indexes still waiting for the model
+        for i, text in enumerate(symptom_texts):
+            specialty, confident = self._classify_locally(text)
+            if confident:
+                results[i] = self._triaged(specialty, "rules")
+                continue
+            cached = self._cached_specialty(text)
+            if cached is not None:
+                results[i] = self._triaged(cached, "cache")
+                continue
+            similar = self._similar_specialty(text)
+            if similar is not None:
+                results[i] = self._triaged(similar, "similar")
+            else:
+                pending.setdefault(normalize_symptoms(text), []).append(i)
+        return results, pending
+
+    def _apply_batch_answers(self, symptom_texts, pending, answers, results) -> None:
+        for indexes, answer in zip(pending.values(), answers):
+            specialty = self._accept_model_answer(symptom_texts[indexes[0]], answer)
+            if specialty is not None:
+                for i in indexes:
+                    results[i] = self._triaged(specialty, "model")
+
+    def _fill_with_rules(self, symptom_texts, results) -> list:
+        return [
+            specialty if specialty is not None else self._triaged(self._classify_locally(text)[0], "fallback")
+            for text, specialty in zip(symptom_texts, results)
+        ]
+
+    @staticmethod
+    def _triaged(specialty: str, source: str) -> str:
+        TRIAGE_TOTAL.inc(source=source)
+        logger.debug("triage specialty=%s source=%s", specialty, source)
+        return specialty
+
+    def _cached_specialty(self, symptom_text: str) -> str | None:
+        # same complaint (modulo case/spacing) -> no model round trip
+        if self.triage_cache is None:
+            return None
+        return self.triage_cache.get(symptom_text)
+
+    async def _cached_specialty_async(self, symptom_text: str) -> str | None:
+        if self.triage_cache is None:
+            return None
+        return await self.triage_cache.get_async(symptom_text)
+
+    def _similar_specialty(self, symptom_text: str) -> str | None:
+        # a rewording of an answered complaint -> its answer, and the exact text is cached from now on
+        if self.similarity_index is None:
+            return None
+        with STAGE_SECONDS.time(stage="triage_similarity"):
+            specialty = self.similarity_index.lookup(symptom_text)
+        if specialty is not None and self.triage_cache is not None:
+            self.triage_cache.set(symptom_text, specialty)
+        return specialty
+
+    def _accept_model_answer(self, symptom_text: str, specialty) -> str | None:
+        if not (isinstance(specialty, str) and specialty.strip()):
+            return None
+        # ✅ NEW: agar comma hai to pehli specialty lo
+        specialty = specialty.split(",")[0].strip()
+
+        logger.debug("triage model answer specialty=%s", specialty)
+        if self.triage_cache is not None:
+            self.triage_cache.set(symptom_text, specialty)
+        if self.similarity_index is not None:
+            self.similarity_index.add(symptom_text, specialty)
+        return specialty
+
+    def _classify_locally(self, symptom_text: str) -> tuple:
+        """(best local guess, whether it is confident enough to skip the model)."""
+        specialty, confidence = self.rule_classifier.classify(symptom_text)
+        return specialty, confidence >= self.confidence_threshold
+
+
+    # ---------- Doctor roster (owned by MeditelSystem, indexed here) ----------
+    def register_doctor(self, doctor: Doctor) -> None:
+        self.specialty_index.add(doctor)
+
+    def unregister_doctor(self, doctor: Doctor) -> None:
+        self.specialty_index.remove(doctor)
 
     # ---------- Doctor search ----------
     def find_doctor_by_specialty(self, specialty: str) -> Doctor | None:
-        specialty = specialty.lower().strip()
-        for d in self.doctors:
-            if hasattr(d, "specialty") and d.specialty.lower().strip() == specialty:
-                return d
-        return None
+        doctors = self.specialty_index.get(specialty)
+        return doctors[0] if doctors else None
+
+    def candidate_doctors(self, specialty: str, date_time: datetime, duration: timedelta = None) -> list:
+        """Doctors of ``specialty`` in the order the selection policy wants them tried."""
+        doctors = self.specialty_index.get(specialty)
+        duration = duration or Appointment.DEFAULT_DURATION
+        return self.selection_policy.order(doctors, self, date_time, duration)
 
     # ---------- Direct scheduling (doctor already decided) ----------
-    def schedule(self, doctor: Doctor, patient: Patient, date_time: datetime) -> Appointment:
-        if not self._is_doctor_available(doctor, date_time):
-         raise ValueError(f"Doctor {doctor.name} is not available at this time.")
-        appt = Appointment(doctor, patient, date_time)
-        self.appointments.append(appt)
-        return appt
+    def schedule(
+        self,
+        doctor: Doctor,
+        patient: Patient,
+        date_time: datetime,
+        duration: timedelta = None
+    ) -> Appointment:
+        return self._book(doctor, patient, date_time, duration)
 
     # ---------- Smart scheduling (sirf symptoms se) ----------
     def schedule_by_symptom(
         self,
         patient: Patient,
         symptom_text: str,
-        date_time: datetime
+        date_time: datetime,
+        duration: timedelta = None,
+        specialty: str = None,
+        auto_book: bool = False
     ) -> Appointment:
-        # 1) symptoms -> specialty
-        specialty = self._infer_specialty_from_symptoms(symptom_text)
-        print(f"[DEBUG] Inferred specialty: {specialty}")
+        # 1) symptoms -> specialty (unless the caller already triaged them)
+        if specialty is None:
+            specialty = self._infer_specialty_from_symptoms(symptom_text)
 
-        # 2) specialty -> doctor
-        doctor = self.find_doctor_by_specialty(specialty)
-        if doctor is None:
+        # 2) specialty -> doctor (first free one in policy order)
+        doctors = self.candidate_doctors(specialty, date_time, duration)
+        if not doctors:
             raise ValueError(f"No doctor found for specialty: {specialty}")
+        if auto_book:
+            # date_time is only the earliest acceptable start
+            return self.schedule_earliest(patient, specialty, date_time, duration)
 
-        if not self._is_doctor_available(doctor, date_time):
-         raise ValueError(f"Doctor {doctor.name} is not available at this time.")
+        for doctor in doctors:
+            # unlocked pre-check just skips busy doctors; _try_book decides
+            if self.is_slot_free(doctor, date_time, duration):
+                appt = self._try_book(doctor, patient, date_time, duration)
+                if appt is not None:
+                    return appt
+        raise outside_hours_error(doctors, f"every {specialty}", date_time, duration) or ValueError(
+            f"No {specialty} is available at this time."
+        )
+
+    def schedule_earliest(
+        self,
+        patient: Patient,
+        specialty: str,
+        after: datetime,
+        duration: timedelta = None,
+        horizon: timedelta = AUTO_BOOK_HORIZON
+    ) -> Appointment:
+        """Book the earliest free slot of any ``specialty`` doctor at or after ``after``."""
+        end = after + horizon
+        while True:
+            slots = self.find_free_slots(specialty, after, end, duration, n=8)
+            if not slots:
+                raise ValueError(f"No {specialty} is available before {end:%Y-%m-%d %H:%M}.")
+            for slot, doctor in slots:
+                appt = self._try_book(doctor, patient, slot, duration)
+                if appt is not None:
+                    return appt
+            # every slot was taken by a concurrent booking: search again
+
+    # ---------- Working hours ----------
+    def set_schedule(self, doctor: Doctor, schedule: WorkSchedule) -> None:
+        """Replace the doctor's schedule; existing bookings are kept."""
+        with self.doctor_lock(doctor):
+            doctor.schedule = schedule
+            self.calendar.rebuild(doctor)
+
+    # ---------- Free-slot search ----------
+    def doctor_free_slots(
+        self,
+        doctor: Doctor,
+        start: datetime,
+        end: datetime,
+        duration: timedelta = None,
+        slot_index: SlotIndex = None
+    ):
+        """Free slot starts of ``doctor`` in ``[start, end)``, earliest first.
+
+        Starts are on the doctor's slot grid; ``duration`` needs that many
+        consecutive free slots. Days come from the calendar's bitmaps, or are
+        built from ``slot_index`` when one is given. ValueError if the range
+        is longer than MAX_SLOT_SEARCH.
+        """
+        check_search_range(start, end)
+        duration = duration or Appointment.DEFAULT_DURATION
+        schedule = doctor.schedule
+        length = schedule.slots_needed(duration)
+        day, last_day = start.date(), (end - _TICK).date()
+        while day <= last_day:
+            if slot_index is None:
+                mask = self.calendar.free_mask(doctor, day)
+            else:
+                mask = day_free_mask(doctor, day, slot_index)
+            starts = run_starts(mask, length)
+            if starts:
+                opening = schedule.slot_start(day, 0)
+                while starts:
+                    lowest = starts & -starts
+                    slot = opening + (lowest.bit_length() - 1) * schedule.slot
+                    if slot >= end:
+                        return
+                    if slot >= start:
+                        yield slot
+                    starts ^= lowest
+            day += _ONE_DAY
+
+    def find_free_slots(
+        self,
+        specialty: str,
+        start: datetime,
+        end: datetime,
+        duration: timedelta = None,
+        n: int = 10,
+        slot_index: SlotIndex = None,
+        doctors: list = None
+    ) -> list:
+        """Earliest ``n`` free ``(start, doctor)`` slots among ``specialty`` doctors.
+
+        Each doctor's slots come out sorted, so a heap merge only reads about
+        ``n`` of them; equal start times go to doctors in selection-policy order.
+        """
+        check_search_range(start, end)
+        if doctors is None:
+            doctors = self.candidate_doctors(specialty, start, duration)
+        streams = [
+            _ranked(rank, doctor, self.doctor_free_slots(doctor, start, end, duration, slot_index))
+            for rank, doctor in enumerate(doctors)
+        ]
+        return [(slot, doctor) for slot, _, doctor in islice(heapq.merge(*streams), n)]
+
+    # ---------- Availability (slot calendar) ----------
+    def is_slot_free(self, doctor: Doctor, date_time: datetime, duration: timedelta = None) -> bool:
+        """On the doctor's slot grid, within working hours and not booked."""
+        duration = duration or Appointment.DEFAULT_DURATION
+        return self.calendar.is_free(doctor, date_time, date_time + duration)
+
+    def next_free_slot(self, doctor: Doctor, after: datetime, duration: timedelta = None) -> datetime | None:
+        """Earliest free slot start >= after; None if none within AUTO_BOOK_HORIZON."""
+        return next(self.doctor_free_slots(doctor, after, after + AUTO_BOOK_HORIZON, duration), None)
+
+    def count_bookings(self, doctor: Doctor, start: datetime, end: datetime) -> int:
+        return self.slot_index.count(doctor, start, end)
 
-        appt = Appointment(doctor, patient, date_time)
-        self.appointments.append(appt)
-        return appt
-    
     def _is_doctor_available(self, doctor: Doctor, date_time: datetime) -> bool:
         """Check karo ki given time pe doctor free hai ya nahi."""
-        for appt in self.appointments:
-            # same doctor + same time + still scheduled
-            if (
-                appt.doctor == doctor and
-                appt.date_time == date_time and
-                appt.status == Appointment.STATUS_SCHEDULED
-            ):
-                return False
-        return True
\ No newline at end of file
+        return self.is_slot_free(doctor, date_time)
+
+    # ---------- Booking: check + insert is atomic per doctor ----------
+    def doctor_lock(self, doctor: Doctor) -> threading.Lock:
+        """Lock guarding one doctor's calendar; different doctors book in parallel."""
+        lock = self._doctor_locks.get(doctor)
+        if lock is None:
+            with self._locks_guard:
+                lock = self._doctor_locks.setdefault(doctor, threading.Lock())
+        return lock
+
+    def _book(self, doctor, patient, date_time, duration=None) -> Appointment:
+        appt = self._try_book(doctor, patient, date_time, duration)
+        if appt is None:
+            raise outside_hours_error([doctor], f"Doctor {doctor.name}", date_time, duration) or ValueError(
+                f"Doctor {doctor.name} is not available at this time."
+            )
+        return appt
+
+    def _try_book(self, doctor, patient, date_time, duration=None) -> Appointment | None:
+        with self.doctor_lock(doctor):
+            started = clock.perf_counter()
+            free = self.is_slot_free(doctor, date_time, duration)
+            STAGE_SECONDS.observe(clock.perf_counter() - started, stage="availability")
+            if not free:
+                return None
+            appt = Appointment(doctor, patient, date_time, duration)
+            self.appointments.append(appt)
+            self._track(appt)
+        return appt
+
+    def restore(self, appt: Appointment) -> None:
+        """Take over an appointment loaded from storage (no availability check)."""
+        self.appointments.append(appt)
+        # shared-state workers restore the rows they reserve from request threads
+        with self.doctor_lock(appt.doctor):
+            self._track(appt)
+
+    def release(self, appt: Appointment) -> None:
+        """Undo a booking that could not be persisted."""
+        with self.doctor_lock(appt.doctor):
+            if appt.status == Appointment.STATUS_SCHEDULED:
+                self.slot_index.remove(appt)
+                self.calendar.remove(appt)
+            appt._on_status_change = None
+        with self._locks_guard:
+            # it was just appended, so look from the end
+            for i in range(len(self.appointments) - 1, -1, -1):
+                if self.appointments[i] is appt:
+                    del self.appointments[i]
+                    break
+
+    def drop_bookings(self, doctors=(), patients=()) -> int:
+        """Forget every appointment of ``doctors`` or ``patients`` (deleted from the
+        roster) in one pass over the appointment list; returns how many."""
+        doctors, patients = set(doctors), set(patients)
+        if not doctors and not patients:
+            return 0
+        for doctor in doctors:
+            with self.doctor_lock(doctor):
+                self.slot_index.drop(doctor)
+                self.calendar.rebuild(doctor)
+        with self._locks_guard:
+            # bookings appended while we filter land past ``n`` and are kept
+            n = len(self.appointments)
+            kept, dropped = [], []
+            for appt in self.appointments[:n]:
+                (dropped if appt.doctor in doctors or appt.patient in patients else kept).append(appt)
+            self.appointments[:n] = kept
+            for doctor in doctors:
+                self._doctor_locks.pop(doctor, None)
+
+        # patients' bookings with remaining doctors: one calendar rebuild per doctor
+        freed = {}
+        for appt in dropped:
+            appt._on_status_change = None
+            if appt.doctor not in doctors and appt.status == Appointment.STATUS_SCHEDULED:
+                freed.setdefault(appt.doctor, set()).add(appt)
+        for doctor, appts in freed.items():
+            with self.doctor_lock(doctor):
+                self.slot_index.remove_many(doctor, appts)
+                self.calendar.rebuild(doctor)
+        return len(dropped)
+
+    def _track(self, appt: Appointment) -> None:
+        appt._on_status_change = self._on_status_change
+        if appt.status == Appointment.STATUS_SCHEDULED:
+            self.slot_index.add(appt)
+            self.calendar.add(appt)
+
+    def _on_status_change(self, appt: Appointment, previous: str) -> None:
+        # completed/cancelled bookings free their slot, re-scheduled ones take it back
+        with self.doctor_lock(appt.doctor):
+            if previous == Appointment.STATUS_SCHEDULED:
+                self.slot_index.remove(appt)
+                self.calendar.remove(appt)
+            elif appt.status == Appointment.STATUS_SCHEDULED:
+                self.slot_index.add(appt)
+                self.calendar.add(appt)
+
+
+def _ranked(rank: int, doctor: Doctor, slots):
+    # (start, rank, doctor): rank breaks ties, so doctors are never compared
+    for slot in slots:
+        yield slot, rank, doctor
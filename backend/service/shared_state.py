@@ -0,0 +1,204 @@
+"""Booking against the database, for running several worker processes.
+
+Each uvicorn worker holds its own MeditelSystem, so in-memory availability
+only knows about that worker's bookings. With MEDITEL_SHARED_STATE=1 the
+database is the source of truth instead:
+
+- the doctor row is locked (``UPDATE ... SET id = id``: a row lock on
+  PostgreSQL/MySQL, the database write lock on SQLite) before the slot is
+  checked, so two workers can't both see it free
+- the check is the doctor's stored schedule plus an overlap query on the
+  appointments table
+- doctors and patients created by other workers are picked up on a miss
+
+The worker's own SlotIndex is still updated, so selection policies keep
+working, but it only decides the order doctors are tried in.
+"""
+from datetime import timedelta
+
+from sqlalchemy import func, select, update
+
+from backend.models.appointment import Appointment
+from backend.models.doctors import Doctor
+from backend.models.patients import Patient
+from backend.models.schedule import WorkSchedule
+from backend.models.db_models import DoctorDB, DoctorLeaveDB, PatientDB, AppointmentDB
+from backend.service.persistence import DOCTOR_COLUMNS, doctor_tuples, leave_days_by_doctor
+from backend.service.scheduler import AUTO_BOOK_HORIZON, outside_hours_error
+from backend.service.slot_index import SlotIndex
+from backend.service.specialty_index import normalize_specialty
+
+SCHEDULED = Appointment.STATUS_SCHEDULED
+
+
+def find_patient(system, db, name: str):
+    """Patient by name, loading it into ``system`` if another worker created it."""
+    patient = system.find_patient(name)
+    if patient is not None:
+        return patient
+    row = db.execute(
+        select(PatientDB.id, PatientDB.name, PatientDB.age, PatientDB.symptoms)
+        .where(PatientDB.name == name)
+        .order_by(PatientDB.id)
+        .limit(1)
+    ).first()
+    if row is None:
+        return None
+    patient = Patient(row.name, row.age, row.symptoms)
+    patient.id = row.id
+    system.add_patient(patient)
+    return patient
+
+
+def candidate_doctors(system, db, specialty: str, date_time, duration: timedelta = None) -> list:
+    """Doctors of ``specialty`` that exist in the database, in policy order."""
+    ids = db.scalars(
+        select(DoctorDB.id).where(func.lower(DoctorDB.specialty) == normalize_specialty(specialty))
+    ).all()
+    missing = [doctor_id for doctor_id in ids if doctor_id not in system.doctors]
+    if missing:
+        rows = db.execute(select(*DOCTOR_COLUMNS).where(DoctorDB.id.in_(missing)))
+        for doctor_id, name, age, specialty_name, contact, schedule in doctor_tuples(
+            rows, leave_days_by_doctor(db, missing)
+        ):
+            doctor = Doctor(name, age, specialty_name, contact, schedule)
+            doctor.id = doctor_id
+            system.add_doctor(doctor)
+
+    # doctors deleted by another worker drop out here
+    doctors = [system.doctors[doctor_id] for doctor_id in ids]
+    scheduler = system.scheduler
+    return scheduler.selection_policy.order(
+        doctors, scheduler, date_time, duration or Appointment.DEFAULT_DURATION
+    )
+
+
+def stored_schedule(db, doctor_id: int, day) -> WorkSchedule:
+    """The doctor's schedule as stored, with ``day`` as leave if it is one."""
+    columns = db.execute(select(*DOCTOR_COLUMNS[5:]).where(DoctorDB.id == doctor_id)).one()
+    on_leave = db.scalar(
+        select(DoctorLeaveDB.id).where(DoctorLeaveDB.doctor_id == doctor_id, DoctorLeaveDB.day == day)
+    )
+    return WorkSchedule.from_columns(*columns, leave_days=[day] if on_leave else ())
+
+
+def longest_booking(db) -> timedelta:
+    """Length of the longest stored booking: how far back a booking that
+    overlaps a given time can start."""
+    minutes = db.scalar(select(func.max(AppointmentDB.duration_minutes)))
+    return max(Appointment.stored_duration(minutes), Appointment.DEFAULT_DURATION)
+
+
+def _live_bookings(db, doctor_ids, start, end):
+    """(doctor_id, start, duration) of the live bookings overlapping ``[start, end)``."""
+    rows = db.execute(
+        select(AppointmentDB.doctor_id, AppointmentDB.scheduled_time, AppointmentDB.duration_minutes)
+        .where(
+            AppointmentDB.doctor_id.in_(doctor_ids),
+            AppointmentDB.status == SCHEDULED,
+            AppointmentDB.scheduled_time > start - longest_booking(db),
+            AppointmentDB.scheduled_time < end,
+        )
+    )
+    for doctor_id, scheduled_time, minutes in rows:
+        duration = Appointment.stored_duration(minutes)
+        if scheduled_time + duration > start:
+            yield doctor_id, scheduled_time, duration
+
+
+def is_slot_free(db, doctor_id: int, date_time, duration: timedelta = None) -> bool:
+    """Overlap check in the database, against each stored booking's own length."""
+    end = date_time + (duration or Appointment.DEFAULT_DURATION)
+    return next(_live_bookings(db, [doctor_id], date_time, end), None) is None
+
+
+def reserve(db, doctor, patient, date_time, symptoms=None, duration: timedelta = None):
+    """Lock the doctor, check the slot and insert the row (flushed, not committed).
+
+    Returns the AppointmentDB row, or None if the slot is taken. The lock is
+    held until the caller commits or rolls back.
+    """
+    db.execute(update(DoctorDB).where(DoctorDB.id == doctor.id).values(id=DoctorDB.id))
+    # the stored schedule, not this worker's copy: another worker may have changed it
+    duration = duration or Appointment.DEFAULT_DURATION
+    end = date_time + duration
+    if not stored_schedule(db, doctor.id, date_time.date()).covers(date_time, end):
+        return None
+    if not is_slot_free(db, doctor.id, date_time, duration):
+        return None
+    row = AppointmentDB(
+        doctor_id=doctor.id,
+        patient_id=patient.id,
+        scheduled_time=date_time,
+        duration_minutes=Appointment.stored_minutes(duration),
+        status=SCHEDULED,
+        symptoms=symptoms,
+    )
+    db.add(row)
+    db.flush()
+    return row
+
+
+def booked_index(db, doctors: list, start, end) -> SlotIndex:
+    """SlotIndex of the live bookings of ``doctors`` around ``[start, end)``."""
+    index = SlotIndex()
+    by_id = {doctor.id: doctor for doctor in doctors}
+    for doctor_id, scheduled_time, duration in _live_bookings(db, by_id, start, end):
+        index.add(Appointment(by_id[doctor_id], None, scheduled_time, duration))
+    return index
+
+
+def find_free_slots(system, db, specialty: str, start, end, duration: timedelta = None, n: int = 10) -> list:
+    """Scheduler.find_free_slots over the bookings of every worker."""
+    doctors = candidate_doctors(system, db, specialty, start, duration)
+    # a slot starting just before ``end`` may run past it
+    index = booked_index(db, doctors, start, end + (duration or Appointment.DEFAULT_DURATION))
+    return system.scheduler.find_free_slots(
+        specialty, start, end, duration, n, slot_index=index, doctors=doctors
+    )
+
+
+def _reserve_first(system, db, patient, slots, symptoms=None, duration: timedelta = None):
+    """Book the first of ``slots`` ((start, doctor) pairs) still free; None if none is."""
+    for date_time, doctor in slots:
+        # the lock must be the first statement of the (sub)transaction: on
+        # SQLite a transaction that has already read can't wait for the lock
+        with db.begin_nested():
+            row = reserve(db, doctor, patient, date_time, symptoms, duration)
+        if row is not None:
+            appt = Appointment(doctor, patient, date_time, duration)
+            appt.id = row.id
+            system.scheduler.restore(appt)
+            return appt
+    return None
+
+
+def book_by_specialty(system, db, patient, specialty: str, date_time, symptoms=None,
+                      duration: timedelta = None) -> Appointment:
+    """First free doctor of ``specialty`` in policy order; ValueError if none."""
+    doctors = candidate_doctors(system, db, specialty, date_time, duration)
+    if not doctors:
+        raise ValueError(f"No doctor found for specialty: {specialty}")
+
+    appt = _reserve_first(system, db, patient, [(date_time, doctor) for doctor in doctors], symptoms, duration)
+    if appt is None:
+        raise outside_hours_error(doctors, f"every {specialty}", date_time, duration) or ValueError(
+            f"No {specialty} is available at this time."
+        )
+    return appt
+
+
+def book_earliest(system, db, patient, specialty: str, after, symptoms=None,
+                  duration: timedelta = None, horizon: timedelta = AUTO_BOOK_HORIZON) -> Appointment:
+    """Earliest free slot of any ``specialty`` doctor at or after ``after``."""
+    end = after + horizon
+    while True:
+        slots = find_free_slots(system, db, specialty, after, end, duration, n=8)
+        if not slots:
+            if not system.scheduler.specialty_index.get(specialty):
+                raise ValueError(f"No doctor found for specialty: {specialty}")
+            raise ValueError(f"No {specialty} is available before {end:%Y-%m-%d %H:%M}.")
+        appt = _reserve_first(system, db, patient, slots, symptoms, duration)
+        if appt is not None:
+            return appt
+        # every slot was taken by another worker meanwhile: search again
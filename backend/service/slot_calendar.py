@@ -0,0 +1,129 @@
+from datetime import date, datetime, time, timedelta
+
+from backend.service.slot_index import SlotIndex
+
+_TICK = timedelta(microseconds=1)
+
+
+def _bits(i: int, j: int) -> int:
+    return ((1 << (j - i)) - 1) << i if i < j else 0
+
+
+def busy_mask(doctor, day: date, appts) -> int:
+    """Slots of ``day`` on the doctor's grid touched by ``appts``."""
+    schedule = doctor.schedule
+    day_start = datetime.combine(day, time.min)
+    mask = 0
+    for appt in appts:
+        mask |= _bits(*schedule.cover_range(max(appt.date_time, day_start), appt.end_time))
+    return mask
+
+
+def day_free_mask(doctor, day: date, slot_index: SlotIndex) -> int:
+    """Free slots of ``doctor`` on ``day``: the schedule's bitmap minus bookings."""
+    schedule = doctor.schedule
+    mask = schedule.day_mask(day)
+    if mask:
+        window = schedule.window(day)
+        mask &= ~busy_mask(doctor, day, slot_index.overlapping(doctor, *window))
+    return mask
+
+
+def run_starts(mask: int, length: int) -> int:
+    """Bits ``i`` where ``length`` consecutive bits from ``i`` up are all set."""
+    runs = mask
+    for shift in range(1, length):
+        runs &= mask >> shift
+    return runs
+
+
+class SlotCalendar:
+    """Per-doctor, per-day bitmaps of booked slots, kept in step with bookings.
+
+    A day's free slots are the schedule's bitmap minus its busy bitmap, so
+    availability checks and free-slot scans are a dict lookup plus a few bit
+    operations, and nothing is ever rebuilt on a read. Only days with
+    bookings have a busy bitmap, so memory grows with the bookings the
+    SlotIndex already holds, not with the days scanned.
+
+    There is no lock of its own: updates come from the Scheduler under the
+    doctor's lock, so bookings of different doctors never wait on each
+    other, and reads only do dict lookups.
+    """
+
+    def __init__(self, slot_index: SlotIndex):
+        self.slot_index = slot_index
+        self._busy = {}   # doctor -> {date: busy bitmap}, days with bookings only
+
+    def free_mask(self, doctor, day: date) -> int:
+        days = self._busy.get(doctor)
+        busy = days.get(day, 0) if days else 0
+        return doctor.schedule.day_mask(day) & ~busy
+
+    def is_free(self, doctor, start: datetime, end: datetime) -> bool:
+        """True if ``[start, end)`` is on the doctor's slot grid, inside working
+        hours and not booked (any time off leave and not booked, for an
+        unrestricted schedule)."""
+        if not doctor.schedule.restricted:
+            return doctor.schedule.covers(start, end) and self.slot_index.is_free(doctor, start, end)
+        slots = doctor.schedule.slot_range(start, end)
+        if slots is None:
+            return False
+        wanted = _bits(*slots)
+        return self.free_mask(doctor, start.date()) & wanted == wanted
+
+    # ---------- Bookings (called by the Scheduler under the doctor lock) ----------
+    def add(self, appt) -> None:
+        days = self._busy.get(appt.doctor)
+        if days is None:
+            days = self._busy[appt.doctor] = {}
+        _mark(days, appt)
+
+    def remove(self, appt) -> None:
+        days = self._busy.get(appt.doctor)
+        if days is None:
+            return
+        # neighbours may share a partly covered slot, so redo the day from its bookings
+        for day in _days_touched(appt):
+            day_start = datetime.combine(day, time.min)
+            mask = busy_mask(
+                appt.doctor, day,
+                self.slot_index.overlapping(appt.doctor, day_start, day_start + timedelta(days=1)),
+            )
+            if mask:
+                days[day] = mask
+            else:
+                days.pop(day, None)
+
+    def rebuild(self, doctor) -> None:
+        """Redo the doctor's bitmaps from the SlotIndex, e.g. after a schedule
+        change or after bookings left it in bulk."""
+        days = {}
+        for appt in self.slot_index.bookings(doctor):
+            _mark(days, appt)
+        if days:
+            self._busy[doctor] = days
+        else:
+            self._busy.pop(doctor, None)
+
+
+def _mark(days: dict, appt) -> None:
+    start, end = appt.date_time, appt.end_time
+    day = start.date()
+    if (end - _TICK).date() == day:
+        # the common case: a booking within one day
+        mask = _bits(*appt.doctor.schedule.cover_range(start, end))
+        if mask:
+            days[day] = days.get(day, 0) | mask
+        return
+    for day in _days_touched(appt):
+        mask = busy_mask(appt.doctor, day, (appt,))
+        if mask:
+            days[day] = days.get(day, 0) | mask
+
+
+def _days_touched(appt):
+    day, last = appt.date_time.date(), (appt.end_time - _TICK).date()
+    while day <= last:
+        yield day
+        day += timedelta(days=1)
@@ -0,0 +1,148 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+
+
+class _DoctorCalendar:
+    """Sorted bookings of one doctor plus the merged busy blocks they form."""
+
+    def __init__(self):
+        self.starts = []         # booking start times, sorted
+        self.appts = []          # appointments, parallel to starts
+        self.block_starts = []   # back-to-back bookings merged into busy blocks
+        self.block_ends = []
+
+    def add(self, appt) -> None:
+        start, end = appt.date_time, appt.end_time
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.appts.insert(i, appt)
+
+        # merge with the block ending exactly at our start / starting at our end
+        j = bisect_right(self.block_starts, start)
+        if j > 0 and self.block_ends[j - 1] >= start:
+            j -= 1
+            start = self.block_starts[j]
+            end = max(end, self.block_ends[j])
+            del self.block_starts[j]
+            del self.block_ends[j]
+        if j < len(self.block_starts) and self.block_starts[j] <= end:
+            end = max(end, self.block_ends[j])
+            del self.block_starts[j]
+            del self.block_ends[j]
+        self.block_starts.insert(j, start)
+        self.block_ends.insert(j, end)
+
+    def remove(self, appt) -> bool:
+        i = bisect_left(self.starts, appt.date_time)
+        while i < len(self.starts) and self.starts[i] == appt.date_time:
+            if self.appts[i] is appt:
+                break
+            i += 1
+        else:
+            return False
+        del self.starts[i]
+        del self.appts[i]
+
+        # the block holding this booking splits around it; bookings inside a
+        # block touch each other, so both remainders are still exact
+        start, end = appt.date_time, appt.end_time
+        j = bisect_right(self.block_starts, start) - 1
+        block_start, block_end = self.block_starts[j], self.block_ends[j]
+        del self.block_starts[j]
+        del self.block_ends[j]
+        if end < block_end:
+            self.block_starts.insert(j, end)
+            self.block_ends.insert(j, block_end)
+        if block_start < start:
+            self.block_starts.insert(j, block_start)
+            self.block_ends.insert(j, start)
+        return True
+
+
+class SlotIndex:
+    """Per-doctor calendar of scheduled appointments, kept sorted by start time.
+
+    Bookings of one doctor never overlap (the scheduler only inserts free
+    slots), so sorting by start also sorts by end and every overlap question
+    becomes a couple of binary searches.
+    """
+
+    def __init__(self):
+        self._calendars = {}   # doctor -> _DoctorCalendar
+
+    def add(self, appt) -> None:
+        calendar = self._calendars.get(appt.doctor)
+        if calendar is None:
+            calendar = self._calendars[appt.doctor] = _DoctorCalendar()
+        calendar.add(appt)
+
+    def remove(self, appt) -> None:
+        calendar = self._calendars.get(appt.doctor)
+        if calendar is not None:
+            calendar.remove(appt)
+
+    def drop(self, doctor) -> None:
+        """Forget all of ``doctor``'s bookings."""
+        self._calendars.pop(doctor, None)
+
+    def remove_many(self, doctor, appts: set) -> None:
+        """Remove ``appts`` (bookings of ``doctor``) with one rebuild of its calendar."""
+        calendar = self._calendars.get(doctor)
+        if calendar is None:
+            return
+        rebuilt = _DoctorCalendar()
+        for appt in calendar.appts:
+            if appt not in appts:
+                rebuilt.add(appt)   # in start order, so every insert is at the end
+        self._calendars[doctor] = rebuilt
+
+    def is_free(self, doctor, start: datetime, end: datetime) -> bool:
+        """True if no booking of ``doctor`` overlaps ``[start, end)``."""
+        calendar = self._calendars.get(doctor)
+        if calendar is None:
+            return True
+        # the last block starting before our end is the only one that can overlap
+        i = bisect_left(calendar.block_starts, end)
+        return i == 0 or calendar.block_ends[i - 1] <= start
+
+    def next_free(self, doctor, after: datetime, duration: timedelta) -> datetime:
+        """Earliest start >= ``after`` where ``duration`` fits between bookings.
+
+        One binary search over busy blocks; only gaps too short for
+        ``duration`` are stepped over after that.
+        """
+        calendar = self._calendars.get(doctor)
+        if calendar is None:
+            return after
+        block_starts, block_ends = calendar.block_starts, calendar.block_ends
+        candidate = after
+        i = bisect_right(block_starts, after)
+        if i > 0 and block_ends[i - 1] > candidate:
+            candidate = block_ends[i - 1]
+        while i < len(block_starts) and block_starts[i] < candidate + duration:
+            candidate = block_ends[i]
+            i += 1
+        return candidate
+
+    def count(self, doctor, start: datetime, end: datetime) -> int:
+        """Number of bookings of ``doctor`` starting in ``[start, end)``."""
+        calendar = self._calendars.get(doctor)
+        if calendar is None:
+            return 0
+        return bisect_left(calendar.starts, end) - bisect_left(calendar.starts, start)
+
+    def overlapping(self, doctor, start: datetime, end: datetime) -> list:
+        """Bookings of ``doctor`` overlapping ``[start, end)``."""
+        calendar = self._calendars.get(doctor)
+        if calendar is None:
+            return []
+        i = max(0, bisect_right(calendar.starts, start) - 1)
+        j = bisect_left(calendar.starts, end)
+        return [appt for appt in calendar.appts[i:j] if appt.end_time > start]
+
+    def bookings(self, doctor) -> list:
+        calendar = self._calendars.get(doctor)
+        return list(calendar.appts) if calendar is not None else []
+
+    def __len__(self) -> int:
+        return sum(len(c.starts) for c in self._calendars.values())
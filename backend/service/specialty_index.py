@@ -0,0 +1,96 @@
+import threading
+from datetime import datetime, timedelta
+
+
+def normalize_specialty(specialty: str) -> str:
+    return specialty.lower().strip()
+
+
+class SpecialtyIndex:
+    """Normalized specialty -> doctors, so lookups don't touch every doctor."""
+
+    def __init__(self, doctors=()):
+        self._by_specialty = {}
+        for doctor in doctors:
+            self.add(doctor)
+
+    def add(self, doctor) -> None:
+        specialty = getattr(doctor, "specialty", None)
+        if specialty:
+            self._by_specialty.setdefault(normalize_specialty(specialty), []).append(doctor)
+
+    def remove(self, doctor) -> None:
+        specialty = getattr(doctor, "specialty", None)
+        if not specialty:
+            return
+        key = normalize_specialty(specialty)
+        doctors = self._by_specialty.get(key)
+        if doctors and doctor in doctors:
+            doctors.remove(doctor)
+            if not doctors:
+                del self._by_specialty[key]
+
+    def get(self, specialty: str) -> list:
+        return self._by_specialty.get(normalize_specialty(specialty), [])
+
+    def specialties(self) -> list:
+        return list(self._by_specialty)
+
+
+# ---------- Selection policies: which doctor of a specialty to try first ----------
+class SelectionPolicy:
+    """Orders the doctors of a specialty for a booking at ``date_time``.
+
+    ``schedule_by_symptom`` tries them in this order and books the first
+    one that is free.
+    """
+
+    def order(self, doctors: list, scheduler, date_time: datetime, duration: timedelta) -> list:
+        raise NotImplementedError
+
+
+class LeastBookedPolicy(SelectionPolicy):
+    """Fewest bookings in the window (default: the requested day) first."""
+
+    def __init__(self, window: timedelta = timedelta(days=1)):
+        self.window = window
+
+    def order(self, doctors, scheduler, date_time, duration):
+        start = date_time.replace(hour=0, minute=0, second=0, microsecond=0)
+        end = start + self.window
+        return sorted(doctors, key=lambda d: scheduler.count_bookings(d, start, end))
+
+
+class RoundRobinPolicy(SelectionPolicy):
+    """Rotates the starting doctor per specialty on every booking."""
+
+    def __init__(self):
+        self._next = {}
+        # called from threadpool endpoints: two bookings must not get the same start
+        self._lock = threading.Lock()
+
+    def order(self, doctors, scheduler, date_time, duration):
+        if not doctors:
+            return []
+        key = normalize_specialty(doctors[0].specialty)
+        with self._lock:
+            k = self._next.get(key, 0) % len(doctors)
+            self._next[key] = k + 1
+        return doctors[k:] + doctors[:k]
+
+
+class EarliestFreePolicy(SelectionPolicy):
+    """Doctors whose next free slot (from ``date_time``) is earliest first."""
+
+    def order(self, doctors, scheduler, date_time, duration):
+        return sorted(
+            doctors, key=lambda d: scheduler.next_free_slot(d, date_time, duration) or datetime.max
+        )
+
+
+# names for MEDITEL_SELECTION_POLICY
+SELECTION_POLICIES = {
+    "least-booked": LeastBookedPolicy,
+    "round-robin": RoundRobinPolicy,
+    "earliest-free": EarliestFreePolicy,
+}
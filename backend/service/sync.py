@@ -0,0 +1,229 @@
+"""Set-based reconciliation of the in-memory MeditelSystem with the database.
+
+Rows are matched by id. Each side's ids are read in one pass (one query
+per table, a dict/list walk in memory), the differences are computed as
+set operations, and only the missing rows are moved:
+
+- to the database: objects created in memory only (negative placeholder
+  ids) get their ids from the database (bulk import's chunked insert, so one clashing booking doesn't
+  sink the rest) and are re-keyed in the system
+- doctors and patients whose rows were deleted elsewhere (another worker,
+  a script) are dropped from memory with their appointments, or, with
+  ``restore_deleted``, go back in under their old ids
+- to memory: missing doctors, patients and live appointments are streamed
+  once and handed to ``MeditelSystem.load``
+"""
+import time
+
+from sqlalchemy import insert, select, text
+
+from backend.models.appointment import Appointment
+from backend.models.db_models import DoctorDB, DoctorLeaveDB, PatientDB, AppointmentDB
+from backend.service.bulk_import import DEFAULT_CHUNK_SIZE, insert_chunk
+from backend.service.persistence import (
+    DOCTOR_COLUMNS,
+    HYDRATE_BATCH,
+    doctor_tuples,
+    leave_days_by_doctor,
+)
+
+DIRECTIONS = ("to_db", "from_db", "both")
+
+
+def sync_system(db, system, direction: str = "to_db", restore_deleted: bool = False) -> dict:
+    """Reconcile ``system`` and the database; counts per direction and the time taken."""
+    if direction not in DIRECTIONS:
+        raise ValueError(f"direction must be one of {', '.join(DIRECTIONS)}")
+    started = time.perf_counter()
+    db_ids = stored_ids(db)
+    result = {}
+    if direction in ("to_db", "both"):
+        result["synced"] = push(db, system, db_ids, restore_deleted)
+    if direction in ("from_db", "both"):
+        result["loaded"] = pull(db, system, db_ids)
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def stored_ids(db) -> dict:
+    """Ids in the database: doctors, patients, all appointments and the live ones."""
+    appointments, scheduled = set(), set()
+    for appt_id, status in db.execute(select(AppointmentDB.id, AppointmentDB.status)):
+        appointments.add(appt_id)
+        if status == Appointment.STATUS_SCHEDULED:
+            scheduled.add(appt_id)
+    return {
+        "doctors": set(db.scalars(select(DoctorDB.id))),
+        "patients": set(db.scalars(select(PatientDB.id))),
+        "appointments": appointments,
+        "scheduled": scheduled,
+    }
+
+
+# ---------- Memory -> database ----------
+def push(db, system, db_ids: dict, restore_deleted: bool = False) -> dict:
+    """Insert what only ``system`` has; ``db_ids`` is updated with the new rows.
+
+    Doctors and patients stored once and deleted since are dropped from
+    ``system``, unless ``restore_deleted`` inserts them again.
+    """
+    unsaved_doctors = system.unsaved_doctors()
+    unsaved_patients = system.unsaved_patients()
+    # stored once, then deleted by someone else
+    lost_doctors = [system.doctors[i] for i in system.doctors.keys() - db_ids["doctors"] if i > 0]
+    lost_patients = [system.patients[i] for i in system.patients.keys() - db_ids["patients"] if i > 0]
+    removed = 0
+    if not restore_deleted:
+        # their appointments go too, so ``pending`` below won't bring them back
+        removed = len(system.remove_doctors([d.id for d in lost_doctors]))
+        removed += len(system.remove_patients([p.id for p in lost_patients]))
+        lost_doctors, lost_patients = [], []
+
+    _insert_rows(db, DoctorDB, [{"id": d.id, **_doctor_values(d)} for d in lost_doctors])
+    _insert_rows(db, PatientDB, [{"id": p.id, **_patient_values(p)} for p in lost_patients])
+    _advance_sequences(db, lost_doctors and DoctorDB, lost_patients and PatientDB)
+    db.commit()
+
+    # never stored: the database hands out ids, then the system is re-keyed
+    saved_doctors, doctors_rejected = _insert_new(db, DoctorDB, unsaved_doctors, _doctor_values)
+    system.mark_doctors_saved(saved_doctors)
+    saved_patients, patients_rejected = _insert_new(db, PatientDB, unsaved_patients, _patient_values)
+    system.mark_patients_saved(saved_patients)
+
+    doctors = lost_doctors + [doctor for doctor, _ in saved_doctors]
+    _insert_rows(db, DoctorLeaveDB, [
+        {"doctor_id": d.id, "day": day} for d in doctors for day in sorted(d.schedule.leave_days)
+    ])
+    db.commit()
+    db_ids["doctors"].update(d.id for d in doctors)
+    db_ids["patients"].update(p.id for p in lost_patients)
+    db_ids["patients"].update(p.id for p, _ in saved_patients)
+
+    # bookings of doctors or patients removed since, or not stored, are left out
+    pending = [
+        appt for appt in system.appointments
+        if (appt.id is None or appt.id not in db_ids["appointments"])
+        and appt.doctor.id > 0 and appt.patient.id > 0
+        and system.doctors.get(appt.doctor.id) is appt.doctor
+        and system.patients.get(appt.patient.id) is appt.patient
+    ]
+    saved_appointments, appointments_rejected = _insert_new(db, AppointmentDB, pending, _appointment_values)
+    for appt, row_id in saved_appointments:
+        appt.id = row_id
+        db_ids["appointments"].add(row_id)
+        if appt.status == Appointment.STATUS_SCHEDULED:
+            db_ids["scheduled"].add(row_id)
+
+    return {
+        "doctors": len(doctors),
+        "patients": len(lost_patients) + len(saved_patients),
+        "appointments": len(saved_appointments),
+        # invalid rows (e.g. a doctor without contact) and clashing bookings
+        "rejected": doctors_rejected + patients_rejected + appointments_rejected,
+        # doctors and patients deleted from the database, dropped from memory
+        "removed": removed,
+    }
+
+
+def _doctor_values(doctor) -> dict:
+    return {
+        "name": doctor.name,
+        "age": doctor.age,
+        "specialty": doctor.specialty,
+        "contact": doctor.contact,
+        **doctor.schedule.to_columns(),
+    }
+
+
+def _patient_values(patient) -> dict:
+    return {"name": patient.name, "age": patient.age, "symptoms": patient.symptom_text or None}
+
+
+def _appointment_values(appt) -> dict:
+    return {
+        "doctor_id": appt.doctor.id,
+        "patient_id": appt.patient.id,
+        "scheduled_time": appt.date_time,
+        "duration_minutes": Appointment.stored_minutes(appt.duration),
+        "status": appt.status,
+    }
+
+
+def _insert_new(db, table, objects: list, values) -> tuple:
+    """Chunked insert with database-assigned ids: ([(object, id)], rows rejected)."""
+    saved, rejected = [], 0
+    for start in range(0, len(objects), DEFAULT_CHUNK_SIZE):
+        staged = [
+            (i, values(obj), obj)
+            for i, obj in enumerate(objects[start:start + DEFAULT_CHUNK_SIZE], start)
+        ]
+        stored, failed = insert_chunk(db, table, staged)
+        saved.extend((obj, row_id) for (_, _, obj), row_id in stored)
+        rejected += len(failed)
+    return saved, rejected
+
+
+def _insert_rows(db, table, values: list) -> None:
+    for start in range(0, len(values), DEFAULT_CHUNK_SIZE):
+        db.execute(insert(table.__table__), values[start:start + DEFAULT_CHUNK_SIZE])
+
+
+def _advance_sequences(db, *tables) -> None:
+    """PostgreSQL: explicit ids don't move the id sequence, so move it past them."""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for table in filter(None, tables):
+        name = table.__tablename__
+        db.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), (SELECT max(id) FROM {name}))"
+        ))
+
+
+# ---------- Database -> memory ----------
+def pull(db, system, db_ids: dict) -> dict:
+    """Load what only the database has into ``system``."""
+    doctor_ids = db_ids["doctors"] - system.doctors.keys()
+    patient_ids = db_ids["patients"] - system.patients.keys()
+    appointment_ids = db_ids["scheduled"] - {appt.id for appt in system.appointments}
+
+    doctors = patients = appointments = ()
+    if doctor_ids:
+        doctors = doctor_tuples(
+            _rows_with_ids(db, select(*DOCTOR_COLUMNS), DoctorDB.id, doctor_ids),
+            leave_days_by_doctor(db, doctor_ids if len(doctor_ids) <= HYDRATE_BATCH else None),
+        )
+    if patient_ids:
+        patients = _rows_with_ids(
+            db, select(PatientDB.id, PatientDB.name, PatientDB.age, PatientDB.symptoms), PatientDB.id, patient_ids
+        )
+    if appointment_ids:
+        appointments = _rows_with_ids(
+            db,
+            select(
+                AppointmentDB.id,
+                AppointmentDB.doctor_id,
+                AppointmentDB.patient_id,
+                AppointmentDB.scheduled_time,
+                AppointmentDB.status,
+                AppointmentDB.duration_minutes,
+            ).where(AppointmentDB.status == Appointment.STATUS_SCHEDULED),
+            AppointmentDB.id,
+            appointment_ids,
+        )
+
+    before = len(system.appointments)
+    system.load(doctors, patients, appointments)
+    return {
+        "doctors": len(doctor_ids),
+        "patients": len(patient_ids),
+        "appointments": len(system.appointments) - before,
+    }
+
+
+def _rows_with_ids(db, stmt, id_column, ids: set):
+    """Rows of ``stmt`` whose id is in ``ids``: an IN list when it is short,
+    otherwise one streamed pass filtered here."""
+    if len(ids) <= HYDRATE_BATCH:
+        return db.execute(stmt.where(id_column.in_(ids)).order_by(id_column)).all()
+    rows = db.execute(stmt.order_by(id_column).execution_options(yield_per=HYDRATE_BATCH))
+    return (row for row in rows if row[0] in ids)
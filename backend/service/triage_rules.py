@@ -0,0 +1,106 @@
+import re
+from collections import defaultdict
+
+# keyword / synonym -> weight, per specialty accepted by Doctor.validate_specialty.
+# Plural "s"/"es" endings are matched automatically.
+SPECIALTY_KEYWORDS = {
+    "Cardiologist": {
+        "chest pain": 4, "chest tightness": 4, "chest": 2, "heart": 3, "heart attack": 5,
+        "palpitation": 4, "bp": 2, "blood pressure": 3, "hypertension": 3,
+        "irregular heartbeat": 4, "heartbeat": 3, "angina": 4, "breathless": 2,
+        "shortness of breath": 2, "swollen ankle": 2, "cholesterol": 2,
+    },
+    "Dermatologist": {
+        "skin": 3, "rash": 4, "itch": 3, "itching": 3, "itchy": 3, "allergy": 2,
+        "acne": 4, "pimple": 4, "eczema": 4, "psoriasis": 4, "hives": 4, "mole": 3,
+        "hair loss": 3, "dandruff": 3, "blister": 2, "fungal": 3,
+    },
+    "Pediatrician": {
+        "child": 3, "baby": 4, "infant": 4, "toddler": 4, "newborn": 4, "kid": 3,
+        "vaccination": 2, "my son": 3, "my daughter": 3, "teething": 4,
+    },
+    "Orthopedic Surgeon": {
+        "bone": 3, "fracture": 4, "joint pain": 4, "joint": 2, "knee": 3, "back pain": 3,
+        "shoulder": 2, "sprain": 3, "ligament": 3, "hip": 2, "arthritis": 3,
+        "dislocation": 4, "spine": 3, "neck pain": 2,
+    },
+    "Neurologist": {
+        "headache": 3, "migraine": 4, "seizure": 5, "epilepsy": 5, "numbness": 4,
+        "numb": 3, "tingling": 3, "dizziness": 2, "dizzy": 2, "memory loss": 4,
+        "tremor": 4, "paralysis": 5, "stroke": 5, "fainting": 2, "vertigo": 2,
+    },
+    "ENT Specialist": {
+        "ear": 3, "earache": 4, "ear pain": 4, "hearing": 3, "throat": 3, "sore throat": 3,
+        "tonsil": 4, "sinus": 4, "nose": 3, "nosebleed": 3, "blocked nose": 3,
+        "tinnitus": 4, "hoarse voice": 3, "snoring": 2,
+    },
+    "General Physician": {
+        "fever": 3, "cough": 3, "cold": 3, "flu": 3, "fatigue": 2, "tired": 1,
+        "weakness": 2, "body ache": 3, "vomiting": 2, "nausea": 2, "diarrhea": 2,
+        "infection": 1, "checkup": 3, "diabetes": 2, "weight loss": 1,
+    },
+    "Surgeon": {
+        "appendicitis": 5, "hernia": 5, "gallstone": 5, "lump": 3, "wound": 3,
+        "abscess": 4, "lower right abdominal pain": 4, "surgery": 3, "stitches": 3,
+    },
+    "Gynecologist": {
+        "pregnant": 5, "pregnancy": 5, "period": 3, "menstrual": 4, "menstruation": 4,
+        "pelvic pain": 3, "vaginal": 5, "pcos": 5, "menopause": 4, "ovary": 4,
+        "ovarian": 4, "uterus": 4, "missed period": 5,
+    },
+}
+
+DEFAULT_SPECIALTY = "General Physician"
+
+# complaints that must not wait behind routine bookings in the booking queue
+URGENT_KEYWORDS = (
+    "chest pain", "chest tightness", "heart attack", "stroke", "seizure", "paralysis",
+    "shortness of breath", "difficulty breathing", "unconscious", "fainting",
+    "severe bleeding", "heavy bleeding", "suicidal",
+)
+_URGENT_PATTERN = re.compile(r"\b(" + "|".join(re.escape(w) for w in URGENT_KEYWORDS) + r")")
+
+
+def is_urgent(symptom_text: str) -> bool:
+    return _URGENT_PATTERN.search(symptom_text.lower()) is not None
+
+# score at which a single specialty is considered clearly indicated
+STRONG_SCORE = 4.0
+
+
+class KeywordTriageClassifier:
+    """Keyword/synonym triage compiled into one regex automaton.
+
+    ``classify`` returns the best-scoring specialty and a confidence in
+    [0, 1]: the winner's share of the total score, scaled down while the
+    winning score is still below STRONG_SCORE.
+    """
+
+    def __init__(self, keywords: dict = None, default: str = DEFAULT_SPECIALTY):
+        keywords = keywords or SPECIALTY_KEYWORDS
+        self.default = default
+        self._weights = defaultdict(list)   # keyword -> [(specialty, weight)]
+        for specialty, words in keywords.items():
+            for word, weight in words.items():
+                self._weights[word.lower()].append((specialty, weight))
+
+        # longest first, so "chest pain" wins over "chest" at the same position
+        alternatives = sorted(self._weights, key=len, reverse=True)
+        self._pattern = re.compile(
+            r"\b(" + "|".join(re.escape(w) for w in alternatives) + r")(?:e?s)?\b"
+        )
+
+    def scores(self, symptom_text: str) -> dict:
+        scores = defaultdict(float)
+        for match in self._pattern.finditer(symptom_text.lower()):
+            for specialty, weight in self._weights[match.group(1)]:
+                scores[specialty] += weight
+        return scores
+
+    def classify(self, symptom_text: str) -> tuple:
+        scores = self.scores(symptom_text)
+        if not scores:
+            return self.default, 0.0
+        specialty, best = max(scores.items(), key=lambda item: item[1])
+        confidence = best / sum(scores.values()) * min(1.0, best / STRONG_SCORE)
+        return specialty, confidence
@@ -0,0 +1,172 @@
+"""End-to-end API load test: throughput and p50/p95/p99 per endpoint, offline.
+
+    python -m benchmarks.bench_api
+    python -m benchmarks.bench_api --requests 2000 --concurrency 32 --latency 0.2 --ambiguous 0.5 --json api.json
+
+A fresh SQLite database is served by ``uvicorn backend.main:app`` with the
+Ollama stub (``--latency`` seconds per call) as the model. Doctors and
+patients are seeded through the bulk endpoints, then each scenario sends
+``--requests`` requests from ``--concurrency`` concurrent clients:
+
+- book:      POST /appointments/by-symptom with auto_book; ``--ambiguous``
+             of the symptom texts are unique and vague, so the rules hand
+             them to the model
+- queued:    the same bookings with ?queued=true; latency runs until the
+             polled job has finished, and its status is the one the job
+             reports (429 when the queue turned the request away)
+- slots:     GET /slots for a random specialty
+- doctors:   GET /doctors?limit=100
+- patients:  GET /patients?limit=1000
+- revalidate: GET /doctors?limit=100 with the ETag of that page in
+             If-None-Match, as a polling browser sends it (304 counts as ok)
+
+Latency is measured client-side, from sending the request to reading the
+whole response.
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import httpx
+
+from ai.ollama_stub import start_stub
+from benchmarks.common import save_results, start_server, summarize
+
+BASE = datetime(2030, 1, 7, 9, 0)
+SPECIALTIES = ["Cardiologist", "Dermatologist", "Orthopedic Surgeon", "General Physician"]
+CLEAR_SYMPTOMS = ["chest pain and palpitations", "itchy rash on my arms", "knee pain after a fracture"]
+
+
+def scenarios(args, rng: random.Random, etag: str = None) -> dict:
+    """Scenario name -> list of (method, url, json body[, headers]) requests."""
+    booking = []
+    for i in range(args.requests):
+        if rng.random() < args.ambiguous:
+            symptoms = f"feeling unwell since {i} days"
+        else:
+            symptoms = rng.choice(CLEAR_SYMPTOMS)
+        booking.append(("POST", "/appointments/by-symptom", {
+            "patient_name": f"Patient {rng.randrange(args.patients)}",
+            "symptoms": symptoms,
+            "scheduled_time": BASE.isoformat(),
+            "auto_book": True,
+        }))
+    return {
+        "book": booking,
+        "queued": [("POST", path + "?queued=true", body) for _, path, body in booking],
+        "slots": [
+            ("GET", f"/slots?specialty={rng.choice(SPECIALTIES)}&start={BASE.isoformat()}", None)
+            for _ in range(args.requests)
+        ],
+        "doctors": [("GET", "/doctors?limit=100", None)] * args.requests,
+        "patients": [("GET", "/patients?limit=1000", None)] * args.requests,
+        "revalidate": [("GET", "/doctors?limit=100", None, {"If-None-Match": etag} if etag else {})] * args.requests,
+    }
+
+
+async def _job_outcome(client, location: str, poll: float = 0.01) -> int:
+    """Poll a queued booking until it has finished; the status it reports."""
+    while True:
+        job = (await client.get(location)).json()
+        if job["status"] in ("done", "failed"):
+            return job["status_code"]
+        await asyncio.sleep(poll)
+
+
+async def _drive(url: str, requests: list, concurrency: int) -> tuple:
+    """(latencies in ms, status counts, elapsed seconds)"""
+    latencies = []
+    statuses = {}
+    queue = iter(requests)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120.0) as client:
+        async def worker():
+            for method, path, body, *headers in queue:
+                sent = time.perf_counter()
+                response = await client.request(method, path, json=body, headers=headers[0] if headers else None)
+                status = response.status_code
+                if status == 202:
+                    status = await _job_outcome(client, response.headers["location"])
+                latencies.append((time.perf_counter() - sent) * 1e3)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencies, statuses, elapsed
+
+
+def seed(url: str, args) -> None:
+    doctors = [
+        {"name": f"Doctor {i}", "age": 45, "specialty": SPECIALTIES[i % len(SPECIALTIES)],
+         "contact": f"555-{i:04d}"}
+        for i in range(args.doctors)
+    ]
+    patients = [{"name": f"Patient {i}", "age": 30, "symptoms": "none"} for i in range(args.patients)]
+    httpx.post(url + "/doctors/bulk", json=doctors, timeout=120.0).raise_for_status()
+    httpx.post(url + "/patients/bulk", json=patients, timeout=120.0).raise_for_status()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--doctors", type=int, default=40)
+    parser.add_argument("--patients", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.05, help="Ollama stub seconds per call")
+    parser.add_argument("--ambiguous", type=float, default=0.3, help="share of bookings the model triages")
+    parser.add_argument("--scenarios", nargs="+", default=["book", "queued", "slots", "doctors"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="also write the results to PATH")
+    args = parser.parse_args()
+
+    stub, ollama_url = start_stub(latency=args.latency)
+    results = []
+    print(f"{'scenario':<10} {'ok':>6} {'other':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(
+                os.environ,
+                MEDITEL_DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                MEDITEL_TRIAGE_CACHE_DB="",
+                OLLAMA_URL=ollama_url,
+            )
+            subprocess.run([sys.executable, "-m", "backend.migrations"], env=env, check=True,
+                           stdout=subprocess.DEVNULL)
+            server, url = start_server(env)
+            try:
+                seed(url, args)
+                etag = httpx.get(url + "/doctors?limit=100").headers.get("etag")
+                planned = scenarios(args, random.Random(args.seed), etag)
+                for name in args.scenarios:
+                    latencies, statuses, elapsed = asyncio.run(_drive(url, planned[name], args.concurrency))
+                    stats = summarize(latencies)
+                    ok = statuses.get(200, 0) + statuses.get(304, 0)
+                    row = {
+                        "name": name,
+                        "requests": len(latencies),
+                        "ok": ok,
+                        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+                        "requests_per_s": len(latencies) / elapsed,
+                        **{f"{k}_ms": v for k, v in stats.items() if k != "n"},
+                    }
+                    results.append(row)
+                    print(f"{name:<10} {ok:>6} {len(latencies) - ok:>6} {row['requests_per_s']:>8.0f} "
+                          f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f}")
+            finally:
+                server.terminate()
+                server.wait()
+    finally:
+        stub.shutdown()
+    if args.json:
+        save_results(args.json, "api", args, results)
+
+
+if __name__ == "__main__":
+    main()
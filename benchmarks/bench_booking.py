@@ -0,0 +1,91 @@
+"""Booking latency vs. number of stored appointments.
+
+Run from the repo root:
+    python -m benchmarks.bench_booking
+    python -m benchmarks.bench_booking --sizes 1000 10000 100000 1000000
+    python -m benchmarks.bench_booking --max-growth 2 --json booking.json
+
+Latency should stay flat as bookings pile up. Baseline on one CPU, 100
+doctors: 31.5 / 38.0 / 24.1 / 27.1 us per booking at 1k / 10k / 100k / 1M.
+``--max-growth F`` exits with status 1 when the largest size is more than
+F times slower than the smallest; tests/test_booking_latency.py runs the
+same check on a smaller range.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from backend.models.doctors import Doctor
+from backend.models.patients import Patient
+from backend.service.scheduler import Scheduler
+from benchmarks.common import save_results
+
+BASE = datetime(2025, 1, 1, 9, 0)
+SLOT = timedelta(minutes=30)
+SLOTS_PER_DAY = 16   # the default 09:00-17:00 schedule
+
+
+def slot_time(k: int) -> datetime:
+    """k-th bookable slot from BASE, skipping nights."""
+    return BASE + timedelta(days=k // SLOTS_PER_DAY) + (k % SLOTS_PER_DAY) * SLOT
+
+
+def build_scheduler(n_appointments: int, n_doctors: int) -> Scheduler:
+    doctors = [Doctor(f"Doctor {i}", 40, "Cardiologist") for i in range(n_doctors)]
+    patient = Patient("Bench Patient", 30, "chest pain")
+    scheduler = Scheduler(doctors, [])
+    per_doctor = n_appointments // n_doctors
+    for d in doctors:
+        for k in range(per_doctor):
+            scheduler.schedule(d, patient, slot_time(k))
+    return scheduler
+
+
+def measure(scheduler: Scheduler, n_bookings: int, seed: int = 0) -> float:
+    """Mean microseconds per booking at random (mostly taken) slots."""
+    rng = random.Random(seed)
+    patient = Patient("Probe", 30, "probe")
+    doctors = scheduler.doctors
+    horizon = max(len(scheduler.appointments) // len(doctors), 1) * 2
+    start = time.perf_counter()
+    for _ in range(n_bookings):
+        doctor = rng.choice(doctors)
+        when = slot_time(rng.randrange(horizon))
+        try:
+            scheduler.schedule(doctor, patient, when)
+        except ValueError:
+            slot = scheduler.next_free_slot(doctor, when)
+            if slot is not None:
+                scheduler.schedule(doctor, patient, slot)
+    return (time.perf_counter() - start) / n_bookings * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--doctors", type=int, default=100)
+    parser.add_argument("--bookings", type=int, default=20_000)
+    parser.add_argument("--max-growth", type=float, metavar="F",
+                        help="fail if the largest size is more than F times slower than the smallest")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to PATH")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'stored':>10} {'us/booking':>12}")
+    for size in args.sizes:
+        scheduler = build_scheduler(size, args.doctors)
+        latency = measure(scheduler, args.bookings)
+        results.append({"name": f"stored={size}", "stored": size, "booking_us": latency})
+        print(f"{size:>10} {latency:>12.2f}")
+    if args.json:
+        save_results(args.json, "booking", args, results)
+
+    growth = results[-1]["booking_us"] / results[0]["booking_us"]
+    print(f"growth {results[0]['stored']} -> {results[-1]['stored']}: {growth:.2f}x")
+    if args.max_growth is not None and growth > args.max_growth:
+        raise SystemExit(f"booking latency grew {growth:.2f}x, more than {args.max_growth}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Availability query latency over the per-day slot bitmaps.
+
+    python -m benchmarks.bench_calendar
+    python -m benchmarks.bench_calendar --doctors 500 --days 90 --fill 0.6 --queries 20000
+
+Doctors get varied schedules (hours, slot length, a lunch break, weekends
+off, some leave), ``fill`` of their slots are booked (the bitmaps are kept in step), then
+random queries are timed:
+
+- is_slot_free:      one doctor, one start time
+- next_free_slot:    one doctor, first free slot after a random time
+- find_free_slots:   earliest 10 slots across a specialty, over the days (at most MAX_SLOT_SEARCH)
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta, time as dtime
+
+from backend.models.doctors import Doctor
+from backend.models.patients import Patient
+from backend.models.schedule import WorkSchedule
+from backend.service.scheduler import MAX_SLOT_SEARCH, Scheduler
+
+FIRST_DAY = date(2025, 1, 6)
+SPECIALTIES = [
+    "Cardiologist", "Dermatologist", "Pediatrician", "Orthopedic Surgeon", "Neurologist",
+    "ENT Specialist", "General Physician", "Surgeon", "Gynecologist",
+]
+
+
+def random_schedule(rng: random.Random, days: int) -> WorkSchedule:
+    start = rng.choice([dtime(8, 0), dtime(9, 0), dtime(10, 0)])
+    end = rng.choice([dtime(16, 0), dtime(17, 0), dtime(18, 0)])
+    leave = {FIRST_DAY + timedelta(days=rng.randrange(days)) for _ in range(rng.randrange(6))}
+    return WorkSchedule(
+        start=start,
+        end=end,
+        slot_minutes=rng.choice([15, 20, 30]),
+        breaks=[(dtime(13, 0), dtime(14, 0))],
+        working_days=range(5) if rng.random() < 0.7 else range(6),
+        leave_days=leave,
+    )
+
+
+def build(n_doctors: int, days: int, fill: float, seed: int = 0) -> Scheduler:
+    rng = random.Random(seed)
+    doctors = [
+        Doctor(f"Doctor {i}", 45, SPECIALTIES[i % len(SPECIALTIES)], schedule=random_schedule(rng, days))
+        for i in range(n_doctors)
+    ]
+    scheduler = Scheduler(doctors, [])
+    patient = Patient("Bench", 30, "none")
+    for doctor in doctors:
+        schedule = doctor.schedule
+        for offset in range(days):
+            day = FIRST_DAY + timedelta(days=offset)
+            for i in range(schedule.slot_count):
+                if rng.random() < fill:
+                    slot = schedule.slot_start(day, i)
+                    if scheduler.is_slot_free(doctor, slot):
+                        scheduler.schedule(doctor, patient, slot, schedule.slot)
+    return scheduler
+
+
+def timed(fn, args_list) -> list:
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def report(name: str, samples: list) -> None:
+    samples.sort()
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print(f"{name:<16} {statistics.mean(samples):>9.2f} {samples[len(samples) // 2]:>9.2f} {p99:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--doctors", type=int, default=500)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--fill", type=float, default=0.6, help="share of slots booked")
+    parser.add_argument("--queries", type=int, default=20_000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    scheduler = build(args.doctors, args.days, args.fill)
+    print(f"{args.doctors} doctors x {args.days} days, {len(scheduler.appointments)} bookings, "
+          f"built in {time.perf_counter() - started:.1f}s")
+
+    rng = random.Random(1)
+    doctors = list(scheduler.doctors)
+    horizon = min(timedelta(days=args.days), MAX_SLOT_SEARCH)
+
+    def random_time() -> datetime:
+        day = FIRST_DAY + timedelta(days=rng.randrange(args.days))
+        return datetime.combine(day, dtime(8, 0)) + timedelta(minutes=15 * rng.randrange(40))
+
+    probes = [(rng.choice(doctors), random_time()) for _ in range(args.queries)]
+    searches = [
+        (rng.choice(SPECIALTIES), datetime.combine(FIRST_DAY, dtime(0, 0)),
+         datetime.combine(FIRST_DAY, dtime(0, 0)) + horizon, None, 10)
+        for _ in range(max(1, args.queries // 20))
+    ]
+
+    print(f"{'query':<16} {'mean us':>9} {'p50 us':>9} {'p99 us':>9}")
+    report("is_slot_free", timed(scheduler.is_slot_free, probes))
+    report("next_free_slot", timed(scheduler.next_free_slot, probes))
+    report("find_free_slots", timed(scheduler.find_free_slots, searches))
+
+
+if __name__ == "__main__":
+    main()
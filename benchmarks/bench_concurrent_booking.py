@@ -0,0 +1,90 @@
+"""Concurrent booking stress test: zero double-bookings, throughput vs workers.
+
+    python -m benchmarks.bench_concurrent_booking
+    python -m benchmarks.bench_concurrent_booking --bookings 20000 --workers 1 2 4 8 16 --commit-ms 2
+
+Each worker books random (doctor, slot) pairs through Scheduler.schedule
+and schedule_by_symptom, then sleeps ``commit-ms`` outside the doctor lock
+to stand in for the DB insert that follows a reservation in the API.
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from backend.models.appointment import Appointment
+from backend.models.doctors import Doctor
+from backend.models.patients import Patient
+from backend.service.scheduler import Scheduler
+
+BASE = datetime(2025, 1, 1, 9, 0)
+SLOT = timedelta(minutes=30)
+SLOTS_PER_DAY = 16   # the default 09:00-17:00 schedule
+
+
+def slot_time(k: int) -> datetime:
+    """k-th bookable slot from BASE, skipping nights."""
+    return BASE + timedelta(days=k // SLOTS_PER_DAY) + (k % SLOTS_PER_DAY) * SLOT
+
+
+def run(workers: int, bookings: int, n_doctors: int, n_slots: int, commit_ms: float, seed: int = 0):
+    doctors = [Doctor(f"Doctor {i}", 40, "Cardiologist") for i in range(n_doctors)]
+    patient = Patient("Stress", 30, "chest pain")
+    scheduler = Scheduler(doctors, [])
+
+    def book(i: int) -> bool:
+        rng = random.Random(seed * 1_000_003 + i)
+        when = slot_time(rng.randrange(n_slots))
+        try:
+            if i % 2:
+                scheduler.schedule(rng.choice(doctors), patient, when)
+            else:
+                scheduler.schedule_by_symptom(patient, "chest pain", when, specialty="Cardiologist")
+        except ValueError:
+            return False
+        if commit_ms:
+            time.sleep(commit_ms / 1000)
+        return True
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        booked = sum(pool.map(book, range(bookings)))
+    elapsed = time.perf_counter() - start
+    return booked, elapsed, double_bookings(scheduler)
+
+
+def double_bookings(scheduler: Scheduler) -> int:
+    """Overlapping scheduled pairs, checked from scratch (not via the index)."""
+    by_doctor = {}
+    for appt in scheduler.appointments:
+        if appt.status == Appointment.STATUS_SCHEDULED:
+            by_doctor.setdefault(appt.doctor, []).append(appt)
+    overlaps = 0
+    for appts in by_doctor.values():
+        appts.sort(key=lambda a: a.date_time)
+        overlaps += sum(1 for a, b in zip(appts, appts[1:]) if b.date_time < a.end_time)
+    return overlaps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bookings", type=int, default=5000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--doctors", type=int, default=20)
+    parser.add_argument("--slots", type=int, default=300, help="slots per doctor to fight over")
+    parser.add_argument("--commit-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'booked':>8} {'rejected':>9} {'doubles':>8} {'bookings/s':>11}")
+    failed = False
+    for workers in args.workers:
+        booked, elapsed, doubles = run(workers, args.bookings, args.doctors, args.slots, args.commit_ms)
+        failed |= doubles > 0
+        print(f"{workers:>8} {booked:>8} {args.bookings - booked:>9} {doubles:>8} {args.bookings / elapsed:>11.0f}")
+    if failed:
+        raise SystemExit("double bookings detected")
+
+
+if __name__ == "__main__":
+    main()
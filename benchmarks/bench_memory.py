@@ -0,0 +1,94 @@
+"""Memory per domain object and per booking held by MeditelSystem.
+
+    python -m benchmarks.bench_memory
+    python -m benchmarks.bench_memory --patients 200000 --appointments 1000000
+
+Allocations are counted with tracemalloc while the objects are built, so
+the numbers include the attribute storage, the strings and datetimes each
+object owns and, for the system rows, the indexes that point at them.
+"""
+import argparse
+import gc
+import random
+import tracemalloc
+from datetime import datetime, timedelta
+
+from backend.meditel import MeditelSystem
+from backend.models.appointment import Appointment
+from backend.models.doctors import Doctor
+from backend.models.patients import Patient
+
+BASE = datetime(2025, 1, 6, 9, 0)
+SPECIALTIES = ["Cardiologist", "Dermatologist", "Neurologist", "General Physician"]
+SYMPTOMS = ["fever", "cough", "chest pain", "headache", "rash", "fatigue"]
+SLOTS_PER_DAY = 16
+
+
+def measure(build) -> tuple:
+    """(bytes allocated and still alive, result) for ``build()``."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def doctor_rows(n: int):
+    """Rows shaped like the database's; fresh strings and datetimes, as a driver returns them."""
+    rng = random.Random(0)
+    for i in range(n):
+        yield i + 1, f"Doctor {i}", 45, "".join(rng.choice(SPECIALTIES)), "555-0100", None
+
+
+def patient_rows(n: int):
+    rng = random.Random(1)
+    for i in range(n):
+        yield i + 1, f"Patient {i}", 30, ", ".join(rng.sample(SYMPTOMS, 2))
+
+
+def appointment_rows(n: int, n_doctors: int, n_patients: int):
+    rng = random.Random(2)
+    per_doctor = n // n_doctors
+    for d in range(n_doctors):
+        for k in range(per_doctor):
+            when = BASE + timedelta(days=k // SLOTS_PER_DAY, minutes=30 * (k % SLOTS_PER_DAY))
+            yield d * per_doctor + k + 1, d + 1, rng.randrange(n_patients) + 1, when, "".join("Scheduled"), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--doctors", type=int, default=500)
+    parser.add_argument("--patients", type=int, default=100_000)
+    parser.add_argument("--appointments", type=int, default=500_000)
+    args = parser.parse_args()
+
+    n_doctors, n_patients, n_appts = args.doctors, args.patients, args.appointments
+    n_appts -= n_appts % n_doctors
+    print(f"{'object':<28} {'count':>9} {'bytes/object':>13}")
+
+    size, _ = measure(lambda: [Patient(name, age, symptoms) for _, name, age, symptoms in patient_rows(n_patients)])
+    print(f"{'Patient':<28} {n_patients:>9} {size / n_patients:>13.0f}")
+
+    size, _ = measure(lambda: [
+        Doctor(name, age, specialty, contact) for _, name, age, specialty, contact, _ in doctor_rows(n_doctors)
+    ])
+    print(f"{'Doctor':<28} {n_doctors:>9} {size / n_doctors:>13.0f}")
+
+    doctor, patient = Doctor("Bench", 45, "Cardiologist"), Patient("Bench", 30, "fever")
+    size, _ = measure(lambda: [
+        Appointment(doctor, patient, when) for _, _, _, when, _, _ in appointment_rows(n_appts, n_doctors, n_patients)
+    ])
+    print(f"{'Appointment':<28} {n_appts:>9} {size / n_appts:>13.0f}")
+
+    system = MeditelSystem(use_ai=False)
+    size, _ = measure(lambda: system.load(doctor_rows(n_doctors), patient_rows(n_patients), []))
+    print(f"{'system: doctor/patient row':<28} {n_doctors + n_patients:>9} {size / (n_doctors + n_patients):>13.0f}")
+    size, _ = measure(lambda: system.load([], [], appointment_rows(n_appts, n_doctors, n_patients)))
+    print(f"{'system: appointment row':<28} {n_appts:>9} {size / n_appts:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
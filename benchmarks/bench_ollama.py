@@ -0,0 +1,87 @@
+"""Triage model calls: streamed early exit vs waiting for the whole generation.
+
+    python -m benchmarks.bench_ollama
+    python -m benchmarks.bench_ollama --calls 50 --latency 0.2 --token-latency 0.03 --chatter 40 --json ollama.json
+
+Both clients talk to the Ollama stub, which answers after ``--latency``
+seconds and then, like a chatty model, keeps generating ``--chatter``
+tokens at ``--token-latency`` seconds each:
+
+- single:  predict_specialty, one symptom text per call
+- batch:   predict_specialties, ``--batch`` texts per call
+
+``full`` waits for ``"stream": false``; ``stream`` reads tokens and hangs
+up once a known specialty name is complete. ``tokens`` is what the stub
+generated per call, i.e. the model work that was not cut short.
+"""
+import argparse
+import time
+
+from ai.ollama_client import Ollama_triage_client
+from ai.ollama_stub import start_stub
+from backend.service.triage_rules import SPECIALTY_KEYWORDS
+from benchmarks.common import save_results, summarize
+
+SYMPTOMS = ["pain in my knee", "fluttering in my chest", "itchy patches", "my baby is unwell", "ringing ears"]
+
+
+def run(client, handler, fn, calls: list) -> tuple:
+    """(milliseconds per call, tokens generated per call)"""
+    latencies = []
+    tokens_before = handler.tokens
+    for args in calls:
+        started = time.perf_counter()
+        fn(client, *args)
+        latencies.append((time.perf_counter() - started) * 1e3)
+    # tokens still being written when the client hung up are counted a moment later
+    time.sleep(0.1)
+    return latencies, (handler.tokens - tokens_before) / len(calls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=10, help="texts per batch call")
+    parser.add_argument("--latency", type=float, default=0.1, help="stub seconds before the first token")
+    parser.add_argument("--token-latency", type=float, default=0.02, help="stub seconds per token")
+    parser.add_argument("--chatter", type=int, default=30, help="tokens the stub adds after the answer")
+    parser.add_argument("--num-predict", type=int, default=64, help="token cap per answer")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to PATH")
+    args = parser.parse_args()
+
+    server, url = start_stub(latency=args.latency, token_latency=args.token_latency, chatter=args.chatter)
+    handler = server.RequestHandlerClass
+    singles = [(SYMPTOMS[i % len(SYMPTOMS)],) for i in range(args.calls)]
+    batches = [([SYMPTOMS[(i + j) % len(SYMPTOMS)] for j in range(args.batch)],) for i in range(args.calls)]
+    cases = [
+        ("single", lambda client, text: client.predict_specialty(text), singles),
+        ("batch", lambda client, texts: client.predict_specialties(texts), batches),
+    ]
+
+    results = []
+    print(f"{'case':<14} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'tokens':>8}")
+    try:
+        for name, fn, calls in cases:
+            for mode in ("full", "stream"):
+                client = Ollama_triage_client(
+                    url=url,
+                    specialties=SPECIALTY_KEYWORDS,
+                    stream=mode == "stream",
+                    num_predict=args.num_predict,
+                    batch_size=args.batch,
+                )
+                latencies, tokens = run(client, handler, fn, calls)
+                stats = summarize(latencies)
+                row = {"name": f"{name}/{mode}", "tokens": tokens,
+                       **{f"{k}_ms": v for k, v in stats.items() if k != "n"}}
+                results.append(row)
+                print(f"{row['name']:<14} {row['mean_ms']:>9.1f} {row['p50_ms']:>9.1f} "
+                      f"{row['p95_ms']:>9.1f} {tokens:>8.1f}")
+    finally:
+        server.shutdown()
+    if args.json:
+        save_results(args.json, "ollama", args, results)
+
+
+if __name__ == "__main__":
+    main()
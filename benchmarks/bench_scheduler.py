@@ -0,0 +1,137 @@
+"""Scheduler micro-benchmarks at increasing data sizes.
+
+    python -m benchmarks.bench_scheduler
+    python -m benchmarks.bench_scheduler --sizes 1000 100000 1000000 --queries 20000 --json scheduler.json
+
+For every size (stored appointments, spread over ``--doctors`` doctors) the
+same random queries are timed, in microseconds per call:
+
+- is_slot_free:         one doctor, one slot
+- next_free_slot:       one doctor, first free slot after a random time
+- candidate_doctors:    specialty lookup + selection-policy ordering
+- triage_rules:         symptom text the keyword rules are sure about
+- triage_cache_hit:     ambiguous text whose answer is cached
+- triage_fallback:      ambiguous text, model fails, rules answer anyway
+- schedule_by_symptom:  triage + candidate search + booking, end to end
+
+No network: the "model" is an object that raises, as when Ollama is down.
+"""
+import argparse
+import logging
+import random
+from datetime import datetime, timedelta
+
+from ai.triage_cache import TriageCache
+from backend.models.doctors import Doctor
+from backend.models.patients import Patient
+from backend.service.scheduler import Scheduler
+from benchmarks.common import save_results, summarize, timed
+
+BASE = datetime(2025, 1, 1, 9, 0)
+SLOT = timedelta(minutes=30)
+SLOTS_PER_DAY = 16   # the default 09:00-17:00 schedule
+SPECIALTIES = [
+    "Cardiologist", "Dermatologist", "Pediatrician", "Orthopedic Surgeon", "Neurologist",
+    "ENT Specialist", "General Physician", "Surgeon", "Gynecologist",
+]
+CLEAR_SYMPTOMS = ["chest pain and palpitations", "itchy rash on both arms", "migraine and numbness"]
+
+
+def slot_time(k: int) -> datetime:
+    """k-th bookable slot from BASE, skipping nights."""
+    return BASE + timedelta(days=k // SLOTS_PER_DAY) + (k % SLOTS_PER_DAY) * SLOT
+
+
+class UnreachableModel:
+    """Stands in for an Ollama client whose server is down."""
+
+    def predict_specialty(self, symptom_text: str) -> str:
+        raise ConnectionError("model unavailable")
+
+    def predict_specialties(self, symptom_texts: list) -> list:
+        raise ConnectionError("model unavailable")
+
+
+def build(n_appointments: int, n_doctors: int, seed: int = 0) -> Scheduler:
+    doctors = [Doctor(f"Doctor {i}", 45, SPECIALTIES[i % len(SPECIALTIES)]) for i in range(n_doctors)]
+    scheduler = Scheduler(doctors, [], ollama_client=UnreachableModel(), triage_cache=TriageCache(max_size=4096))
+    patient = Patient("Bench", 30, "none")
+    rng = random.Random(seed)
+    per_doctor = n_appointments // n_doctors
+    for doctor in doctors:
+        # ~2/3 of the slots in each doctor's booked range are taken
+        for k in rng.sample(range(per_doctor * 3 // 2), per_doctor):
+            scheduler.schedule(doctor, patient, slot_time(k))
+    return scheduler
+
+
+def run_size(n_appointments: int, args) -> list:
+    scheduler = build(n_appointments, args.doctors, args.seed)
+    rng = random.Random(args.seed + 1)
+    doctors = scheduler.doctors
+    horizon = n_appointments // args.doctors * 3 // 2 + 1
+    n = args.queries
+
+    probes = [(rng.choice(doctors), slot_time(rng.randrange(horizon))) for _ in range(n)]
+    lookups = [(rng.choice(SPECIALTIES), slot_time(rng.randrange(horizon))) for _ in range(n)]
+    clear = [(rng.choice(CLEAR_SYMPTOMS),) for _ in range(n)]
+    cached_texts = [f"feeling off, case {i}" for i in range(64)]
+    for text in cached_texts:
+        scheduler.triage_cache.set(text, "General Physician")
+    cached = [(rng.choice(cached_texts),) for _ in range(n)]
+    # unique texts so the cache never answers
+    unknown = [(f"feeling unwell since {i} days",) for i in range(n)]
+
+    patient = Patient("Probe", 30, "none")
+    bookings = [
+        (patient, rng.choice(CLEAR_SYMPTOMS), slot_time(rng.randrange(horizon * 2)))
+        for _ in range(max(1, n // 10))
+    ]
+
+    def book(patient, symptoms, when):
+        try:
+            scheduler.schedule_by_symptom(patient, symptoms, when)
+        except ValueError:
+            pass
+
+    cases = [
+        ("is_slot_free", scheduler.is_slot_free, probes),
+        ("next_free_slot", scheduler.next_free_slot, probes),
+        ("candidate_doctors", scheduler.candidate_doctors, lookups),
+        ("triage_rules", scheduler._infer_specialty_from_symptoms, clear),
+        ("triage_cache_hit", scheduler._infer_specialty_from_symptoms, cached),
+        ("triage_fallback", scheduler._infer_specialty_from_symptoms, unknown),
+        ("schedule_by_symptom", book, bookings),
+    ]
+    rows = []
+    for name, fn, calls in cases:
+        stats = summarize(timed(fn, calls))
+        rows.append({"name": f"{name}@{n_appointments}", "appointments": n_appointments,
+                     **{f"{k}_us" if k != "n" else k: v for k, v in stats.items()}})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--doctors", type=int, default=90)
+    parser.add_argument("--queries", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="also write the results to PATH")
+    args = parser.parse_args()
+    # one "model failed" warning per fallback query would swamp the table
+    logging.getLogger("backend").setLevel(logging.ERROR)
+
+    results = []
+    print(f"{'case':<32} {'mean us':>9} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9}")
+    for size in args.sizes:
+        for row in run_size(size, args):
+            results.append(row)
+            print(f"{row['name']:<32} {row['mean_us']:>9.2f} {row['p50_us']:>9.2f} "
+                  f"{row['p95_us']:>9.2f} {row['p99_us']:>9.2f}")
+    if args.json:
+        save_results(args.json, "scheduler", args, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Similarity index for triage reuse: query latency and answer quality at 100k texts.
+
+    python -m benchmarks.bench_similarity
+    python -m benchmarks.bench_similarity --texts 100000 --queries 2000 --threshold 0.8 --json similarity.json
+
+Synthetic complaints are built from a few of one specialty's keywords
+plus filler words, and the distinct ones are stored with that specialty.
+Then:
+
+- add:        inserting one text, ms (includes the periodic reweighting)
+- reworded:   a stored text with one filler word dropped and one word moved: should hit, with its specialty
+- novel:      a fresh text nobody stored: a hit is fine only if the specialty agrees
+- save/load:  writing the ``.npz`` and reading it back into a new index
+
+``accuracy`` is the share of hits whose specialty is the text's own.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from ai.symptom_index import SymptomIndex
+from backend.service.triage_rules import SPECIALTY_KEYWORDS
+from benchmarks.common import save_results, summarize
+
+FILLER = (
+    "since yesterday for two days weeks worse at night in the morning after eating mild severe "
+    "sudden on and off getting worse when walking sometimes constant sharp dull"
+).split()
+
+
+def complaint(rng: random.Random, specialty: str) -> list:
+    keywords = list(SPECIALTY_KEYWORDS[specialty])
+    words = " ".join(rng.sample(keywords, rng.randint(2, 3))).split()
+    words += rng.sample(FILLER, rng.randint(2, 5))
+    rng.shuffle(words)
+    return words
+
+
+def reworded(rng: random.Random, words: list) -> str:
+    words = list(words)
+    fillers = [i for i, w in enumerate(words) if w in FILLER]
+    if fillers:
+        del words[rng.choice(fillers)]
+    words.insert(rng.randrange(len(words)), words.pop(rng.randrange(len(words))))
+    return " ".join(words)
+
+
+def run_queries(index, queries: list) -> tuple:
+    """(milliseconds per query, hits, hits with the expected specialty)"""
+    latencies, hits, right = [], 0, 0
+    for text, specialty in queries:
+        started = time.perf_counter()
+        match = index.match(text)
+        latencies.append((time.perf_counter() - started) * 1e3)
+        if match is not None:
+            hits += 1
+            right += match[0] == specialty
+    return latencies, hits, right
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--texts", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", metavar="PATH", help="also write the results to PATH")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    specialties = list(SPECIALTY_KEYWORDS)
+    stored, seen = [], set()
+    while len(stored) < args.texts:
+        specialty = rng.choice(specialties)
+        words = complaint(rng, specialty)
+        if " ".join(words) not in seen:
+            seen.add(" ".join(words))
+            stored.append((words, specialty))
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.npz")
+        index = SymptomIndex(path=path, threshold=args.threshold, max_size=args.texts, save_every=args.texts + 1)
+        add_ms = []
+        for words, specialty in stored:
+            started = time.perf_counter()
+            index.add(" ".join(words), specialty)
+            add_ms.append((time.perf_counter() - started) * 1e3)
+        print(f"indexed {index.size} texts, {index.stats()['features']} features")
+
+        samples = rng.sample(stored, args.queries)
+        cases = [
+            ("reworded", [(reworded(rng, words), specialty) for words, specialty in samples]),
+            ("novel", [(" ".join(complaint(rng, s)), s) for s in rng.choices(specialties, k=args.queries)]),
+        ]
+        print(f"{'case':<10} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'hit rate':>9} {'accuracy':>9}")
+        stats = summarize(add_ms)
+        results.append({"name": "add", **{f"{k}_ms": v for k, v in stats.items() if k != "n"}})
+        print(f"{'add':<10} {stats['mean']:>9.3f} {stats['p50']:>9.3f} {stats['p95']:>9.3f} {stats['p99']:>9.3f}")
+        for name, queries in cases:
+            latencies, hits, right = run_queries(index, queries)
+            stats = summarize(latencies)
+            row = {"name": name, "hit_rate": hits / len(queries), "accuracy": right / hits if hits else None,
+                   **{f"{k}_ms": v for k, v in stats.items() if k != "n"}}
+            results.append(row)
+            accuracy = f"{row['accuracy']:>9.3f}" if hits else f"{'-':>9}"
+            print(f"{name:<10} {stats['mean']:>9.3f} {stats['p50']:>9.3f} {stats['p95']:>9.3f} "
+                  f"{stats['p99']:>9.3f} {row['hit_rate']:>9.3f} {accuracy}")
+
+        # the file is read on the first query
+        for name, step in (("save", index.save), ("load", lambda: SymptomIndex(path=path).match("chest pain"))):
+            started = time.perf_counter()
+            step()
+            elapsed = (time.perf_counter() - started) * 1e3
+            results.append({"name": name, "mean_ms": elapsed})
+            print(f"{name:<10} {elapsed:>9.1f}")
+    if args.json:
+        save_results(args.json, "similarity", args, results)
+
+
+if __name__ == "__main__":
+    main()
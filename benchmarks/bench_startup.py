@@ -0,0 +1,133 @@
+"""Cold start: import time of the app, time until uvicorn answers, first requests.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 10 --doctors 500 --patients 100000 --json startup.json
+
+A SQLite database is migrated and seeded once, then every run starts from
+a fresh interpreter, as an autoscaled instance would:
+
+- import:         ``import backend.main`` in a new process
+- ready:          spawning ``uvicorn backend.main:app`` until GET /metrics answers
+- first_booking:  the first POST /appointments/by-symptom, which loads the roster
+- warm_booking:   the next one, for comparison
+
+The symptom text is one the keyword rules answer, so the model is never
+called (and, with the lazy client, never even built).
+"""
+import argparse
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.common import free_port, save_results, summarize
+
+BOOKING = {
+    "patient_name": "Patient 0",
+    "symptoms": "chest pain and palpitations",
+    "scheduled_time": "2030-01-07T09:00:00",
+    "auto_book": True,
+}
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); import backend.main; "
+    "print((time.perf_counter() - started) * 1e3)"
+)
+
+
+def seed(db_path: str, n_doctors: int, n_patients: int) -> None:
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO doctors (name, age, specialty, contact) VALUES (?, 45, 'Cardiologist', ?)",
+            ((f"Doctor {i}", f"555-{i:04d}") for i in range(n_doctors)),
+        )
+        conn.executemany(
+            "INSERT INTO patients (name, age, symptoms) VALUES (?, 30, 'none')",
+            ((f"Patient {i}",) for i in range(n_patients)),
+        )
+
+
+def import_ms(env: dict) -> float:
+    out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], env=env, check=True,
+                         capture_output=True, text=True).stdout
+    return float(out.split()[-1])
+
+
+def cold_start(env: dict) -> dict:
+    """Milliseconds from spawning uvicorn to its first answer, and the first two bookings."""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(base_url=url, timeout=60.0) as client:
+            while True:
+                if server.poll() is not None:
+                    raise RuntimeError("uvicorn exited during startup")
+                try:
+                    if client.get("/metrics").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    time.sleep(0.005)
+            ready = time.perf_counter()
+            timings = {"ready": (ready - started) * 1e3}
+            for name in ("first_booking", "warm_booking"):
+                sent = time.perf_counter()
+                client.post("/appointments/by-symptom", json=BOOKING).raise_for_status()
+                timings[name] = (time.perf_counter() - sent) * 1e3
+    finally:
+        server.terminate()
+        server.wait()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--doctors", type=int, default=200)
+    parser.add_argument("--patients", type=int, default=20_000)
+    parser.add_argument("--no-ai", action="store_true", help="run with MEDITEL_USE_AI=0")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to PATH")
+    args = parser.parse_args()
+
+    samples = {"import": [], "ready": [], "first_booking": [], "warm_booking": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "startup.db")
+        env = dict(
+            os.environ,
+            MEDITEL_DATABASE_URL=f"sqlite:///{db_path}",
+            MEDITEL_TRIAGE_CACHE_DB="",
+            MEDITEL_USE_AI="0" if args.no_ai else "1",
+            OLLAMA_URL="http://127.0.0.1:1/api/generate",
+        )
+        subprocess.run([sys.executable, "-m", "backend.migrations"], env=env, check=True,
+                       stdout=subprocess.DEVNULL)
+        seed(db_path, args.doctors, args.patients)
+        for _ in range(args.runs):
+            samples["import"].append(import_ms(env))
+            for name, value in cold_start(env).items():
+                samples[name].append(value)
+            # each run books the same slot; free it for the next one
+            with sqlite3.connect(db_path) as conn:
+                conn.execute("DELETE FROM appointments")
+
+    results = []
+    print(f"{'stage':<14} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, values in samples.items():
+        stats = summarize(values)
+        results.append({"name": name, "runs": stats["n"],
+                        **{f"{k}_ms": v for k, v in stats.items() if k != "n"}})
+        print(f"{name:<14} {stats['mean']:>9.1f} {stats['p50']:>9.1f} {stats['p95']:>9.1f}")
+    if args.json:
+        save_results(args.json, "startup", args, results)
+
+
+if __name__ == "__main__":
+    main()
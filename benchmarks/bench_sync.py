@@ -0,0 +1,90 @@
+"""sync-system-to-db at roster scale: memory -> empty database, then database -> empty memory.
+
+    python -m benchmarks.bench_sync
+    python -m benchmarks.bench_sync --doctors 1000 --patients 1000000 --appointments 200000
+
+A system is filled in memory only (placeholder ids), pushed into a fresh
+SQLite file with ``direction=to_db``, then a second, empty system pulls
+everything back with ``direction=from_db``. A final ``both`` run on the
+synced pair shows the cost of a sync with nothing to do.
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import Base
+from backend.meditel import MeditelSystem
+from backend.models.doctors import Doctor
+from backend.models.patients import Patient
+from backend.service.sync import sync_system
+
+BASE = datetime(2025, 1, 1, 9, 0)
+SLOT = timedelta(minutes=30)
+SLOTS_PER_DAY = 16   # the default 09:00-17:00 schedule
+SPECIALTIES = ["Cardiologist", "Dermatologist", "Neurologist", "General Physician"]
+
+
+def slot_time(k: int) -> datetime:
+    """k-th bookable slot from BASE, skipping nights."""
+    return BASE + timedelta(days=k // SLOTS_PER_DAY) + (k % SLOTS_PER_DAY) * SLOT
+
+
+def build(n_doctors: int, n_patients: int, n_appointments: int) -> MeditelSystem:
+    system = MeditelSystem(use_ai=False)
+    doctors = [Doctor(f"Doctor {i}", 45, SPECIALTIES[i % len(SPECIALTIES)], f"555-{i:04d}") for i in range(n_doctors)]
+    for doctor in doctors:
+        system.add_doctor(doctor)
+    patients = [Patient(f"Patient {i}", 30, "fever") for i in range(n_patients)]
+    for patient in patients:
+        system.add_patient(patient)
+    per_doctor = n_appointments // n_doctors
+    for d, doctor in enumerate(doctors):
+        for k in range(per_doctor):
+            system.create_appointment(doctor, patients[(d * per_doctor + k) % n_patients], slot_time(k))
+    return system
+
+
+def timed_sync(session_factory, system, direction: str) -> dict:
+    with session_factory() as db:
+        start = time.perf_counter()
+        result = sync_system(db, system, direction)
+        result["wall"] = time.perf_counter() - start
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--doctors", type=int, default=500)
+    parser.add_argument("--patients", type=int, default=200_000)
+    parser.add_argument("--appointments", type=int, default=100_000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    system = build(args.doctors, args.patients, args.appointments)
+    print(f"built {len(system.doctors)} doctors, {len(system.patients)} patients, "
+          f"{len(system.appointments)} appointments in {time.perf_counter() - started:.1f}s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'sync.db')}")
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine)
+
+        print(f"{'direction':<10} {'doctors':>8} {'patients':>9} {'appts':>8} {'seconds':>8}")
+        runs = [("to_db", system, "synced"), ("from_db", MeditelSystem(use_ai=False), "loaded")]
+        for direction, target, key in runs:
+            result = timed_sync(session_factory, target, direction)
+            counts = result[key]
+            print(f"{direction:<10} {counts['doctors']:>8} {counts['patients']:>9} "
+                  f"{counts['appointments']:>8} {result['wall']:>8.2f}")
+        result = timed_sync(session_factory, runs[1][1], "both")
+        print(f"{'both':<10} {'(no-op)':>8} {'':>9} {'':>8} {result['wall']:>8.2f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Multi-worker load test: API throughput vs uvicorn workers, zero double-bookings.
+
+    python -m benchmarks.bench_workers
+    python -m benchmarks.bench_workers --workers 1 2 4 8 --requests 4000 --concurrency 64
+
+For each worker count a fresh SQLite database is migrated and served by
+``uvicorn backend.main:app --workers N`` with MEDITEL_SHARED_STATE=1 and the
+Ollama stub as the model. Doctors and patients are seeded through the bulk
+endpoints of one worker (the others pick them up on a miss), then
+concurrent POST /appointments/by-symptom requests fight over a small set
+of slots. Finally the database is checked for overlapping live bookings.
+
+Throughput only scales with workers up to the number of CPU cores.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from ai.ollama_stub import start_stub
+from benchmarks.common import start_server
+
+BASE = datetime(2025, 1, 1, 9, 0)
+SLOT = timedelta(minutes=30)
+SLOTS_PER_DAY = 16   # the default 09:00-17:00 schedule
+SYMPTOMS = ["chest pain and palpitations", "itchy rash on my arms", "knee pain after a fracture"]
+SPECIALTIES = ["Cardiologist", "Dermatologist", "Orthopedic Surgeon"]
+
+
+def slot_time(k: int) -> datetime:
+    """k-th bookable slot from BASE, skipping nights."""
+    return BASE + timedelta(days=k // SLOTS_PER_DAY) + (k % SLOTS_PER_DAY) * SLOT
+
+
+def double_bookings(db_path: str) -> int:
+    """Live bookings of the same doctor less than one slot apart."""
+    with sqlite3.connect(db_path) as conn:
+        times = {}
+        for doctor_id, scheduled_time in conn.execute(
+            "SELECT doctor_id, scheduled_time FROM appointments WHERE status = 'Scheduled'"
+        ):
+            times.setdefault(doctor_id, []).append(datetime.fromisoformat(scheduled_time))
+    overlaps = 0
+    for starts in times.values():
+        starts.sort()
+        overlaps += sum(1 for a, b in zip(starts, starts[1:]) if b - a < SLOT)
+    return overlaps
+
+
+async def _drive(url: str, requests: int, concurrency: int, n_patients: int, n_slots: int, seed: int):
+    rng = random.Random(seed)
+    jobs = [
+        {
+            "patient_name": f"Patient {rng.randrange(n_patients)}",
+            "symptoms": rng.choice(SYMPTOMS),
+            "scheduled_time": slot_time(rng.randrange(n_slots)).isoformat(),
+        }
+        for _ in range(requests)
+    ]
+    statuses = {}
+    queue = iter(jobs)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60.0) as client:
+        async def worker():
+            for job in queue:
+                response = await client.post("/appointments/by-symptom", json=job)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return statuses, elapsed
+
+
+def run(workers: int, args, ollama_url: str) -> tuple:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        env = dict(
+            os.environ,
+            MEDITEL_DATABASE_URL=f"sqlite:///{db_path}",
+            MEDITEL_SHARED_STATE="1",
+            MEDITEL_TRIAGE_CACHE_DB=os.path.join(tmp, "triage_cache.db"),
+            OLLAMA_URL=ollama_url,
+        )
+        # schema first, so workers don't race on CREATE TABLE at import
+        subprocess.run([sys.executable, "-m", "backend.migrations"], env=env, check=True,
+                       stdout=subprocess.DEVNULL)
+
+        server, url = start_server(env, workers)
+        try:
+            doctors = [
+                {"name": f"Doctor {i}", "age": 45, "specialty": SPECIALTIES[i % len(SPECIALTIES)],
+                 "contact": f"555-{i:04d}"}
+                for i in range(args.doctors)
+            ]
+            patients = [{"name": f"Patient {i}", "age": 30, "symptoms": "none"} for i in range(args.patients)]
+            httpx.post(url + "/doctors/bulk", json=doctors, timeout=60.0).raise_for_status()
+            httpx.post(url + "/patients/bulk", json=patients, timeout=60.0).raise_for_status()
+
+            statuses, elapsed = asyncio.run(
+                _drive(url, args.requests, args.concurrency, args.patients, args.slots, args.seed)
+            )
+        finally:
+            server.terminate()
+            server.wait()
+        return statuses, elapsed, double_bookings(db_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--doctors", type=int, default=30)
+    parser.add_argument("--patients", type=int, default=500)
+    parser.add_argument("--slots", type=int, default=40, help="slots per doctor to fight over")
+    parser.add_argument("--latency", type=float, default=0.0, help="Ollama stub seconds per call")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    stub, ollama_url = start_stub(latency=args.latency)
+    print(f"{os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'booked':>7} {'busy':>6} {'other':>6} {'doubles':>8} {'req/s':>8} {'speedup':>8}")
+    failed = False
+    baseline = None
+    try:
+        for workers in args.workers:
+            statuses, elapsed, doubles = run(workers, args, ollama_url)
+            rate = args.requests / elapsed
+            baseline = baseline or rate
+            booked = statuses.get(200, 0)
+            busy = statuses.get(400, 0)
+            other = args.requests - booked - busy
+            failed |= doubles > 0 or other > 0
+            print(f"{workers:>8} {booked:>7} {busy:>6} {other:>6} {doubles:>8} {rate:>8.0f} {rate / baseline:>7.2f}x")
+    finally:
+        stub.shutdown()
+    if failed:
+        raise SystemExit("double bookings or unexpected responses detected")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Helpers shared by the benchmarks: latency summaries, JSON results, a local uvicorn.
+
+Results files written with ``--json`` can be diffed between commits:
+
+    python -m benchmarks.bench_scheduler --json before.json
+    git checkout other-branch
+    python -m benchmarks.bench_scheduler --json after.json
+    python -m benchmarks.common before.json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+
+def summarize(samples: list) -> dict:
+    """Mean and p50/p95/p99 of ``samples`` (same unit in, same unit out)."""
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+    return {
+        "n": len(ordered),
+        "mean": statistics.fmean(ordered),
+        "p50": pct(50),
+        "p95": pct(95),
+        "p99": pct(99),
+    }
+
+
+def timed(fn, args_list) -> list:
+    """Microseconds per ``fn(*args)`` call."""
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(path: str, benchmark: str, args: argparse.Namespace, results: list) -> None:
+    """Write ``results`` (a list of flat dicts keyed by a ``name``) with the run's context."""
+    document = {
+        "benchmark": benchmark,
+        "commit": _git_commit(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "args": vars(args),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+        f.write("\n")
+    print(f"results written to {path}")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(url: str, process, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            if httpx.get(url + "/triage/cache/stats", timeout=1.0).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("uvicorn did not become ready")
+
+
+def start_server(env: dict, workers: int = 1) -> tuple:
+    """``uvicorn backend.main:app`` on a free port; returns (process, base url) once it answers."""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        wait_ready(url, server)
+    except RuntimeError:
+        server.terminate()
+        server.wait()
+        raise
+    return server, url
+
+
+# metrics compared by suffix; other numeric fields (sizes, counts) are context
+_LOWER_IS_BETTER = ("_us", "_ms", "_seconds")
+_HIGHER_IS_BETTER = ("_per_s",)
+
+
+def compare(old: dict, new: dict, threshold: float) -> int:
+    """Print per-metric change between two results files; returns the number of regressions."""
+    before = {r["name"]: r for r in old["results"]}
+    regressions = 0
+    print(f"{old['benchmark']}: {old['commit']} -> {new['commit']}")
+    print(f"{'name':<36} {'metric':<14} {'before':>12} {'after':>12} {'change':>8}")
+    for row in new["results"]:
+        base = before.get(row["name"])
+        if base is None:
+            continue
+        for key, value in row.items():
+            if not key.endswith(_LOWER_IS_BETTER + _HIGHER_IS_BETTER) or not base.get(key):
+                continue
+            change = value / base[key] - 1
+            worse = change if key.endswith(_LOWER_IS_BETTER) else -change
+            flag = ""
+            if worse > threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(f"{row['name']:<36} {key:<14} {base[key]:>12.2f} {value:>12.2f} {change:>+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark results files")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change flagged as a regression")
+    args = parser.parse_args()
+
+    with open(args.before, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.after, encoding="utf-8") as f:
+        new = json.load(f)
+    if compare(old, new, args.threshold):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
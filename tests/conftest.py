@@ -0,0 +1,11 @@
+import os
+import tempfile
+
+# before anything imports backend.database: the app's engines are built at import
+_tmp = tempfile.mkdtemp(prefix="meditel-tests-")
+os.environ["MEDITEL_DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'meditel.db')}"
+os.environ.pop("MEDITEL_ASYNC_DATABASE_URL", None)
+os.environ["MEDITEL_AUTO_MIGRATE"] = "1"
+os.environ["MEDITEL_USE_AI"] = "0"
+os.environ["MEDITEL_TRIAGE_CACHE_DB"] = ""
+os.environ["MEDITEL_SIMILARITY_INDEX"] = ""
@@ -0,0 +1,14 @@
+from benchmarks.bench_booking import build_scheduler, measure
+
+# generous: single runs on a shared CI box are noisy, a size-dependent
+# lookup grows many times over this range
+MAX_GROWTH = 3.0
+
+
+def _best_of(size: int, runs: int = 3) -> float:
+    return min(measure(build_scheduler(size, 100), 2000, seed=run) for run in range(runs))
+
+
+def test_booking_latency_flat_in_stored_bookings():
+    small, large = _best_of(1_000), _best_of(100_000)
+    assert large < small * MAX_GROWTH, f"{small:.1f} us at 1k bookings, {large:.1f} us at 100k"
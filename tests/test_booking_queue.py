@@ -0,0 +1,139 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import backend.main as main
+from backend.service.booking_queue import DONE, FAILED, ROUTINE, URGENT, BookingQueue, QueueFull
+
+
+async def _until_finished(jobs) -> None:
+    while not all(job.finished for job in jobs):
+        await asyncio.sleep(0.005)
+
+
+def test_urgent_jobs_jump_the_queue():
+    async def scenario():
+        gate, order = asyncio.Event(), []
+
+        async def handler(payload):
+            await gate.wait()
+            order.append(payload)
+
+        queue = BookingQueue(handler, workers=1)
+        queue.start()
+        jobs = [queue.submit("first")]
+        await asyncio.sleep(0)   # the worker takes it and waits at the gate
+        jobs += [queue.submit("routine 1"), queue.submit("urgent", URGENT), queue.submit("routine 2", ROUTINE)]
+        gate.set()
+        await _until_finished(jobs)
+        await queue.stop()
+        return order
+
+    assert asyncio.run(scenario()) == ["first", "urgent", "routine 1", "routine 2"]
+
+
+def test_a_full_queue_refuses_with_retry_after():
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def handler(payload):
+            await gate.wait()
+
+        queue = BookingQueue(handler, workers=1, maxsize=2)
+        queue.start()
+        queue.submit(0)
+        await asyncio.sleep(0)
+        queue.submit(1)
+        queue.submit(2)
+        with pytest.raises(QueueFull) as refused:
+            queue.submit(3)
+        gate.set()
+        await queue.stop()
+        return refused.value.retry_after
+
+    # two jobs waiting, one worker, no timings yet (1 s per job assumed)
+    assert asyncio.run(scenario()) == 2
+
+
+def test_failures_keep_the_status_code_and_detail():
+    async def handler(payload):
+        if payload == "taken":
+            raise HTTPException(status_code=400, detail="Doctor is not available at this time.")
+        if payload == "bug":
+            raise RuntimeError("boom")
+        return "booked"
+
+    async def scenario():
+        queue = BookingQueue(handler, workers=2)
+        queue.start()
+        jobs = [queue.submit(payload) for payload in ("ok", "taken", "bug")]
+        await _until_finished(jobs)
+        await queue.stop()
+        return [(job.status, job.status_code, job.result, job.error) for job in jobs]
+
+    assert asyncio.run(scenario()) == [
+        (DONE, 200, "booked", None),
+        (FAILED, 400, None, "Doctor is not available at this time."),
+        (FAILED, 500, None, "boom"),
+    ]
+
+
+# ---------- POST /appointments/by-symptom?queued=true through the API ----------
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as client:
+        assert client.post(
+            "/doctors", json={"name": "Queue Doctor", "age": 45, "specialty": "Neurologist", "contact": "3"}
+        ).status_code == 200
+        assert client.post(
+            "/patients", json={"name": "Queue Patient", "age": 30, "symptoms": "migraine"}
+        ).status_code == 200
+        yield client
+
+
+def _book(client, hour: int):
+    return client.post("/appointments/by-symptom", params={"queued": "true"}, json={
+        "patient_name": "Queue Patient", "symptoms": "severe migraine",
+        "scheduled_time": f"2030-02-04T{hour:02d}:00:00",
+    })
+
+
+def _poll(client, location: str) -> dict:
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        job = client.get(location).json()
+        if job["status"] in (DONE, FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job still {job['status']}")
+
+
+def test_queued_booking_answers_202_and_is_polled(client):
+    accepted = _book(client, 10)
+    assert accepted.status_code == 202
+    assert accepted.json()["status"] == "queued"
+    assert accepted.json()["priority"] == "routine"
+    location = accepted.headers["Location"]
+    assert location == f"/appointments/jobs/{accepted.json()['id']}"
+
+    job = _poll(client, location)
+    assert (job["status"], job["status_code"]) == (DONE, 200)
+    assert job["appointment"]["doctor_name"] == "Queue Doctor"
+
+    # the same slot again: the failure the synchronous endpoint would have answered
+    job = _poll(client, _book(client, 10).headers["Location"])
+    assert (job["status"], job["status_code"]) == (FAILED, 400)
+
+
+def test_unknown_job_is_404(client):
+    assert client.get("/appointments/jobs/nope").status_code == 404
+
+
+def test_full_queue_answers_429_with_retry_after(client, monkeypatch):
+    monkeypatch.setattr(main.booking_queue._queue, "full", lambda: True)
+    refused = _book(client, 11)
+    assert refused.status_code == 429
+    assert int(refused.headers["Retry-After"]) >= 1
@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+import backend.service.bulk_import as bulk
+from backend.database import _sqlite_pragmas
+from backend.meditel import MeditelSystem
+from backend.migrations import upgrade
+from backend.models.db_models import AppointmentDB, PatientDB
+from backend.models.patients import Patient
+
+WHEN = datetime(2030, 1, 7, 9, 0)
+
+
+@pytest.fixture
+def db(tmp_path):
+    # a database of its own: the app's is shared with the API tests
+    engine = create_engine(f"sqlite:///{tmp_path / 'meditel.db'}")
+    event.listen(engine, "connect", _sqlite_pragmas)
+    upgrade(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+@pytest.fixture
+def system(db):
+    system = MeditelSystem(use_ai=False)
+    bulk.bulk_import(db, bulk.DoctorImport(system), [
+        {"name": "Doctor A", "age": 40, "specialty": "Cardiologist", "contact": "1"},
+    ])
+    bulk.bulk_import(db, bulk.PatientImport(system), [
+        {"name": f"Patient {i}", "age": 30, "symptoms": "chest pain"} for i in range(3)
+    ])
+    return system
+
+
+def _rows(system, *hours) -> list:
+    doctor = system.find_doctor("Doctor A")
+    return [
+        {"doctor_id": doctor.id, "patient_id": system.find_patient(f"Patient {i % 3}").id,
+         "scheduled_time": (WHEN + timedelta(hours=hour)).isoformat()}
+        for i, hour in enumerate(hours)
+    ]
+
+
+def _stored(db, table) -> int:
+    return db.scalar(select(func.count()).select_from(table))
+
+
+def _booked(system) -> list:
+    return sorted(appt.date_time for appt in system.appointments)
+
+
+def test_invalid_rows_are_reported_and_the_rest_stored(db):
+    system = MeditelSystem(use_ai=False)
+    result = bulk.bulk_import(db, bulk.PatientImport(system), [
+        {"name": "Ok 1", "age": 30, "symptoms": "fever"},
+        {"name": "No age", "symptoms": "fever"},
+        {"name": "Bad age", "age": "old", "symptoms": "fever"},
+        {"name": "Ok 2", "age": 41, "symptoms": "cough"},
+    ], chunk_size=3)
+    assert (result["total"], result["inserted"], result["failed"]) == (4, 2, 2)
+    assert [error["row"] for error in result["errors"]] == [1, 2]
+    assert "age" in result["errors"][0]["error"]
+    assert _stored(db, PatientDB) == 2
+    # in the system under their database ids
+    assert sorted(p.id for p in system.patients.values()) == sorted(db.scalars(select(PatientDB.id)))
+
+
+def test_rows_taking_a_booked_slot_are_rejected(db, system):
+    result = bulk.bulk_import(db, bulk.AppointmentImport(system), _rows(system, 0, 0, 1))
+    assert result["inserted"] == 2
+    assert [error["row"] for error in result["errors"]] == [1]
+    assert "not available" in result["errors"][0]["error"]
+    assert _booked(system) == [WHEN, WHEN + timedelta(hours=1)]
+
+
+def test_a_row_the_database_rejects_is_replayed_alone(db, system):
+    # known to the system but never stored: its row breaks the foreign key
+    ghost = Patient("Ghost", 30, "chest pain")
+    system.add_patient(ghost)
+    rows = _rows(system, 0, 1, 2)
+    rows[1]["patient_id"] = ghost.id
+
+    result = bulk.bulk_import(db, bulk.AppointmentImport(system), rows)
+
+    assert result["inserted"] == 2
+    assert result["errors"] == [{"row": 1, "error": "Rejected by the database: FOREIGN KEY constraint failed"}]
+    assert _stored(db, AppointmentDB) == 2
+    # the rejected row's booking was released
+    assert _booked(system) == [WHEN, WHEN + timedelta(hours=2)]
+    assert system.scheduler.is_slot_free(system.find_doctor("Doctor A"), WHEN + timedelta(hours=1))
+
+
+def test_a_failed_chunk_insert_releases_its_bookings(db, system, monkeypatch):
+    def locked(*args):
+        raise OperationalError("INSERT INTO appointments", {}, Exception("database is locked"))
+
+    rows = _rows(system, 0, 1)
+    with monkeypatch.context() as patched:
+        patched.setattr(bulk, "_insert_many", locked)
+        with pytest.raises(OperationalError):
+            bulk.bulk_import(db, bulk.AppointmentImport(system), rows)
+
+    assert system.appointments == []
+    assert _stored(db, AppointmentDB) == 0
+    # nothing left behind: the same rows go in on a retry
+    assert bulk.bulk_import(db, bulk.AppointmentImport(system), rows)["inserted"] == 2
+
+
+@pytest.mark.parametrize("content_type, body", [
+    ("application/json", b'[{"name": "A", "age": "30"}]'),
+    ("application/x-ndjson", b'{"name": "A", "age": "30"}\n\n'),
+    ("text/csv; charset=utf-8", b"\xef\xbb\xbfname,age,symptoms\r\nA,30,\r\n"),
+])
+def test_parse_rows(content_type, body):
+    rows = bulk.parse_rows(body, content_type)
+    assert [(row["name"], row["age"], row.get("symptoms")) for row in rows] == [("A", "30", None)]
@@ -0,0 +1,102 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+import backend.main as main
+from backend.database import SessionLocal
+from backend.models.db_models import AppointmentDB
+from backend.models.doctors import Doctor
+from backend.models.patients import Patient
+from backend.models.schedule import WorkSchedule
+from backend.service.scheduler import Scheduler
+from backend.service.slot_calendar import day_free_mask
+
+RACERS = 16
+
+
+def _race(fn, n: int = RACERS) -> list:
+    """Run ``fn(i)`` on ``n`` threads released together; the results in order."""
+    barrier = threading.Barrier(n)
+
+    def start(i):
+        barrier.wait()
+        return fn(i)
+
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        return list(pool.map(start, range(n)))
+
+
+def test_scheduler_books_a_slot_once():
+    doctor = Doctor("Doctor A", 40, "Cardiologist")
+    scheduler = Scheduler([doctor], [])
+    when = datetime(2030, 1, 7, 10, 0)
+
+    def book(i):
+        try:
+            return scheduler.schedule(doctor, Patient(f"Patient {i}", 30, "chest pain"), when)
+        except ValueError:
+            return None
+
+    booked = [appt for appt in _race(book) if appt is not None]
+    assert len(booked) == 1
+    assert scheduler.appointments == booked
+    assert scheduler.count_bookings(doctor, when, when + booked[0].duration) == 1
+
+
+def test_doctors_book_in_parallel_with_consistent_calendars():
+    schedule = WorkSchedule(time(9, 0), time(17, 0), 30)
+    doctors = [Doctor(f"Doctor {i}", 40, "Cardiologist", schedule=schedule) for i in range(RACERS)]
+    scheduler = Scheduler(doctors, [])
+    patient = Patient("Patient", 30, "chest pain")
+    days = [datetime(2030, 1, 7) + timedelta(days=d) for d in range(5)]
+
+    def book(i):
+        # every doctor fills and half-empties their own week while the others do the same
+        booked = [
+            scheduler.schedule(doctors[i], patient, day + timedelta(hours=9, minutes=30 * k))
+            for day in days for k in range(16)
+        ]
+        for appt in booked[::2]:
+            appt.cancel()
+
+    _race(book)
+    for doctor in doctors:
+        for day in days:
+            expected = day_free_mask(doctor, day.date(), scheduler.slot_index)
+            assert scheduler.calendar.free_mask(doctor, day.date()) == expected == int("01" * 8, 2)
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as client:
+        assert client.post(
+            "/doctors", json={"name": "Race Doctor", "age": 40, "specialty": "Cardiologist", "contact": "1"}
+        ).status_code == 200
+        for i in range(RACERS):
+            client.post("/patients", json={"name": f"Racer {i}", "age": 30, "symptoms": "chest pain"})
+        yield client
+
+
+def _stored_bookings(when: datetime) -> int:
+    with SessionLocal() as db:
+        return db.scalar(select(func.count()).select_from(AppointmentDB).where(AppointmentDB.scheduled_time == when))
+
+
+@pytest.mark.parametrize("shared_state", [False, True], ids=["in-memory", "shared-state"])
+def test_api_books_a_slot_once(client, monkeypatch, shared_state):
+    monkeypatch.setattr(main, "SHARED_STATE", shared_state)
+    when = datetime(2030, 1, 7, 10, 0) if not shared_state else datetime(2030, 1, 7, 11, 0)
+
+    def book(i):
+        return client.post("/appointments/by-symptom", json={
+            "patient_name": f"Racer {i}", "symptoms": "chest pain", "scheduled_time": when.isoformat(),
+        }).status_code
+
+    statuses = _race(book)
+    assert statuses.count(200) == 1, statuses
+    assert set(statuses) <= {200, 400, 409}
+    assert _stored_bookings(when) == 1
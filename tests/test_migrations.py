@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from backend.migrations import HOT_QUERIES, check_query_plans, upgrade
+
+
+@pytest.fixture
+def bind(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'meditel.db'}")
+    yield engine
+    engine.dispose()
+
+
+def _plans(engine) -> dict:
+    # pooled connections keep EXPLAIN statements prepared against the old schema
+    engine.dispose()
+    return check_query_plans(engine)
+
+
+def _secondary_indexes(engine) -> list:
+    inspector = inspect(engine)
+    return [
+        index["name"]
+        for table in inspector.get_table_names()
+        for index in inspector.get_indexes(table)
+        if not index["name"].startswith("sqlite_autoindex")
+    ]
+
+
+def _assert_plans_use_indexes(engine):
+    plans = _plans(engine)
+    assert plans.keys() == HOT_QUERIES.keys()
+    misses = {name: plan for name, (ok, plan) in plans.items() if not ok}
+    assert not misses, f"hot queries not served by their index: {misses}"
+
+
+def test_fresh_database_plans_use_indexes(bind):
+    upgrade(bind)
+    _assert_plans_use_indexes(bind)
+
+
+def test_upgrade_adds_missing_indexes(bind):
+    # a database from before the indexes: tables only
+    upgrade(bind)
+    with bind.begin() as conn:
+        for name in _secondary_indexes(bind):
+            conn.execute(text(f"DROP INDEX {name}"))
+    assert not any(ok for ok, _ in _plans(bind).values())
+
+    created = upgrade(bind)
+
+    assert {index for _, index in HOT_QUERIES.values()} <= set(created)
+    _assert_plans_use_indexes(bind)
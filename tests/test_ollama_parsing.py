@@ -0,0 +1,44 @@
+import pytest
+
+from ai.ollama_client import SpecialtyMatcher, parse_batch_response
+from backend.service.triage_rules import SPECIALTY_KEYWORDS
+
+matcher = SpecialtyMatcher(SPECIALTY_KEYWORDS)
+
+
+def test_batch_lines_in_any_numbering_style():
+    text = "1: Cardiologist\n2. Dermatologist\n 3) Neurologist \n4 - ENT Specialist"
+    assert parse_batch_response(text, 4) == ["Cardiologist", "Dermatologist", "Neurologist", "ENT Specialist"]
+
+
+def test_batch_missing_and_unnumbered_lines_are_none():
+    text = "Here you go:\n2: Surgeon\nthanks"
+    assert parse_batch_response(text, 3) == [None, "Surgeon", None]
+
+
+def test_batch_out_of_range_and_repeated_numbers_are_ignored():
+    text = "0: Surgeon\n1: Cardiologist\n1: Dermatologist\n5: Neurologist"
+    assert parse_batch_response(text, 2) == ["Cardiologist", None]
+
+
+def test_finds_a_name_in_a_finished_answer():
+    assert matcher.find("The patient should see a cardiologist.") == "Cardiologist"
+    assert matcher.find("Dermatologists") == "Dermatologist"
+    assert matcher.find("not sure") is None
+
+
+def test_longer_name_wins():
+    assert matcher.find("Orthopedic Surgeon") == "Orthopedic Surgeon"
+    assert matcher.find("ENT Specialist") == "ENT Specialist"
+
+
+@pytest.mark.parametrize("partial", ["Surg", "Surgeon", "Orthopedic", "Orthopedic Surg", "General"])
+def test_mid_stream_waits_for_a_complete_name(partial):
+    assert matcher.find(partial, final=False) is None
+
+
+def test_mid_stream_takes_a_name_once_something_follows():
+    assert matcher.find("Surgeon\n", final=False) == "Surgeon"
+    assert matcher.find("Orthopedic Surgeon,", final=False) == "Orthopedic Surgeon"
+    # the same text as the whole answer
+    assert matcher.find("Surgeon") == "Surgeon"
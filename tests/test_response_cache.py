@@ -0,0 +1,114 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import backend.main as main
+import backend.service.response_cache
+from backend.service.response_cache import ResponseCache, etag_for, etag_matches
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(backend.service.response_cache, "time", SimpleNamespace(monotonic=lambda: fake.now))
+    return fake
+
+
+def _put(cache, table, params, body=b"[]"):
+    return cache.put(table, params, cache.generation(table), body, {})
+
+
+def test_pages_are_served_until_the_ttl(clock):
+    cache = ResponseCache(ttl=30)
+    page = _put(cache, "doctors", (None,), b'[{"id": 1}]')
+    assert cache.get("doctors", (None,)) is page
+    assert cache.get("doctors", ("Cardiologist",)) is None
+    clock.now += 31
+    assert cache.get("doctors", (None,)) is None
+    assert (cache.stats()["hits"], cache.stats()["misses"], cache.stats()["size"]) == (1, 2, 0)
+
+
+def test_least_recently_used_page_is_evicted():
+    cache = ResponseCache(max_size=2)
+    for params in ("a", "b"):
+        _put(cache, "doctors", (params,))
+    cache.get("doctors", ("a",))
+    _put(cache, "doctors", ("c",))
+    assert cache.get("doctors", ("b",)) is None
+    assert cache.get("doctors", ("a",)) is not None
+
+
+def test_invalidate_drops_only_that_tables_pages():
+    cache = ResponseCache()
+    _put(cache, "doctors", (1,))
+    _put(cache, "patients", (1,))
+    cache.invalidate("doctors")
+    assert cache.get("doctors", (1,)) is None
+    assert cache.get("patients", (1,)) is not None
+
+
+def test_a_page_read_during_a_write_is_not_stored():
+    cache = ResponseCache()
+    generation = cache.generation("doctors")
+    cache.invalidate("doctors")   # a write commits while the page is being read
+    page = cache.put("doctors", (1,), generation, b"[]", {})
+    assert page.body == b"[]"     # still answered...
+    assert cache.get("doctors", (1,)) is None   # ...but not kept
+
+
+@pytest.mark.parametrize("header, matches", [
+    (None, False),
+    ("", False),
+    ("*", True),
+    ('"other"', False),
+    ('"other", W/{etag}', True),
+    ("{etag}", True),
+])
+def test_if_none_match(header, matches):
+    etag = etag_for(b"[]")
+    assert etag_matches(header and header.format(etag=etag), etag) is matches
+
+
+# ---------- GET /doctors through the API ----------
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+def _doctors(client, etag=None):
+    headers = {"If-None-Match": etag} if etag else {}
+    return client.get("/doctors", params={"specialty": "Dermatologist"}, headers=headers)
+
+
+def test_roster_etag_and_304(client):
+    first = _doctors(client)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    hits = main.roster_cache.stats()["hits"]
+    again = _doctors(client, etag)
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["ETag"] == etag
+    assert main.roster_cache.stats()["hits"] == hits + 1
+
+
+def test_roster_writes_invalidate_the_page(client):
+    etag = _doctors(client).headers["ETag"]
+    created = client.post("/doctors", json={
+        "name": "Cache Doctor", "age": 50, "specialty": "Dermatologist", "contact": "2",
+    })
+    assert created.status_code == 200
+
+    after_create = _doctors(client, etag)
+    assert after_create.status_code == 200
+    assert "Cache Doctor" in [doctor["name"] for doctor in after_create.json()]
+
+    doctor_id = next(d["id"] for d in after_create.json() if d["name"] == "Cache Doctor")
+    assert client.delete(f"/doctors/{doctor_id}").status_code == 200
+    after_delete = _doctors(client, after_create.headers["ETag"])
+    assert after_delete.status_code == 200
+    assert "Cache Doctor" not in [doctor["name"] for doctor in after_delete.json()]
@@ -0,0 +1,94 @@
+from datetime import date, datetime, time
+
+import pytest
+
+from backend.models.schedule import DEFAULT_SCHEDULE, WorkSchedule
+from backend.service.slot_calendar import run_starts
+
+MONDAY, SATURDAY = date(2030, 1, 7), date(2030, 1, 12)
+WEEKDAYS = range(5)
+
+
+def schedule(**kwargs) -> WorkSchedule:
+    # 9:00-13:00 in 30-minute slots (8 slots), lunch 11:00-11:30 (slot 4)
+    return WorkSchedule(time(9, 0), time(13, 0), 30, breaks=[(time(11, 0), time(11, 30))],
+                        working_days=WEEKDAYS, **kwargs)
+
+
+def at(day: date, hour: int, minute: int = 0) -> datetime:
+    return datetime.combine(day, time(hour, minute))
+
+
+def test_working_day_bitmap_leaves_out_breaks():
+    assert schedule().day_mask(MONDAY) == 0b11101111
+
+
+def test_days_off_and_leave_days_are_empty():
+    on_leave = schedule(leave_days=[MONDAY])
+    assert schedule().day_mask(SATURDAY) == 0
+    assert on_leave.day_mask(MONDAY) == 0
+    assert on_leave.window(MONDAY) is None
+    assert on_leave.day_mask(date(2030, 1, 8)) == 0b11101111
+
+
+def test_break_partly_covering_a_slot_takes_the_whole_slot():
+    lunch = WorkSchedule(time(9, 0), time(11, 0), 30, breaks=[(time(10, 15), time(10, 45))])
+    assert lunch.template == 0b0011   # 10:00 and 10:30 are gone
+
+
+@pytest.mark.parametrize("start, end, slots", [
+    ((9, 0), (9, 30), (0, 1)),
+    ((9, 30), (10, 15), (1, 3)),     # rounded up to whole slots
+    ((9, 15), (9, 45), None),        # off the grid
+    ((8, 30), (9, 0), None),         # before opening
+    ((12, 30), (13, 30), None),      # past closing
+])
+def test_slot_range(start, end, slots):
+    assert schedule().slot_range(at(MONDAY, *start), at(MONDAY, *end)) == slots
+
+
+@pytest.mark.parametrize("start, end, covered", [
+    ((9, 0), (10, 0), True),
+    ((10, 30), (11, 30), False),     # runs into lunch
+    ((11, 30), (13, 0), True),
+])
+def test_covers_is_the_bitmap_test(start, end, covered):
+    assert schedule().covers(at(MONDAY, *start), at(MONDAY, *end)) is covered
+
+
+def test_covers_nothing_on_a_leave_day():
+    assert not schedule(leave_days=[MONDAY]).covers(at(MONDAY, 9), at(MONDAY, 10))
+
+
+def test_unrestricted_schedule_takes_any_time_but_leave():
+    anytime = WorkSchedule(restricted=False, leave_days=[MONDAY])
+    assert DEFAULT_SCHEDULE.covers(at(SATURDAY, 22, 10), at(SATURDAY, 23, 5))
+    assert not anytime.covers(at(MONDAY, 10), at(MONDAY, 11))
+
+
+def test_run_starts_finds_room_for_consecutive_slots():
+    mask = schedule().day_mask(MONDAY)
+    assert run_starts(mask, 1) == mask
+    assert run_starts(mask, 3) == 0b00100011   # 9:00, 9:30, 10:00; 11:30 only
+    assert run_starts(mask, 5) == 0
+
+
+def test_columns_round_trip():
+    original = schedule(leave_days=[MONDAY])
+    restored = WorkSchedule.from_columns(**original.to_columns(), leave_days=[MONDAY])
+    assert restored.day_mask(MONDAY) == 0
+    assert restored.day_mask(date(2030, 1, 8)) == original.template
+    assert (restored.start, restored.end, restored.breaks) == (original.start, original.end, original.breaks)
+    assert WorkSchedule.from_columns() is DEFAULT_SCHEDULE
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"slot_minutes": 0},
+    {"start": time(12, 0), "end": time(9, 0)},
+    {"start": time(9, 0), "end": time(9, 20)},
+    {"working_days": [7]},
+    {"breaks": [(time(11, 0), time(10, 0))]},
+])
+def test_invalid_schedules_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        WorkSchedule(**kwargs)
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.models.appointment import Appointment
+from backend.models.doctors import Doctor
+from backend.models.patients import Patient
+from backend.service.slot_index import SlotIndex
+
+DAY = datetime(2030, 1, 7)
+DOCTOR = Doctor("Doctor A", 40, "Cardiologist")
+PATIENT = Patient("Patient A", 30, "chest pain")
+
+
+def at(hour: float, minutes: int = 30) -> Appointment:
+    return Appointment(DOCTOR, PATIENT, DAY + timedelta(hours=hour), timedelta(minutes=minutes))
+
+
+def t(hour: float) -> datetime:
+    return DAY + timedelta(hours=hour)
+
+
+@pytest.fixture
+def index():
+    index = SlotIndex()
+    for appt in (at(9), at(9.5), at(11, 60)):   # 9:00-10:00 back to back, 11:00-12:00
+        index.add(appt)
+    return index
+
+
+@pytest.mark.parametrize("start, end, free", [
+    (8, 9, True),       # ends as the first booking starts
+    (10, 11, True),     # the gap, touching both sides
+    (12, 13, True),     # starts as the last booking ends
+    (8.5, 9.25, False),
+    (9.75, 10.25, False),
+    (10.5, 11.25, False),
+    (11.25, 11.5, False),   # inside a booking
+    (8, 13, False),         # around everything
+])
+def test_is_free_treats_bookings_as_half_open(index, start, end, free):
+    assert index.is_free(DOCTOR, t(start), t(end)) is free
+
+
+def test_unknown_doctor_is_free():
+    assert SlotIndex().is_free(DOCTOR, t(9), t(10))
+
+
+def test_overlapping_includes_a_booking_that_started_earlier(index):
+    assert [a.date_time for a in index.overlapping(DOCTOR, t(9.75), t(11.5))] == [t(9.5), t(11)]
+    assert index.overlapping(DOCTOR, t(10), t(11)) == []
+
+
+@pytest.mark.parametrize("after, minutes, expected", [
+    (8, 30, 8),       # free right away
+    (8.75, 30, 10),   # 15 minutes before 9:00 are too short
+    (9.25, 60, 10),   # inside a block: its end
+    (9.25, 90, 12),   # the 10-11 gap is too short
+    (12, 30, 12),
+])
+def test_next_free_steps_over_short_gaps(index, after, minutes, expected):
+    assert index.next_free(DOCTOR, t(after), timedelta(minutes=minutes)) == t(expected)
+
+
+def test_removing_a_booking_splits_its_block(index):
+    first, second = index.bookings(DOCTOR)[:2]
+    index.remove(second)
+    assert index.is_free(DOCTOR, t(9.5), t(10))
+    assert not index.is_free(DOCTOR, t(9), t(9.5))
+    index.add(second)
+    index.remove(first)
+    assert index.is_free(DOCTOR, t(9), t(9.5))
+    assert index.next_free(DOCTOR, t(9), timedelta(minutes=60)) == t(10)
+
+
+def test_count_and_remove_many(index):
+    assert index.count(DOCTOR, t(9), t(11)) == 2
+    index.remove_many(DOCTOR, set(index.bookings(DOCTOR)[:2]))
+    assert [a.date_time for a in index.bookings(DOCTOR)] == [t(11)]
+    assert index.is_free(DOCTOR, t(9), t(11))
+    assert len(index) == 1
@@ -0,0 +1,89 @@
+import asyncio
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+import ai.triage_cache
+from ai.triage_cache import TriageCache, normalize_symptoms
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Stands in for time.time() in the cache module; advance with clock.now += seconds."""
+    fake = SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr(ai.triage_cache, "time", SimpleNamespace(time=lambda: fake.now))
+    return fake
+
+
+def test_keys_ignore_case_spacing_and_punctuation():
+    assert normalize_symptoms("  Chest PAIN, since\tmorning! ") == "chest pain since morning"
+    cache = TriageCache()
+    cache.set("Chest pain", "Cardiologist")
+    assert cache.get("chest   pain.") == "Cardiologist"
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = TriageCache(ttl=60)
+    cache.set("rash on arm", "Dermatologist")
+    clock.now += 59
+    assert cache.get("rash on arm") == "Dermatologist"
+    clock.now += 2
+    assert cache.get("rash on arm") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"], stats["size"]) == (1, 1, 1, 0)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TriageCache(max_size=2)
+    cache.set("a", "Cardiologist")
+    cache.set("b", "Dermatologist")
+    assert cache.get("a") == "Cardiologist"   # "b" is now the oldest
+    cache.set("c", "Neurologist")
+    assert cache.get("b") is None
+    assert cache.get("a") == "Cardiologist"
+    assert cache.get("c") == "Neurologist"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_writes_reach_the_table_in_the_background(tmp_path):
+    path = str(tmp_path / "triage.db")
+    cache = TriageCache(db_path=path)
+    for i in range(600):   # more than one write batch
+        cache.set(f"complaint {i}", "General Physician")
+    cache.flush()
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM triage_cache").fetchone()[0] == 600
+
+
+def test_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / "triage.db")
+    cache = TriageCache(db_path=path)
+    cache.set("ringing in ears", "ENT Specialist")
+    cache.flush()
+
+    reopened = TriageCache(db_path=path)
+    assert reopened.get("Ringing in ears") == "ENT Specialist"
+    assert asyncio.run(reopened.get_async("ringing in ears")) == "ENT Specialist"
+    assert reopened.stats()["persistent_hits"] == 1   # the second read came from memory
+
+
+def test_expired_rows_are_not_served_from_the_table(tmp_path, clock):
+    path = str(tmp_path / "triage.db")
+    cache = TriageCache(ttl=60, db_path=path)
+    cache.set("sore throat", "ENT Specialist")
+    cache.flush()
+    clock.now += 61
+    assert TriageCache(ttl=60, db_path=path).get("sore throat") is None
+    with sqlite3.connect(path) as conn:
+        # and are deleted when the table is opened
+        assert conn.execute("SELECT COUNT(*) FROM triage_cache").fetchone()[0] == 0
+
+
+def test_clear_empties_memory_and_table(tmp_path):
+    path = str(tmp_path / "triage.db")
+    cache = TriageCache(db_path=path)
+    cache.set("fever", "General Physician")
+    cache.clear()
+    assert cache.get("fever") is None
+    assert TriageCache(db_path=path).get("fever") is None
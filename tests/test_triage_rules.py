@@ -0,0 +1,58 @@
+import pytest
+
+from backend.service.scheduler import Scheduler
+from backend.service.triage_rules import DEFAULT_SPECIALTY, KeywordTriageClassifier, is_urgent
+
+classifier = KeywordTriageClassifier()
+
+
+def test_strong_unambiguous_keyword_is_fully_confident():
+    assert classifier.classify("I have had chest pain since morning") == ("Cardiologist", 1.0)
+
+
+def test_longest_keyword_wins_at_a_position():
+    # "chest pain" (4), not "chest" (2) plus nothing
+    assert classifier.scores("chest pain") == {"Cardiologist": 4}
+
+
+def test_plurals_match():
+    assert classifier.classify("rashes and blisters")[0] == "Dermatologist"
+
+
+def test_weak_keyword_is_scaled_below_the_strong_score():
+    # "tired" weighs 1: the winner's whole share, times 1 / STRONG_SCORE
+    assert classifier.classify("always tired") == ("General Physician", 0.25)
+
+
+def test_mixed_complaint_confidence_is_the_winners_share():
+    # skin 3 + rash 4 against migraine 4
+    assert classifier.classify("migraine and a skin rash") == ("Dermatologist", pytest.approx(7 / 11))
+
+
+def test_no_keyword_falls_back_to_the_default():
+    assert classifier.classify("something feels off") == (DEFAULT_SPECIALTY, 0.0)
+
+
+def test_words_inside_other_words_do_not_match():
+    assert classifier.scores("unearthed") == {}
+
+
+@pytest.mark.parametrize("threshold, confident", [(0.75, False), (0.2, True)])
+def test_scheduler_skips_the_model_only_above_its_threshold(threshold, confident):
+    scheduler = Scheduler([], [], confidence_threshold=threshold)
+    assert scheduler._classify_locally("always tired") == ("General Physician", confident)
+
+
+@pytest.mark.parametrize("text", [
+    "Chest pain since morning",
+    "sudden SEIZURE",
+    "difficulty breathing at night",
+    "had a stroke last year",
+])
+def test_urgent_complaints(text):
+    assert is_urgent(text)
+
+
+@pytest.mark.parametrize("text", ["chest acne", "mild headache", "heatstroke", ""])
+def test_routine_complaints(text):
+    assert not is_urgent(text)